@@ -0,0 +1,270 @@
+"""
+Microbenchmarks for the fitness functions and the genetic operators used throughout the chapters, and for whole
+generations of eaSimpleWithElitism. The results are printed as JSON, so that two revisions can be compared:
+
+    python benchmark.py --output before.json
+    python benchmark.py --filter TSP
+"""
+import argparse
+import importlib.util
+import json
+import os
+import platform
+import random
+import sys
+import timeit
+import warnings
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+sys.path[:0] = [os.path.join(ROOT, chapter) for chapter in ('ch4', 'ch5', 'ch6')]
+
+from deap import base  # noqa: E402
+from deap import creator  # noqa: E402
+from deap import tools  # noqa: E402
+
+import elitism  # noqa: E402
+import operators  # noqa: E402
+from tsp import TSP  # noqa: E402
+from vrp import VRP  # noqa: E402
+from queens import NQueensProblem  # noqa: E402
+from nurses import NurseSchedulingProblem  # noqa: E402
+from graphs import GraphColoringProblem  # noqa: E402
+
+# number of individuals evaluated by each timed call
+BATCH_SIZE = 100
+
+TSP_SIZES = (29, 100, 500)
+QUEENS_SIZES = (8, 16, 64, 256, 1000)
+MYCIELSKI_SIZES = (4, 5, 6, 7)
+KNAPSACK_SIZES = (22, 100, 500)
+NUM_OF_VEHICLES = 6
+HARD_CONSTRAINT_PENALTY = 10
+MAX_COLORS = 5
+
+# parameters of the generation benchmarks, close to those of 02-tsp.py
+POPULATION_SIZE = 300
+GENERATIONS = 5
+HALL_OF_FAME_SIZE = 30
+
+creator.create('BenchmarkFitnessMin', base.Fitness, weights=(-1.0,))
+creator.create('BenchmarkTour', list, fitness=creator.BenchmarkFitnessMin)
+
+
+def loadScript(chapter: str, fileName: str):
+    """
+    Imports one of the example scripts as a module, to reach the problems and fitness functions defined in it.
+    The main() function of the script is not run.
+    :param chapter: the chapter folder of the script.
+    :param fileName: the file name of the script.
+    :return: the script module.
+    """
+    name = 'benchmark_' + os.path.splitext(fileName)[0].replace('-', '_')
+    spec = importlib.util.spec_from_file_location(name, os.path.join(ROOT, chapter, fileName))
+    module = importlib.util.module_from_spec(spec)
+    with warnings.catch_warnings():
+        # the scripts create DEAP classes with the same names, e.g. 'Individual'
+        warnings.simplefilter('ignore', RuntimeWarning)
+        spec.loader.exec_module(module)
+    return module
+
+
+def measure(function, count: int, repeat: int) -> float:
+    """
+    Times the given function, using as many calls as needed for a reliable measurement and the best of several rounds.
+    :param function: the function to time, called without arguments.
+    :param count: the number of operations (evaluations, generations...) done by a single call.
+    :param repeat: the number of timing rounds.
+    :return: the number of operations per second.
+    """
+    timer = timeit.Timer(function)
+    number, _ = timer.autorange()
+    return count * number / min(timer.repeat(repeat, number))
+
+
+def createLocations(rng, size: int):
+    return rng.uniform(0, 1000, size=(size, 2))
+
+
+def createTours(rng, size: int) -> list:
+    return [rng.permutation(size).tolist() for _ in range(BATCH_SIZE)]
+
+
+def benchmarkFitness(name: str, size: int, fitness, individuals: list):
+    """
+    :return: a benchmark (name, size, function, count) that evaluates all the given individuals.
+    """
+    return name, size, lambda: [fitness(individual) for individual in individuals], len(individuals)
+
+
+def getFitnessBenchmarks(rng):
+    """
+    Generates the benchmarks of the fitness functions, each evaluating a batch of random individuals.
+    """
+    for size in TSP_SIZES:
+        tsp = TSP(f'random{size}', createLocations(rng, size))
+        tours = createTours(rng, size)
+        yield benchmarkFitness('TSP.getTotalDistance', size, tsp.getTotalDistance, tours)
+        matrix = np.array(tours)
+        yield 'TSP.getTotalDistances', size, lambda tsp=tsp, matrix=matrix: tsp.getTotalDistances(matrix), len(tours)
+
+    for size in TSP_SIZES:
+        vrp = VRP(f'random{size}', NUM_OF_VEHICLES, 0, createLocations(rng, size))
+        individuals = createTours(rng, len(vrp))
+        for method in ('getTotalDistance', 'getMinDistance', 'getMaxDistance', 'getAvgDistance',
+                       'getDistanceStatistics'):
+            yield benchmarkFitness('VRP.' + method, size, getattr(vrp, method), individuals)
+        matrix = np.array(individuals)
+        yield ('VRP.getDistanceStatisticsBatch', size,
+               lambda vrp=vrp, matrix=matrix: vrp.getDistanceStatisticsBatch(matrix), len(individuals))
+
+    for size in QUEENS_SIZES:
+        nQueens = NQueensProblem(size)
+        positions = createTours(rng, size)
+        yield benchmarkFitness('NQueensProblem.getViolationsCount', size, nQueens.getViolationsCount, positions)
+        matrix = np.array(positions)
+        yield ('NQueensProblem.getViolationsCounts', size,
+               lambda nQueens=nQueens, matrix=matrix: nQueens.getViolationsCounts(matrix), len(positions))
+
+    nsp = NurseSchedulingProblem(HARD_CONSTRAINT_PENALTY)
+    schedules = rng.integers(0, 2, size=(BATCH_SIZE, len(nsp))).tolist()
+    yield benchmarkFitness('NurseSchedulingProblem.getCost', len(nsp), nsp.getCost, schedules)
+
+    import networkx as nx
+    for size in MYCIELSKI_SIZES:
+        gcp = GraphColoringProblem(nx.mycielski_graph(size), HARD_CONSTRAINT_PENALTY)
+        colorings = rng.integers(0, MAX_COLORS, size=(BATCH_SIZE, len(gcp))).tolist()
+        yield benchmarkFitness('GraphColoringProblem.getCost', len(gcp), gcp.getCost, colorings)
+
+    knapsackScript = loadScript('ch4', '01-knapsack.py')
+    for size in KNAPSACK_SIZES:
+        weights = rng.integers(1, 100, size=size).tolist()
+        values = rng.integers(1, 200, size=size).tolist()
+        items = [(f'item{i}', weight, value) for i, (weight, value) in enumerate(zip(weights, values))]
+        knapsack = knapsackScript.Knapsack(items, sum(weights) // 2)
+        selections = rng.integers(0, 2, size=(BATCH_SIZE, size)).tolist()
+        yield benchmarkFitness('Knapsack.getValue', size, knapsack.getValue, selections)
+
+    for fileName, bound, function in (('01-eggholder.py', 512.0, 'eggholder'), ('02-himmelblau.py', 5.0, 'himmelblau')):
+        script = loadScript('ch6', fileName)
+        points = rng.uniform(-bound, bound, size=(BATCH_SIZE, 2)).tolist()
+        yield benchmarkFitness(function, 2, getattr(script, function), points)
+
+
+def benchmarkOperator(name: str, size: int, operator, *individuals):
+    """
+    :return: a benchmark (name, size, function, count) that applies the operator once to the given individuals.
+    """
+    return name, size, lambda: operator(*individuals), 1
+
+
+def getOperatorBenchmarks(rng):
+    """
+    Generates the benchmarks of the DEAP operators used by the scripts and of their batched versions in operators.py.
+    """
+    random.seed(42)
+    for size in TSP_SIZES:
+        tour1, tour2 = createTours(rng, size)[:2]
+        yield benchmarkOperator('tools.cxOrdered', size, tools.cxOrdered, tour1, tour2)
+        yield benchmarkOperator('tools.cxUniformPartialyMatched', size, tools.cxUniformPartialyMatched, tour1, tour2,
+                                2.0 / size)
+        yield benchmarkOperator('tools.mutShuffleIndexes', size, tools.mutShuffleIndexes, tour1, 1.0 / size)
+
+        bits1, bits2 = rng.integers(0, 2, size=(2, size)).tolist()
+        yield benchmarkOperator('tools.cxTwoPoint', size, tools.cxTwoPoint, bits1, bits2)
+        yield benchmarkOperator('tools.mutFlipBit', size, tools.mutFlipBit, bits1, 1.0 / size)
+        yield benchmarkOperator('tools.mutUniformInt', size, tools.mutUniformInt, bits1, 0, 1, 1.0 / size)
+
+    point1, point2 = rng.uniform(-5.0, 5.0, size=(2, 2)).tolist()
+    yield benchmarkOperator('tools.cxSimulatedBinaryBounded', 2, tools.cxSimulatedBinaryBounded, point1, point2, 20.0,
+                            -5.0, 5.0)
+    yield benchmarkOperator('tools.mutPolynomialBounded', 2, tools.mutPolynomialBounded, point1, 20.0, -5.0, 5.0, 0.5)
+
+    population = [creator.BenchmarkTour() for _ in range(POPULATION_SIZE)]
+    for individual in population:
+        individual.fitness.values = random.random(),
+    yield benchmarkOperator('tools.selTournament', POPULATION_SIZE, tools.selTournament, population, POPULATION_SIZE,
+                            2)
+
+    wvalues = rng.random((POPULATION_SIZE, 1))
+    yield benchmarkOperator('operators.selTournament', POPULATION_SIZE, operators.selTournament, wvalues,
+                            POPULATION_SIZE, rng, 2)
+    # the batched operators process the pairs of a whole population at once
+    for size in TSP_SIZES:
+        rows1, rows2 = rng.integers(0, 2, size=(2, POPULATION_SIZE // 2, size))
+        yield benchmarkOperator('operators.cxTwoPoint', size, operators.cxTwoPoint, rows1, rows2, rng)
+        yield benchmarkOperator('operators.mutFlipBit', size, operators.mutFlipBit, rows1, rng, 1.0 / size)
+        yield benchmarkOperator('operators.mutUniformInt', size, operators.mutUniformInt, rows1, rng, 0, 1, 1.0 / size)
+        yield benchmarkOperator('operators.mutGaussian', size, operators.mutGaussian, rows1.astype(float), rng, 0.0,
+                                1.0, 1.0 / size)
+
+        tours1, tours2 = (np.array(createTours(rng, size)[:POPULATION_SIZE // 2]) for _ in range(2))
+        yield benchmarkOperator('operators.cxOrdered', size, operators.cxOrdered, tours1, tours2, rng)
+        yield benchmarkOperator('operators.cxPartialyMatched', size, operators.cxPartialyMatched, tours1, tours2, rng)
+        yield benchmarkOperator('operators.mutInversion', size, operators.mutInversion, tours1, rng)
+        yield benchmarkOperator('operators.mutScramble', size, operators.mutScramble, tours1, rng)
+        yield benchmarkOperator('operators.mutSwap', size, operators.mutSwap, tours1, rng, 1.0 / size)
+
+
+def getGenerationBenchmarks(rng):
+    """
+    Generates the benchmarks of whole eaSimpleWithElitism generations on TSP problems, configured like 02-tsp.py.
+    The initial population is evaluated in advance, so only the evolution itself is timed.
+    """
+    random.seed(42)
+    for size in TSP_SIZES:
+        tsp = TSP(f'random{size}', createLocations(rng, size))
+
+        toolbox = base.Toolbox()
+        toolbox.register('evaluate', lambda individual, tsp=tsp: (tsp.getTotalDistance(individual),))
+        toolbox.register('select', tools.selTournament, tournsize=2)
+        toolbox.register('mate', tools.cxOrdered)
+        toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / size)
+
+        initialPopulation = [creator.BenchmarkTour(rng.permutation(size).tolist()) for _ in range(POPULATION_SIZE)]
+        for individual in initialPopulation:
+            individual.fitness.values = toolbox.evaluate(individual)
+
+        def evolve(toolbox=toolbox, initialPopulation=initialPopulation):
+            population = [toolbox.clone(individual) for individual in initialPopulation]
+            elitism.eaSimpleWithElitism(population, toolbox, cxpb=0.9, mutpb=0.1, ngen=GENERATIONS,
+                                        halloffame=tools.HallOfFame(HALL_OF_FAME_SIZE), verbose=False)
+
+        yield 'eaSimpleWithElitism', size, evolve, GENERATIONS
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--output', help='write the JSON results to this file instead of the standard output')
+    parser.add_argument('--filter', default='', help='only run the benchmarks whose name contains this text')
+    parser.add_argument('--repeat', type=int, default=3, help='number of timing rounds, the best one is reported')
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    results = []
+    for benchmarks, unit in ((getFitnessBenchmarks, 'evaluationsPerSecond'),
+                             (getOperatorBenchmarks, 'operationsPerSecond'),
+                             (getGenerationBenchmarks, 'generationsPerSecond')):
+        for name, size, function, count in benchmarks(rng):
+            if args.filter not in name:
+                continue
+            rate = measure(function, count, args.repeat)
+            results.append({'name': name, 'size': size, unit: rate})
+            print(f'{name} [{size}]: {rate:.1f} {unit}', file=sys.stderr)
+
+    report = {
+        'python': platform.python_version(),
+        'numpy': np.__version__,
+        'machine': platform.machine(),
+        'results': results,
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    else:
+        print(json.dumps(report, indent=2))
+
+
+if __name__ == '__main__':
+    main()
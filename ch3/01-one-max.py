@@ -3,8 +3,8 @@ from deap import creator
 from deap import tools
 from pprint import pprint
 
+import os
 import random
-import matplotlib.pyplot as plt
 
 ONE_MAX_LENGTH = 100  # length of binary string
 
@@ -14,6 +14,9 @@ P_CROSSOVER = 0.9
 P_MUTATION = 0.1
 MAX_GENERATIONS = 50
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # Fix random generator parameters
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
@@ -54,6 +57,20 @@ toolbox.register('mutate', tools.mutFlipBit, indpb=1.0 / ONE_MAX_LENGTH)
 # Genetic Flow
 
 
+def plotResults(maxFitnessValues, meanFitnessValues):
+    """
+    Plots the statistics. The plotting library is imported here, so that headless runs never load it.
+    """
+    import matplotlib.pyplot as plt
+
+    plt.plot(maxFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Max / Average Fitness')
+    plt.title('Max and Average fitness over Generations')
+    plt.show()
+
+
 def main():
     population = toolbox.populationCreator(n=POPULATION_SIZE)
     generationCounter = 0
@@ -113,12 +130,9 @@ def main():
         best_index = fitnessValues.index(max(fitnessValues))
         print('Best individual = ', *population[best_index], '\n')
 
-    plt.plot(maxFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Max / Average Fitness')
-    plt.title('Max and Average fitness over Generations')
-    plt.show()
+    if not HEADLESS:
+        plotResults(maxFitnessValues, meanFitnessValues)
+
 
 if __name__ == '__main__':
     main()
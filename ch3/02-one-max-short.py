@@ -5,8 +5,8 @@ from deap import algorithms
 from pprint import pprint
 import numpy
 
+import os
 import random
-import matplotlib.pyplot as plt
 
 ONE_MAX_LENGTH = 100  # length of binary string
 
@@ -16,6 +16,9 @@ P_CROSSOVER = 0.9
 P_MUTATION = 0.1
 MAX_GENERATIONS = 50
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # Fix random generator parameters
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
@@ -58,6 +61,21 @@ toolbox.register('mutate', tools.mutFlipBit, indpb=1.0 / ONE_MAX_LENGTH)
 # Genetic Flow
 
 
+def plotResults(logbook):
+    """
+    Plots the statistics. The plotting library is imported here, so that headless runs never load it.
+    """
+    import matplotlib.pyplot as plt
+
+    maxFitnessValues, meanFitnessValues = logbook.select('max', 'avg')
+    plt.plot(maxFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Max / Average Fitness')
+    plt.title('Max and Average fitness over Generations')
+    plt.show()
+
+
 def main():
     population = toolbox.populationCreator(n=POPULATION_SIZE)
     generationCounter = 0
@@ -74,13 +92,8 @@ def main():
     population, logbook = algorithms.eaSimple(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
                                               ngen=MAX_GENERATIONS, stats=stats, verbose=True)
 
-    maxFitnessValues, meanFitnessValues = logbook.select('max', 'avg')
-    plt.plot(maxFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Max / Average Fitness')
-    plt.title('Max and Average fitness over Generations')
-    plt.show()
+    if not HEADLESS:
+        plotResults(logbook)
 
 
 if __name__ == '__main__':
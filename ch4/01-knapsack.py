@@ -1,10 +1,10 @@
 import numpy as np
+import os
 import random
 from deap import base
 from deap import creator
 from deap import tools
 from deap import algorithms
-import matplotlib.pyplot as plt
 
 
 class Knapsack:
@@ -54,30 +54,7 @@ class Knapsack:
         print(f'- Total weight = {totalWeight}, Total value = {totalValue}')
 
 
-knapsack = Knapsack([
-    ("map", 9, 150),
-    ("compass", 13, 35),
-    ("water", 153, 200),
-    ("sandwich", 50, 160),
-    ("glucose", 15, 60),
-    ("tin", 68, 45),
-    ("banana", 27, 60),
-    ("apple", 39, 40),
-    ("cheese", 23, 30),
-    ("beer", 52, 10),
-    ("suntan cream", 11, 70),
-    ("camera", 32, 30),
-    ("t-shirt", 24, 15),
-    ("trousers", 48, 10),
-    ("umbrella", 73, 40),
-    ("waterproof trousers", 42, 70),
-    ("waterproof overclothes", 43, 75),
-    ("note-case", 22, 80),
-    ("sunglasses", 7, 20),
-    ("towel", 18, 12),
-    ("socks", 4, 50),
-    ("book", 30, 10)
-], 400)
+knapsack = None  # created by createProblem(), not at import time
 
 
 def knapsackFitness(individual) -> tuple:
@@ -91,6 +68,9 @@ P_MUTATION = 0.1
 MAX_GENERATIONS = 50
 HALL_OF_FAME_SIZE = 10
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # Fix random generator parameters
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
@@ -105,21 +85,66 @@ creator.create('FitnessMax', base.Fitness, weights=(1.0,))
 # Create individual class
 creator.create('Individual', list, fitness=creator.FitnessMax)
 
-# Create initial random individual operator
-toolbox.register('individualCreator', tools.initRepeat,
-                 creator.Individual, toolbox.zeroOrOne, len(knapsack))
 
-# Create random population operator
-toolbox.register('populationCreator', tools.initRepeat,
-                 list, toolbox.individualCreator)
+def createProblem():
+    """
+    Creates the knapsack instance and registers the operators that depend on it.
+    """
+    global knapsack
+    knapsack = Knapsack([
+        ("map", 9, 150),
+        ("compass", 13, 35),
+        ("water", 153, 200),
+        ("sandwich", 50, 160),
+        ("glucose", 15, 60),
+        ("tin", 68, 45),
+        ("banana", 27, 60),
+        ("apple", 39, 40),
+        ("cheese", 23, 30),
+        ("beer", 52, 10),
+        ("suntan cream", 11, 70),
+        ("camera", 32, 30),
+        ("t-shirt", 24, 15),
+        ("trousers", 48, 10),
+        ("umbrella", 73, 40),
+        ("waterproof trousers", 42, 70),
+        ("waterproof overclothes", 43, 75),
+        ("note-case", 22, 80),
+        ("sunglasses", 7, 20),
+        ("towel", 18, 12),
+        ("socks", 4, 50),
+        ("book", 30, 10)
+    ], 400)
+
+    # Create initial random individual operator
+    toolbox.register('individualCreator', tools.initRepeat, creator.Individual, toolbox.zeroOrOne, len(knapsack))
+
+    # Create random population operator
+    toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
+
+    toolbox.register('evaluate', knapsackFitness)
+    toolbox.register('select', tools.selTournament, tournsize=3)
+    toolbox.register('mate', tools.cxTwoPoint)
+    toolbox.register('mutate', tools.mutFlipBit, indpb=1.0 / len(knapsack))
+
+
+def plotResults(logbook):
+    """
+    Plots the statistics. The plotting library is imported here, so that headless runs never load it.
+    """
+    import matplotlib.pyplot as plt
 
-toolbox.register('evaluate', knapsackFitness)
-toolbox.register('select', tools.selTournament, tournsize=3)
-toolbox.register('mate', tools.cxTwoPoint)
-toolbox.register('mutate', tools.mutFlipBit, indpb=1.0 / len(knapsack))
+    maxFitnessValues, meanFitnessValues = logbook.select('max', 'avg')
+    plt.plot(maxFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Max / Average Fitness')
+    plt.title('Max and Average fitness over Generations')
+    plt.show()
 
 
 def main():
+    createProblem()
     population = toolbox.populationCreator(n=POPULATION_SIZE)
 
     # evaluate initial fitness and store on individual
@@ -140,13 +165,8 @@ def main():
     solution = hof.items[0]
     knapsack.printItems(solution)
 
-    maxFitnessValues, meanFitnessValues = logbook.select('max', 'avg')
-    plt.plot(maxFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Max / Average Fitness')
-    plt.title('Max and Average fitness over Generations')
-    plt.show()
+    if not HEADLESS:
+        plotResults(logbook)
 
 
 if __name__ == '__main__':
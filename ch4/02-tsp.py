@@ -1,18 +1,19 @@
 import array
+import os
 
-import numpy as np
 import random
 from deap import base
 from deap import creator
 from deap import tools
-from deap import algorithms
-import matplotlib.pyplot as plt
-import seaborn as sns
 from tsp import TSP
 from elitism import eaSimpleWithElitism
+from localsearch import improveTour
+from operators import mutShuffleIndexesWithPositions
+from reporting import FitnessStatistics
+from evaluation import ParallelMap
 
 TSP_NAME = 'bayg29'
-tsp = TSP(TSP_NAME)
+tsp = None  # loaded by createProblem(), not at import time
 
 # GenAlg parameters
 POPULATION_SIZE = 300
@@ -20,6 +21,19 @@ P_CROSSOVER = 0.9
 P_MUTATION = 0.1
 MAX_GENERATIONS = 200
 HALL_OF_FAME_SIZE = 30
+NUM_OF_WORKERS = 1
+
+# memetic local search (2-opt and Or-opt) applied to this number of best offspring of every generation, e.g. 10,
+# off by default
+LOCAL_SEARCH_BEST = int(os.environ.get('LOCAL_SEARCH_BEST', 0))
+LOCAL_SEARCH_MAX_MOVES = 100  # move budget per individual
+NUM_OF_NEIGHBORS = 8  # candidate neighbors of each city
+
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
+# write the best solution to this image file, e.g. 'best.png' or 'best.svg', which works without a display
+PLOT_FILE = os.environ.get('PLOT_FILE')
 
 # Fix random generator parameters
 RANDOM_SEED = 42
@@ -35,55 +49,72 @@ creator.create('FitnessMin', base.Fitness, weights=(-1.0,))
 # Create individual class
 creator.create('Individual', array.array, typecode='i', fitness=creator.FitnessMin)
 
-# Create operator to shuffle the cities
-toolbox.register('randomOrder', random.sample, range(len(tsp)), len(tsp))
 
-# Create initial random individual operator
-toolbox.register('individualCreator', tools.initIterate, creator.Individual, toolbox.randomOrder)
+def tspFitness(individual) -> tuple:
+    return tsp.getTotalDistance(individual),
 
-# Create random population operator
-toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
 
+def tspBatchFitness(individuals) -> list:
+    return [(distance,) for distance in tsp.getTotalDistances(individuals)]
 
-def tspFitness(individual) -> tuple:
-    return tsp.getTotalDistance(individual),
 
+def tspDeltaFitness(parent, child, parentFitness, positions) -> tuple:
+    return tsp.getDeltaDistance(parent, child, parentFitness[0], positions),
 
-toolbox.register('evaluate', tspFitness)
-toolbox.register('select', tools.selTournament, tournsize=3)
-toolbox.register('mate', tools.cxOrdered)
-toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / len(tsp))
 
+def tspImprove(individual):
+    return improveTour(individual, tsp, NUM_OF_NEIGHBORS, LOCAL_SEARCH_MAX_MOVES)
 
-def main():
-    population = toolbox.populationCreator(n=POPULATION_SIZE)
 
-    # evaluate initial fitness and store on individual
-    fitnessValues = list(map(toolbox.evaluate, population))
-    for individual, fitnessValue in zip(population, fitnessValues):
-        individual.fitness.values = fitnessValue
+def createProblem():
+    """
+    Loads the TSP instance and registers the operators that depend on it.
+    """
+    global tsp
+    tsp = TSP(TSP_NAME)
 
-    stats = tools.Statistics(lambda ind: ind.fitness.values)
-    stats.register('max', np.max)
-    stats.register('avg', np.mean)
+    # Create operator to shuffle the cities
+    toolbox.register('randomOrder', random.sample, range(len(tsp)), len(tsp))
 
-    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+    # Create initial random individual operator
+    toolbox.register('individualCreator', tools.initIterate, creator.Individual, toolbox.randomOrder)
 
-    population, logbook = eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
-                                              ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True)
+    # Create random population operator
+    toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
+
+    toolbox.register('evaluate', tspFitness)
+    toolbox.register('evaluateBatch', tspBatchFitness)
+    toolbox.register('evaluateDelta', tspDeltaFitness)
+    if LOCAL_SEARCH_BEST:
+        toolbox.register('improve', tspImprove)
+    toolbox.register('select', tools.selTournament, tournsize=3)
+    toolbox.register('mate', tools.cxOrdered)
+    toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / len(tsp))
+
+    # the same mutation, also giving the swapped positions to evaluateDelta
+    toolbox.register('mutatePositions', mutShuffleIndexesWithPositions, indpb=1.0 / len(tsp))
+
+
+def plotResults(best, logbook):
+    """
+    Plots the best tour and the statistics. The plotting libraries are imported here, so that headless runs and
+    worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    best = hof.items[0]
-    print('Best Individual = ', best)
-    print('Best Fitness = ', best.fitness.values[0])
     plt.figure(1)
     tsp.plotData(best)
 
-    # plot statistics:
-    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
+    # plot statistics, for the generations sampled by the statistics:
+    records = [record for record in logbook if 'min' in record]
+    generations = [record['gen'] for record in records]
+    minFitnessValues = [record['min'] for record in records]
+    meanFitnessValues = [record['avg'] for record in records]
     plt.figure(2)
     sns.set_style("whitegrid")
-    plt.plot(minFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
+    plt.plot(generations, minFitnessValues, color='red')
+    plt.plot(generations, meanFitnessValues, color='green')
     plt.xlabel('Generation')
     plt.ylabel('Min / Average Fitness')
     plt.title('Min and Average fitness over Generations')
@@ -92,5 +123,44 @@ def main():
     plt.show()
 
 
+def main():
+    createProblem()
+
+    population = toolbox.populationCreator(n=POPULATION_SIZE)
+
+    # evaluate initial fitness and store on individual
+    fitnessValues = toolbox.evaluateBatch(population)
+    for individual, fitnessValue in zip(population, fitnessValues):
+        individual.fitness.values = fitnessValue
+
+    stats = FitnessStatistics(('min', 'max', 'avg'))
+
+    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+
+    # the fitness is evaluated in batches by the main process, so a pool of worker processes only runs the local search
+    useWorkers = NUM_OF_WORKERS > 1 and LOCAL_SEARCH_BEST
+    parallelMap = ParallelMap(NUM_OF_WORKERS, initializer=createProblem) if useWorkers else None
+    if parallelMap:
+        toolbox.register('map', parallelMap)
+
+    try:
+        population, logbook = eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
+                                                  ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True,
+                                                  improveBest=LOCAL_SEARCH_BEST)
+    finally:
+        if parallelMap:
+            parallelMap.close()
+
+    best = hof.items[0]
+    print('Best Individual = ', best)
+    print('Best Fitness = ', best.fitness.values[0])
+
+    if PLOT_FILE:
+        tsp.plotData(best, PLOT_FILE)
+
+    if not HEADLESS:
+        plotResults(best, logbook)
+
+
 if __name__ == '__main__':
     main()
@@ -1,19 +1,21 @@
 import array
+import os
 
-import numpy as np
 import random
 from deap import base
 from deap import creator
 from deap import tools
-import matplotlib.pyplot as plt
-import seaborn as sns
 from vrp import VRP
-from elitism import eaSimpleWithElitism
+from localsearch import improveRoutes
+from operators import mutShuffleIndexesWithPositions
+from elitism import eaSimpleWithElitism, resumeWithElitism, Checkpoint
+from reporting import FitnessStatistics
+from evaluation import ParallelMap, FitnessCache
 
 TSP_NAME = 'bayg29'
 NUM_OF_VEHICLES = 6
 DEPOT_LOCATION = 12
-vrp = VRP(TSP_NAME, NUM_OF_VEHICLES, DEPOT_LOCATION)
+vrp = None  # created by createProblem(), not at import time
 
 # GenAlg parameters
 POPULATION_SIZE = 500
@@ -21,6 +23,26 @@ P_CROSSOVER = 0.9
 P_MUTATION = 0.2
 MAX_GENERATIONS = 1000
 HALL_OF_FAME_SIZE = 30
+NUM_OF_WORKERS = 1
+
+# number of evaluated genomes remembered to skip repeated evaluations, e.g. 100000, off by default
+FITNESS_CACHE_SIZE = int(os.environ.get('FITNESS_CACHE_SIZE', 0))
+
+# save the run to this file, e.g. 'vrp-checkpoint.pkl', and continue it from there when interrupted
+CHECKPOINT_FILE = os.environ.get('CHECKPOINT_FILE')
+CHECKPOINT_FREQUENCY = 50
+
+# memetic local search (relocate, swap and 2-opt* between routes) applied to this number of best offspring of every
+# generation, e.g. 10, off by default
+LOCAL_SEARCH_BEST = int(os.environ.get('LOCAL_SEARCH_BEST', 0))
+LOCAL_SEARCH_MAX_MOVES = 100  # move budget per individual
+NUM_OF_NEIGHBORS = 8  # candidate neighbors of each city
+
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
+# write the best solution to this image file, e.g. 'best.png' or 'best.svg', which works without a display
+PLOT_FILE = os.environ.get('PLOT_FILE')
 
 # Fix random generator parameters
 RANDOM_SEED = 42
@@ -30,56 +52,113 @@ random.seed(RANDOM_SEED)
 toolbox = base.Toolbox()
 toolbox.register('zeroOrOne', random.randint, 0, 1)
 
+
+
+class RouteFitness(base.Fitness):
+    """
+    A fitness that also keeps the distance of each route of its individual, from which the mutated offspring are
+    evaluated incrementally, see vrpDeltaFitness(). The distances are forgotten together with the fitness values,
+    i.e. whenever the individual is changed by the genetic operators.
+    """
+    routeDistances = None
+
+    def delValues(self):
+        super().delValues()
+        self.routeDistances = None
+
+    values = property(base.Fitness.getValues, base.Fitness.setValues, delValues)
+
+    def __deepcopy__(self, memo):
+        copy = super().__deepcopy__(memo)
+        copy.routeDistances = self.routeDistances
+        return copy
+
+
 # Register fitness strategy
-creator.create('FitnessMin', base.Fitness, weights=(-1.0, 1.0, -1.0))
+creator.create('FitnessMin', RouteFitness, weights=(-1.0, 1.0, -1.0))
 
 # Create individual class
 creator.create('Individual', array.array, typecode='i', fitness=creator.FitnessMin)
 
-# Create operator to shuffle the cities
-toolbox.register('randomOrder', random.sample, range(len(vrp)), len(vrp))
 
-# Create initial random individual operator
-toolbox.register('individualCreator', tools.initIterate, creator.Individual, toolbox.randomOrder)
+def vrpFitness(individual) -> tuple:
+    statistics = vrp.getDistanceStatistics(individual)
+    individual.fitness.routeDistances = statistics['distances']
+    return statistics['max'], statistics['min'], statistics['avg']
 
-# Create random population operator
-toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
 
+def vrpBatchFitness(individuals) -> list:
+    statistics = vrp.getDistanceStatisticsBatch(individuals)
+    for individual, distances in zip(individuals, statistics['distances'].tolist()):
+        individual.fitness.routeDistances = distances
+    return list(zip(statistics['max'].tolist(), statistics['min'].tolist(), statistics['avg'].tolist()))
 
-def vrpFitness(individual) -> tuple:
-    return vrp.getMaxDistance(individual), vrp.getMinDistance(individual), vrp.getAvgDistance(individual)
 
+def vrpDeltaFitness(parent, child, parentFitness, positions) -> tuple:
+    # the parent keeps its route distances unless its fitness came from the fitness cache or a worker process
+    if parent.fitness.routeDistances is None:
+        return vrpFitness(child)
 
-toolbox.register('evaluate', vrpFitness)
-toolbox.register('select', tools.selTournament, tournsize=2)
-toolbox.register('mate', tools.cxUniformPartialyMatched, indpb=2.0 / len(vrp))
-toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / len(vrp))
+    statistics = vrp.getDeltaDistanceStatistics(parent, child, parent.fitness.routeDistances, positions)
+    child.fitness.routeDistances = statistics['distances']
+    return statistics['max'], statistics['min'], statistics['avg']
 
 
-def main():
-    population = toolbox.populationCreator(n=POPULATION_SIZE)
+def vrpImprove(individual):
+    if improveRoutes(individual, vrp, NUM_OF_NEIGHBORS, LOCAL_SEARCH_MAX_MOVES):
+        individual.fitness.values = vrpFitness(individual)
+    return individual
 
-    stats = tools.Statistics(lambda ind: ind.fitness.values)
-    stats.register('max', np.max)
-    stats.register('avg', np.mean)
 
-    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+def createProblem():
+    """
+    Creates the VRP instance and registers the operators that depend on it.
+    """
+    global vrp
+    vrp = VRP(TSP_NAME, NUM_OF_VEHICLES, DEPOT_LOCATION)
 
-    population, logbook = eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
-                                              ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True)
+    # Create operator to shuffle the cities
+    toolbox.register('randomOrder', random.sample, range(len(vrp)), len(vrp))
+
+    # Create initial random individual operator
+    toolbox.register('individualCreator', tools.initIterate, creator.Individual, toolbox.randomOrder)
+
+    # Create random population operator
+    toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
+
+    toolbox.register('evaluate', vrpFitness)
+    toolbox.register('evaluateBatch', vrpBatchFitness)
+    toolbox.register('evaluateDelta', vrpDeltaFitness)
+    if LOCAL_SEARCH_BEST:
+        toolbox.register('improve', vrpImprove)
+    toolbox.register('select', tools.selTournament, tournsize=2)
+    toolbox.register('mate', tools.cxUniformPartialyMatched, indpb=2.0 / len(vrp))
+    toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / len(vrp))
+
+    # the same mutation, also giving the swapped positions to evaluateDelta
+    toolbox.register('mutatePositions', mutShuffleIndexesWithPositions, indpb=1.0 / len(vrp))
+
+
+def plotResults(best, logbook):
+    """
+    Plots the routes of the best solution and the statistics. The plotting libraries are imported here, so that
+    headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
-    best = hof.items[0]
-    print('Best Individual = ', best)
-    print('Best Fitness = ', best.fitness.values[0])
     plt.figure(1)
     vrp.plotData(best)
 
-    # plot statistics:
-    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
+    # plot statistics of the first objective, the max distance, for the generations sampled by the statistics:
+    records = [record for record in logbook if 'min' in record]
+    generations = [record['gen'] for record in records]
+    minFitnessValues = [record['min'][0] for record in records]
+    meanFitnessValues = [record['avg'][0] for record in records]
     plt.figure(2)
     sns.set_style("whitegrid")
-    plt.plot(minFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
+    plt.plot(generations, minFitnessValues, color='red')
+    plt.plot(generations, meanFitnessValues, color='green')
     plt.xlabel('Generation')
     plt.ylabel('Min / Average Fitness')
     plt.title('Min and Average fitness over Generations')
@@ -88,5 +167,58 @@ def main():
     plt.show()
 
 
+def main():
+    createProblem()
+
+    stats = FitnessStatistics(('min', 'max', 'avg'))
+
+    # the settings the checkpoint is saved with, so that a changed problem or algorithm never resumes a stale run
+    config = dict(tsp=TSP_NAME, vehicles=NUM_OF_VEHICLES, depot=DEPOT_LOCATION, populationSize=POPULATION_SIZE,
+                  cxpb=P_CROSSOVER, mutpb=P_MUTATION, hallOfFameSize=HALL_OF_FAME_SIZE, seed=RANDOM_SEED,
+                  fitnessCacheSize=FITNESS_CACHE_SIZE, localSearchBest=LOCAL_SEARCH_BEST,
+                  localSearchMaxMoves=LOCAL_SEARCH_MAX_MOVES, numOfNeighbors=NUM_OF_NEIGHBORS)
+    checkpoint = Checkpoint(CHECKPOINT_FILE, frequency=CHECKPOINT_FREQUENCY, config=config) if CHECKPOINT_FILE else None
+
+    # the fitness is evaluated in batches by the main process, so a pool of worker processes only runs the local search
+    useWorkers = NUM_OF_WORKERS > 1 and LOCAL_SEARCH_BEST
+    parallelMap = ParallelMap(NUM_OF_WORKERS, initializer=createProblem) if useWorkers else None
+    if parallelMap:
+        toolbox.register('map', parallelMap)
+
+    try:
+        # continue an interrupted run from its last checkpoint
+        if checkpoint and os.path.exists(CHECKPOINT_FILE):
+            population, logbook, hof = resumeWithElitism(CHECKPOINT_FILE, toolbox, cxpb=P_CROSSOVER,
+                                                         mutpb=P_MUTATION, ngen=MAX_GENERATIONS, stats=stats,
+                                                         verbose=True, checkpoint=checkpoint,
+                                                         improveBest=LOCAL_SEARCH_BEST)
+        else:
+            population = toolbox.populationCreator(n=POPULATION_SIZE)
+            hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+            cache = FitnessCache(FITNESS_CACHE_SIZE) if FITNESS_CACHE_SIZE else None
+
+            population, logbook = eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
+                                                      ngen=MAX_GENERATIONS, stats=stats, halloffame=hof,
+                                                      verbose=True, cache=cache, checkpoint=checkpoint,
+                                                      improveBest=LOCAL_SEARCH_BEST)
+    finally:
+        if parallelMap:
+            parallelMap.close()
+
+    # the run is complete, the next one starts from scratch
+    if checkpoint and os.path.exists(CHECKPOINT_FILE):
+        os.remove(CHECKPOINT_FILE)
+
+    best = hof.items[0]
+    print('Best Individual = ', best)
+    print('Best Fitness = ', best.fitness.values[0])
+
+    if PLOT_FILE:
+        vrp.plotData(best, PLOT_FILE)
+
+    if not HEADLESS:
+        plotResults(best, logbook)
+
+
 if __name__ == '__main__':
     main()
@@ -0,0 +1,148 @@
+import array
+import os
+
+import random
+from deap import base
+from deap import creator
+from deap import tools
+from vrp import VRP
+from elitism import eaSimpleWithElitism
+from reporting import FitnessStatistics
+from evaluation import ParallelMap, FitnessCache
+
+# the VRP of 03-vrp.py, with individuals holding a giant tour of the cities, without separators, which the split
+# decoder cuts into the routes with the shortest longest route
+TSP_NAME = 'bayg29'
+NUM_OF_VEHICLES = 6
+DEPOT_LOCATION = 12
+SPLIT_WINDOW = None  # maximum number of cities per route considered by the decoder, e.g. 100 for large problems
+vrp = None  # created by createProblem(), not at import time
+
+# GenAlg parameters
+POPULATION_SIZE = 500
+P_CROSSOVER = 0.9
+P_MUTATION = 0.2
+MAX_GENERATIONS = 300
+HALL_OF_FAME_SIZE = 30
+NUM_OF_WORKERS = 1
+
+# number of evaluated genomes remembered to skip repeated evaluations, e.g. 100000, off by default
+FITNESS_CACHE_SIZE = int(os.environ.get('FITNESS_CACHE_SIZE', 0))
+
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
+# write the best solution to this image file, e.g. 'best.png' or 'best.svg', which works without a display
+PLOT_FILE = os.environ.get('PLOT_FILE')
+
+# Fix random generator parameters
+RANDOM_SEED = 42
+random.seed(RANDOM_SEED)
+
+toolbox = base.Toolbox()
+
+# Register fitness strategy
+creator.create('FitnessMin', base.Fitness, weights=(-1.0, 1.0, -1.0))
+
+# Create individual class
+creator.create('Individual', array.array, typecode='i', fitness=creator.FitnessMin)
+
+
+def getRoutes(individual) -> list:
+    """
+    Decodes the giant tour of an individual into routes with separators, see VRP.split().
+    """
+    return vrp.encodeRoutes(vrp.split(individual, SPLIT_WINDOW))
+
+
+def vrpFitness(individual) -> tuple:
+    statistics = vrp.getDistanceStatistics(getRoutes(individual))
+    return statistics['max'], statistics['min'], statistics['avg']
+
+
+def createProblem():
+    """
+    Creates the VRP instance and registers the operators that depend on it.
+    """
+    global vrp
+    vrp = VRP(TSP_NAME, NUM_OF_VEHICLES, DEPOT_LOCATION)
+
+    # Create operator to shuffle the cities, the position of the depot in the giant tour is ignored
+    toolbox.register('randomOrder', random.sample, range(len(vrp.tsp)), len(vrp.tsp))
+
+    # Create initial random individual operator
+    toolbox.register('individualCreator', tools.initIterate, creator.Individual, toolbox.randomOrder)
+
+    # Create random population operator
+    toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
+
+    # the TSP operators, as the individuals are permutations of the same cities
+    toolbox.register('evaluate', vrpFitness)
+    toolbox.register('select', tools.selTournament, tournsize=2)
+    toolbox.register('mate', tools.cxOrdered)
+    toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / len(vrp.tsp))
+
+
+def plotResults(best, logbook):
+    """
+    Plots the routes of the best solution and the statistics. The plotting libraries are imported here, so that
+    headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    plt.figure(1)
+    vrp.plotData(getRoutes(best))
+
+    # plot statistics of the first objective, the max distance, for the generations sampled by the statistics:
+    records = [record for record in logbook if 'min' in record]
+    generations = [record['gen'] for record in records]
+    minFitnessValues = [record['min'][0] for record in records]
+    meanFitnessValues = [record['avg'][0] for record in records]
+    plt.figure(2)
+    sns.set_style("whitegrid")
+    plt.plot(generations, minFitnessValues, color='red')
+    plt.plot(generations, meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Min / Average Fitness')
+    plt.title('Min and Average fitness over Generations')
+
+    # show both plots:
+    plt.show()
+
+
+def main():
+    createProblem()
+
+    population = toolbox.populationCreator(n=POPULATION_SIZE)
+    stats = FitnessStatistics(('min', 'max', 'avg'))
+    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+    cache = FitnessCache(FITNESS_CACHE_SIZE) if FITNESS_CACHE_SIZE else None
+
+    # evaluate the fitness on a pool of worker processes, which create the problem once where they cannot inherit it
+    parallelMap = ParallelMap(NUM_OF_WORKERS, initializer=createProblem) if NUM_OF_WORKERS > 1 else None
+    if parallelMap:
+        toolbox.register('map', parallelMap)
+
+    try:
+        population, logbook = eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
+                                                  ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True,
+                                                  cache=cache)
+    finally:
+        if parallelMap:
+            parallelMap.close()
+
+    best = hof.items[0]
+    print('Best Individual = ', best)
+    print('Best Routes = ', vrp.split(best, SPLIT_WINDOW))
+    print('Best Fitness = ', best.fitness.values[0])
+
+    if PLOT_FILE:
+        vrp.plotData(getRoutes(best), PLOT_FILE)
+
+    if not HEADLESS:
+        plotResults(best, logbook)
+
+
+if __name__ == '__main__':
+    main()
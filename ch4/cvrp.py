@@ -0,0 +1,185 @@
+import itertools
+import math
+
+import numpy as np
+
+import tsplib
+from vrp import VRP
+
+
+class RouteState:
+    """
+    The precomputed state of a single route of a CVRP, which allows checking the effect of a change of the route in
+    constant time instead of simulating the whole route again:
+    - loads[k] is the total demand of the stops up to position k, so that the load of any segment is a difference;
+    - starts[k] is the time the service begins at position k, after waiting for its time window to open if needed;
+    - slacks[k] is the forward time slack of position k, i.e. how much the service at k can be delayed without making
+      any later stop, or the return to the depot, late.
+    The stops include the depot at both ends, so the cities of the route are at positions 1 to len(route).
+    """
+
+    def __init__(self, cvrp, route):
+        """
+        :param cvrp: the CVRP instance.
+        :param route: the city indices of the route, without the depot.
+        """
+        self.cvrp = cvrp
+        self.stops = [cvrp.depotIndex] + list(route) + [cvrp.depotIndex]
+        self.loads = list(itertools.accumulate(cvrp.demands[city] for city in self.stops))
+
+        distances = cvrp.tsp.distances
+        earliest, latest, serviceTimes = cvrp.earliest, cvrp.latest, cvrp.serviceTimes
+        self.starts = [earliest[cvrp.depotIndex]]
+        self.waits = [0.0]
+        self.lateness = 0.0
+        self.distance = 0.0
+        for previous, city in zip(self.stops, self.stops[1:]):
+            distance = float(distances[previous, city])
+            arrival = self.starts[-1] + serviceTimes[previous] + distance
+            self.starts.append(max(arrival, earliest[city]))
+            self.waits.append(self.starts[-1] - arrival)
+            self.lateness += max(0.0, self.starts[-1] - latest[city])
+            self.distance += distance
+
+        # the slack of a stop is limited by its own window, and by the slack of the next stop plus the waiting there
+        self.slacks = [0.0] * len(self.stops)
+        slack = math.inf
+        for k in range(len(self.stops) - 1, -1, -1):
+            slack = min(latest[self.stops[k]] - self.starts[k], slack)
+            self.slacks[k] = slack
+            slack += self.waits[k]
+
+    def __len__(self):
+        return len(self.stops) - 2
+
+    @property
+    def load(self):
+        return self.loads[-1]
+
+    def getSegmentLoad(self, first: int, last: int):
+        """
+        :return: the total demand of the stops at positions first to last, inclusive.
+        """
+        return self.loads[last] - (self.loads[first - 1] if first > 0 else 0)
+
+    def getExcessLoad(self, loadDelta=0):
+        """
+        :return: how much the load of the route, changed by loadDelta, exceeds the vehicle capacity, or 0.
+        """
+        return max(0, self.load + loadDelta - self.cvrp.capacity)
+
+    def getInsertion(self, city: int, position: int) -> tuple:
+        """
+        Evaluates inserting the given city before the stop at the given position, without changing the route.
+        :param city: the city to insert.
+        :param position: the position of the stop that would follow the city, from 1 to len(route) + 1.
+        :return: the change of the route distance, the excess load of the vehicle, and the largest lateness the
+        insertion would cause at the inserted city or any later stop. The last two are 0 for a feasible insertion of a
+        city into a feasible route.
+        """
+        cvrp = self.cvrp
+        distances = cvrp.tsp.distances
+        previous, following = self.stops[position - 1], self.stops[position]
+
+        toCity, fromCity = float(distances[previous, city]), float(distances[city, following])
+        distanceDelta = toCity + fromCity - float(distances[previous, following])
+
+        # the service at the city, and how much it pushes the service of the following stop forward
+        start = max(self.starts[position - 1] + cvrp.serviceTimes[previous] + toCity, cvrp.earliest[city])
+        arrival = start + cvrp.serviceTimes[city] + fromCity
+        pushForward = max(0.0, max(arrival, cvrp.earliest[following]) - self.starts[position])
+        lateness = max(0.0, start - cvrp.latest[city], pushForward - self.slacks[position])
+
+        return distanceDelta, self.getExcessLoad(cvrp.demands[city]), lateness
+
+    def getRemoval(self, position: int) -> tuple:
+        """
+        Evaluates removing the stop at the given position, without changing the route. When the distances satisfy the
+        triangle inequality, the following stops are not served later than before, so no lateness is added.
+        :param position: the position of the city to remove, from 1 to len(route).
+        :return: the change of the route distance, and the change of the load of the vehicle.
+        """
+        distances = self.cvrp.tsp.distances
+        previous, city, following = self.stops[position - 1], self.stops[position], self.stops[position + 1]
+        distanceDelta = (float(distances[previous, following]) - float(distances[previous, city]) -
+                         float(distances[city, following]))
+        return distanceDelta, -self.cvrp.demands[city]
+
+
+class CVRP(VRP):
+    """
+    A VRP where each city has a demand and the vehicles a common capacity, and optionally time windows, within which
+    the service at each city has to begin, and service times. The travel times are the distances, and the time window
+    of the depot bounds the departure and the return of the vehicles.
+    """
+
+    def __init__(self, tspName, numOfVehicles, depotIndex, demands, capacity, timeWindows=None, serviceTimes=None,
+                 locations=None, path=None):
+        """
+        Creates an instance of a CVRP.
+        :param tspName: name of the underlying TSP.
+        :param numOfVehicles: number of vehicles used.
+        :param depotIndex: the index of the TSP city used as depot location.
+        :param demands: the demand of each city, 0 for the depot.
+        :param capacity: the capacity of each vehicle.
+        :param timeWindows: optional (earliest, latest) service start times of each city, or None for no time windows.
+        :param serviceTimes: optional time spent at each city, or None for no service times.
+        :param locations: optional city coordinates of the underlying TSP, see TSP.
+        :param path: optional path of a local TSPLIB file with the cities, see TSP.
+        """
+        super().__init__(tspName, numOfVehicles, depotIndex, locations, path)
+        numOfCities = len(self.tsp)
+        self.demands = np.asarray(demands).tolist()
+        self.capacity = capacity
+        if len(self.demands) != numOfCities:
+            raise ValueError('expected one demand per city, got ', len(self.demands))
+
+        if timeWindows is None:
+            self.earliest, self.latest = [0.0] * numOfCities, [math.inf] * numOfCities
+        else:
+            self.earliest, self.latest = np.asarray(timeWindows, dtype=np.float64).T.tolist()
+        self.serviceTimes = [0.0] * numOfCities if serviceTimes is None else np.asarray(serviceTimes, float).tolist()
+
+    def getRouteState(self, route) -> RouteState:
+        """
+        :param route: the city indices of the route, without the depot.
+        :return: the precomputed state of the route, for constant time checks of changes, see RouteState.
+        """
+        return RouteState(self, route)
+
+    def getViolations(self, indices) -> tuple:
+        """
+        Calculates how much the routes described by the given indices violate the constraints.
+        :param indices: a list of ordered city indices and separator indices describing one or more paths.
+        :return: the total load above the capacity of the vehicles, and the total lateness at the stops.
+        """
+        excessLoad, lateness = 0, 0.0
+        for route in self.getRoutes(indices):
+            state = self.getRouteState(route)
+            excessLoad += state.getExcessLoad()
+            lateness += state.lateness
+        return excessLoad, lateness
+
+    def isFeasible(self, indices) -> bool:
+        """
+        :return: True if the routes described by the given indices satisfy the capacity and the time windows.
+        """
+        return self.getViolations(indices) == (0, 0.0)
+
+
+def load(path: str, numOfVehicles: int) -> CVRP:
+    """
+    Creates a CVRP from a TSPLIB file with the CAPACITY, the DEMAND_SECTION and the DEPOT_SECTION of the CVRP format.
+    Time windows are not part of the TSPLIB format, they are given to the CVRP constructor directly.
+    :param path: the path of the .vrp file.
+    :param numOfVehicles: number of vehicles used.
+    :return: the CVRP instance.
+    """
+    problem = tsplib.parse(path)
+    demands = tsplib.getDemands(problem)
+    depots = tsplib.getDepots(problem)
+    if demands is None or 'CAPACITY' not in problem:
+        raise ValueError('not a CVRP file, missing CAPACITY or DEMAND_SECTION: ', path)
+
+    return CVRP(problem.get('NAME', path), numOfVehicles, depots[0] if depots else 0, demands.astype(int),
+                int(problem['CAPACITY']), path=path)
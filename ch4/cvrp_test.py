@@ -0,0 +1,102 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+
+import cvrp
+import tsp
+from cvrp import CVRP
+
+# a small instance in the TSPLIB CVRP format, with the depot listed first
+SMALL = '''NAME : small
+TYPE : CVRP
+DIMENSION : 5
+EDGE_WEIGHT_TYPE : EUC_2D
+CAPACITY : 10
+NODE_COORD_SECTION
+1 0 0
+2 0 3
+3 4 3
+4 4 0
+5 -3 0
+DEMAND_SECTION
+1 0
+2 4
+3 5
+4 3
+5 6
+DEPOT_SECTION
+1
+-1
+EOF
+'''
+
+
+class CvrpTestSuite(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        earliest = rng.uniform(0, 300, size=20)
+        timeWindows = np.stack((earliest, earliest + rng.uniform(20, 200, size=20)), axis=1)
+        timeWindows[0] = 0, 2000
+        demands = [0] + rng.integers(1, 10, size=19).tolist()
+        self.cvrp = CVRP('random20', 3, 0, demands, 40, timeWindows, rng.uniform(0, 10, size=20),
+                         rng.uniform(0, 100, size=(20, 2)))
+        self.rng = rng
+
+    def getMaxLateness(self, state):
+        return max(max(0.0, start - self.cvrp.latest[city]) for city, start in zip(state.stops, state.starts))
+
+    def test_route_state(self):
+        state = self.cvrp.getRouteState([3, 1, 2])
+        self.assertEqual(3, len(state))
+        self.assertEqual(sum(self.cvrp.demands[city] for city in (3, 1, 2)), state.load)
+        self.assertEqual(self.cvrp.demands[1] + self.cvrp.demands[2], state.getSegmentLoad(2, 3))
+        self.assertEqual(sum(self.cvrp.demands[city] for city in (self.cvrp.depotIndex, 3, 1)),
+                         state.getSegmentLoad(0, 2))
+        self.assertAlmostEqual(self.cvrp.getRouteDistance([3, 1, 2]), state.distance)
+        for k in range(1, len(state.stops)):
+            self.assertTrue(state.starts[k] >= self.cvrp.earliest[state.stops[k]])
+
+    def test_constant_time_changes(self):
+        checked = 0
+        while checked < 200:
+            cities = self.rng.permutation(np.arange(1, 20)).tolist()
+            route, city = cities[:self.rng.integers(0, 6)], cities[-1]
+            state = self.cvrp.getRouteState(route)
+            if state.lateness > 0:
+                continue
+
+            # the constant time checks match the simulation of the changed route
+            position = int(self.rng.integers(1, len(route) + 2))
+            distanceDelta, excessLoad, lateness = state.getInsertion(city, position)
+            inserted = self.cvrp.getRouteState(route[:position - 1] + [city] + route[position - 1:])
+            self.assertAlmostEqual(inserted.distance - state.distance, distanceDelta)
+            self.assertEqual(inserted.getExcessLoad(), excessLoad)
+            self.assertAlmostEqual(self.getMaxLateness(inserted), lateness)
+
+            if route:
+                position = int(self.rng.integers(1, len(route) + 1))
+                distanceDelta, loadDelta = state.getRemoval(position)
+                removed = self.cvrp.getRouteState(route[:position - 1] + route[position:])
+                self.assertAlmostEqual(removed.distance - state.distance, distanceDelta)
+                self.assertEqual(removed.load - state.load, loadDelta)
+            checked += 1
+
+    def test_load(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'small.vrp')
+            with open(path, 'w') as f:
+                f.write(SMALL)
+            with mock.patch.object(tsp, 'DATA_DIRECTORY', directory):
+                small = cvrp.load(path, 2)
+
+        self.assertEqual(0, small.depotIndex)
+        self.assertEqual([0, 4, 5, 3, 6], small.demands)
+        self.assertEqual(10, small.capacity)
+        self.assertEqual(6, len(small))
+
+        # cities 1 and 2 then 3 and 4, with the separator 5
+        self.assertEqual(3 + 4 + 5 + 4 + 7 + 3, small.getTotalDistance([1, 2, 5, 3, 4]))
+        self.assertTrue(small.isFeasible([2, 3, 5, 1, 4]))
+        self.assertEqual((8, 0.0), small.getViolations([1, 2, 3, 4, 5]))
@@ -0,0 +1,354 @@
+import os
+import random
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+from deap import base
+from deap import creator
+from deap import tools
+
+import elitism
+import evaluation
+import islands
+import operators
+import reporting
+
+creator.create('FitnessMax', base.Fitness, weights=(1.0,))
+creator.create('Individual', list, fitness=creator.FitnessMax)
+creator.create('FitnessMin', base.Fitness, weights=(-1.0,))
+creator.create('Tour', list, fitness=creator.FitnessMin)
+
+DISTANCES = np.random.default_rng(0).random((12, 12))
+
+
+def oneMax(rows):
+    return rows.sum(axis=1, keepdims=True)
+
+
+def oneMaxFitness(individual):
+    return sum(individual),
+
+
+def createToolbox():
+    toolbox = base.Toolbox()
+    toolbox.register('zeroOrOne', random.randint, 0, 1)
+    toolbox.register('individualCreator', tools.initRepeat, creator.Individual, toolbox.zeroOrOne, 20)
+    toolbox.register('populationCreator', tools.initRepeat, list, toolbox.individualCreator)
+    toolbox.register('evaluate', oneMaxFitness)
+    toolbox.register('select', tools.selTournament, tournsize=3)
+    toolbox.register('mate', tools.cxTwoPoint)
+    toolbox.register('mutate', tools.mutFlipBit, indpb=0.05)
+    return toolbox
+
+
+def runOneMax(ngen, **kwargs):
+    random.seed(42)
+    toolbox = createToolbox()
+    population = toolbox.populationCreator(n=50)
+    hof = tools.HallOfFame(5)
+    population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb=0.9, mutpb=0.1, ngen=ngen,
+                                                      halloffame=hof, verbose=False, **kwargs)
+    return population, logbook, hof
+
+
+def tourFitness(individual):
+    return sum(DISTANCES[a, b] for a, b in zip(individual, individual[1:] + individual[:1])),
+
+
+def runTours(ngen, deltas, withPositions=False, error=0.0, depths=None):
+    random.seed(42)
+    toolbox = base.Toolbox()
+    toolbox.register('randomOrder', random.sample, range(12), 12)
+    toolbox.register('individualCreator', tools.initIterate, creator.Tour, toolbox.randomOrder)
+    toolbox.register('evaluate', tourFitness)
+    toolbox.register('select', tools.selTournament, tournsize=3)
+    toolbox.register('mate', tools.cxOrdered)
+    toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / 12)
+    if withPositions:
+        toolbox.register('mutatePositions', operators.mutShuffleIndexesWithPositions, indpb=1.0 / 12)
+    depths = [] if depths is None else depths
+    if deltas is not None:
+        # the error is added by every incremental evaluation, and accumulates like rounding errors
+        def tourDeltaFitness(parent, child, parentFitness, positions):
+            deltas.append(len(positions))
+            depths.append(getattr(parent, 'deltaDepth', 0))
+            return parentFitness[0] + tourFitness(child)[0] - tourFitness(parent)[0] + error,
+        toolbox.register('evaluateDelta', tourDeltaFitness)
+
+    population = tools.initRepeat(list, toolbox.individualCreator, 30)
+    hof = tools.HallOfFame(3)
+    return elitism.eaSimpleWithElitism(population, toolbox, cxpb=0.5, mutpb=0.3, ngen=ngen, halloffame=hof,
+                                       verbose=False)
+
+
+class ElitismTestSuite(unittest.TestCase):
+    def test_delta_evaluation_keeps_results(self):
+        population, logbook = runTours(10, None)
+        deltas = []
+        deltaPopulation, deltaLogbook = runTours(10, deltas)
+
+        self.assertEqual(population, deltaPopulation)
+        # mutations that leave the child unchanged reuse the parent fitness without any evaluation
+        self.assertTrue(all(a >= b for a, b in zip(logbook.select('nevals'), deltaLogbook.select('nevals'))))
+        self.assertTrue(deltas)
+        self.assertTrue(all(0 < count < 12 for count in deltas))
+
+    def test_delta_evaluation_with_positions(self):
+        population, logbook = runTours(10, None)
+        deltas = []
+        deltaPopulation, deltaLogbook = runTours(10, deltas, withPositions=True)
+
+        # the mutation reports the swapped positions, two per swap, instead of the positions that differ
+        self.assertEqual(population, deltaPopulation)
+        self.assertTrue(deltas)
+        self.assertTrue(all(count % 2 == 0 for count in deltas))
+
+    def test_delta_depth(self):
+        parentDepths = []
+        with mock.patch.object(elitism, 'MAX_DELTA_DEPTH', 2):
+            population, logbook = runTours(100, [], error=1.0, depths=parentDepths)
+
+        # the fitness values drift by at most MAX_DELTA_DEPTH errors before an evaluation from scratch
+        depths = [getattr(individual, 'deltaDepth', 0) for individual in population]
+        drifts = [individual.fitness.values[0] - tourFitness(individual)[0] for individual in population]
+        np.testing.assert_allclose(depths, drifts, atol=1e-9)
+        self.assertEqual(1, max(parentDepths))
+        self.assertTrue(max(depths) <= 2)
+
+    def test_cache_keeps_results(self):
+        population, logbook, hof = runOneMax(20)
+        cache = evaluation.FitnessCache(maxsize=100)
+        cachedPopulation, cachedLogbook, cachedHof = runOneMax(20, cache=cache)
+
+        self.assertEqual(population, cachedPopulation)
+        self.assertEqual(hof.items[0].fitness.values, cachedHof.items[0].fitness.values)
+        self.assertTrue(cache.hits > 0)
+        self.assertTrue(len(cache) <= 100)
+        self.assertEqual(sum(logbook.select('nevals')), cache.hits + cache.misses)
+        self.assertEqual(cache.misses, sum(cachedLogbook.select('nevals')))
+
+    def test_batch_evaluation(self):
+        population, logbook, hof = runOneMax(10)
+
+        batches = []
+
+        def oneMaxBatch(individuals):
+            batches.append(len(individuals))
+            return list(map(oneMaxFitness, individuals))
+
+        random.seed(42)
+        toolbox = createToolbox()
+        toolbox.register('evaluateBatch', oneMaxBatch)
+        batchPopulation = toolbox.populationCreator(n=50)
+        batchPopulation, batchLogbook = elitism.eaSimpleWithElitism(batchPopulation, toolbox, cxpb=0.9, mutpb=0.1,
+                                                                    ngen=10, halloffame=tools.HallOfFame(5),
+                                                                    verbose=False)
+
+        self.assertEqual(population, batchPopulation)
+        self.assertEqual(logbook.select('nevals'), batches)
+
+    def test_resume_from_checkpoint(self):
+        population, logbook, hof = runOneMax(20, cache=evaluation.FitnessCache(), terminators=[elitism.Stagnation(50)])
+
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.pkl')
+            runOneMax(10, cache=evaluation.FitnessCache(), terminators=[elitism.Stagnation(50)],
+                      checkpoint=elitism.Checkpoint(path, frequency=5))
+            random.random()
+            resumedPopulation, resumedLogbook, resumedHof = elitism.resumeWithElitism(path, createToolbox(), cxpb=0.9,
+                                                                                      mutpb=0.1, ngen=20, verbose=False)
+
+        self.assertEqual(population, resumedPopulation)
+        self.assertEqual([ind.fitness.values for ind in population], [ind.fitness.values for ind in resumedPopulation])
+        self.assertEqual(hof.items, resumedHof.items)
+        self.assertEqual(logbook, resumedLogbook)
+
+    def test_statistics_interval_after_resume(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.pkl')
+            runOneMax(10, stats=reporting.FitnessStatistics(('max',), interval=4),
+                      checkpoint=elitism.Checkpoint(path, frequency=10))
+            _, logbook, _ = elitism.resumeWithElitism(path, createToolbox(), cxpb=0.9, mutpb=0.1, ngen=20,
+                                                      stats=reporting.FitnessStatistics(('max',), interval=4),
+                                                      verbose=False)
+
+        # the statistics are sampled on the generation number, which the resumed run continues
+        self.assertEqual([0, 4, 8, 12, 16, 20], [record['gen'] for record in logbook if 'max' in record])
+
+    def test_checkpoint_config(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'checkpoint.pkl')
+            runOneMax(10, checkpoint=elitism.Checkpoint(path, frequency=5, config={'ngen': 10}))
+
+            # a run with another configuration does not resume from the checkpoint
+            with self.assertRaises(ValueError):
+                elitism.resumeWithElitism(path, createToolbox(), cxpb=0.9, mutpb=0.1, ngen=20, verbose=False,
+                                          checkpoint=elitism.Checkpoint(path, frequency=5, config={'ngen': 20}))
+            resumedPopulation, resumedLogbook, _ = elitism.resumeWithElitism(
+                path, createToolbox(), cxpb=0.9, mutpb=0.1, ngen=20, verbose=False,
+                checkpoint=elitism.Checkpoint(path, frequency=5, config={'ngen': 10}))
+        self.assertEqual(21, len(resumedLogbook))
+
+    def test_target_fitness(self):
+        population, logbook, hof = runOneMax(200, terminators=[elitism.TargetFitness(20)])
+        self.assertTrue(len(logbook) < 201)
+        self.assertEqual(20, hof.items[0].fitness.values[0])
+
+    def test_stagnation(self):
+        population, logbook, hof = runOneMax(200, terminators=[elitism.Stagnation(5)])
+        self.assertTrue(len(logbook) < 201)
+        self.assertEqual(hof.items[0].fitness.values[0], max(ind.fitness.values[0] for ind in population))
+
+    def test_max_evaluations(self):
+        population, logbook, hof = runOneMax(200, terminators=[elitism.MaxEvaluations(300)])
+        evaluations = sum(logbook.select('nevals'))
+        self.assertTrue(300 <= evaluations < 300 + 50)
+
+
+class IslandsTestSuite(unittest.TestCase):
+    def test_islands(self):
+        random.seed(42)
+        toolbox = createToolbox()
+        populations = [toolbox.populationCreator(n=30) for _ in range(3)]
+        hof = tools.HallOfFame(5)
+
+        for topology in ('ring', 'full'):
+            populations, logbooks = islands.eaIslandsWithElitism(populations, toolbox, cxpb=0.9, mutpb=0.1, ngen=12,
+                                                                 migrationInterval=5, migrants=2, halloffame=hof,
+                                                                 topology=topology, verbose=False, seed=42)
+            self.assertEqual(3, len(populations))
+            self.assertTrue(all(len(population) == 30 for population in populations))
+            self.assertEqual([list(range(13))] * 3, [logbook.select('gen') for logbook in logbooks])
+
+        bestOfIslands = max(ind.fitness.values[0] for population in populations for ind in population)
+        self.assertEqual(bestOfIslands, hof.items[0].fitness.values[0])
+        self.assertEqual(5, len(hof))
+
+    def test_islands_statistics_interval(self):
+        random.seed(42)
+        toolbox = createToolbox()
+        populations = [toolbox.populationCreator(n=30) for _ in range(2)]
+        populations, logbooks = islands.eaIslandsWithElitism(populations, toolbox, cxpb=0.9, mutpb=0.1, ngen=12,
+                                                             migrationInterval=5, migrants=2,
+                                                             halloffame=tools.HallOfFame(5),
+                                                             stats=reporting.FitnessStatistics(('max',), interval=3),
+                                                             verbose=False, seed=42)
+
+        # the statistics are sampled every 3 generations of the island, across the migrations
+        for logbook in logbooks:
+            self.assertEqual([0, 3, 6, 9, 12], [record['gen'] for record in logbook if 'max' in record])
+
+    def test_failing_island(self):
+        def failingOneMax(individual):
+            if sum(individual) > 15:
+                raise ArithmeticError('evaluation failed for ', individual)
+            return sum(individual),
+
+        random.seed(42)
+        toolbox = createToolbox()
+        toolbox.register('evaluate', failingOneMax)
+        populations = [toolbox.populationCreator(n=30) for _ in range(3)]
+
+        # the failure is raised in the parent instead of leaving the other islands waiting for migrants
+        with self.assertRaises(ArithmeticError):
+            islands.eaIslandsWithElitism(populations, toolbox, cxpb=0.9, mutpb=0.1, ngen=50, migrationInterval=5,
+                                         migrants=2, halloffame=tools.HallOfFame(5), verbose=False, seed=42)
+
+
+class MatrixEngineTestSuite(unittest.TestCase):
+    def setUp(self):
+        self.toolbox = base.Toolbox()
+        self.toolbox.register('evaluate', oneMax)
+        self.toolbox.register('select', operators.selTournament, tournsize=3)
+        self.toolbox.register('mate', operators.cxTwoPoint)
+        self.toolbox.register('mutate', operators.mutFlipBit, indpb=0.02)
+
+    def test_one_max(self):
+        rng = np.random.default_rng(42)
+        population = rng.integers(0, 2, size=(100, 50))
+        hof = elitism.MatrixHallOfFame(5, weights=(1.0,))
+        stats = tools.Statistics()
+        stats.register('max', np.max)
+
+        population, logbook = elitism.eaMatrixWithElitism(population, self.toolbox, cxpb=0.9, mutpb=0.1, ngen=30,
+                                                          stats=stats, halloffame=hof, verbose=False, rng=rng)
+
+        self.assertEqual((100, 50), population.shape)
+        self.assertEqual(31, len(logbook))
+        maxFitnessValues = logbook.select('max')
+        self.assertTrue(all(a <= b for a, b in zip(maxFitnessValues, maxFitnessValues[1:])))
+        self.assertEqual(hof.fitness[0, 0], hof.items[0].sum())
+        self.assertEqual(5, len(np.unique(hof.items, axis=0)))
+
+    def test_target_fitness(self):
+        rng = np.random.default_rng(42)
+        hof = elitism.MatrixHallOfFame(5, weights=(1.0,))
+        population, logbook = elitism.eaMatrixWithElitism(rng.integers(0, 2, size=(100, 20)), self.toolbox, cxpb=0.9,
+                                                          mutpb=0.1, ngen=200, halloffame=hof, verbose=False, rng=rng,
+                                                          terminators=[elitism.TargetFitness(20)])
+        self.assertTrue(len(logbook) < 201)
+        self.assertEqual(20, hof.fitness[0, 0])
+
+    def test_hall_of_fame_order(self):
+        hof = elitism.MatrixHallOfFame(2, weights=(-1.0,))
+        hof.update(np.array([[0, 1], [1, 1], [0, 0]]), np.array([[1.0], [2.0], [0.0]]))
+        np.testing.assert_array_equal([[0, 0], [0, 1]], hof.items)
+        np.testing.assert_array_equal([[0.0], [1.0]], hof.fitness)
+
+    def test_permutation_operators(self):
+        rng = np.random.default_rng(42)
+        rows1 = np.array([rng.permutation(30) for _ in range(50)])
+        rows2 = np.array([rng.permutation(30) for _ in range(50)])
+
+        def assertPermutations(rows):
+            np.testing.assert_array_equal(np.broadcast_to(np.arange(30), rows.shape), np.sort(rows, axis=1))
+
+        for mate in (operators.cxOrdered, operators.cxPartialyMatched):
+            children = mate(rows1, rows2, np.random.default_rng(1))
+            for child in children:
+                assertPermutations(child)
+            np.testing.assert_array_equal(children, mate(rows1, rows2, np.random.default_rng(1)))
+
+        for mutate in (operators.mutInversion, operators.mutScramble,
+                       lambda rows, rng: operators.mutSwap(rows, rng, 0.1)):
+            mutants = mutate(rows1, np.random.default_rng(1))
+            assertPermutations(mutants)
+            np.testing.assert_array_equal(mutants, mutate(rows1, np.random.default_rng(1)))
+            self.assertTrue(np.any(mutants != rows1))
+
+    def test_partially_matched_crossover(self):
+        # the segment 3 4 5 6 maps 3-7, 4-1 and 6-4, so the 6 and the 3 of the second parent become 1 and 7
+        rows1 = np.array([[0, 1, 2, 3, 4, 5, 6, 7, 8]])
+        rows2 = np.array([[8, 2, 6, 7, 1, 5, 4, 0, 3]])
+        start, end = np.array([[3]]), np.array([[6]])
+        np.testing.assert_array_equal([[8, 2, 1, 3, 4, 5, 6, 0, 7]],
+                                      operators._matchPartially(rows1, rows2, start, end))
+        np.testing.assert_array_equal([[2, 7, 1, 3, 4, 5, 6, 0, 8]],
+                                      operators._fillOrdered(rows1, rows2, start, end))
+
+    def test_tours(self):
+        def tourLengths(rows):
+            return DISTANCES[rows, np.roll(rows, -1, axis=1)].sum(axis=1, keepdims=True)
+
+        self.toolbox.register('evaluate', tourLengths)
+        self.toolbox.register('mate', operators.cxOrdered)
+        self.toolbox.register('mutate', operators.mutInversion)
+        rng = np.random.default_rng(42)
+        population = np.array([rng.permutation(12) for _ in range(50)])
+        hof = elitism.MatrixHallOfFame(1, weights=(-1.0,))
+        population, _ = elitism.eaMatrixWithElitism(population, self.toolbox, cxpb=0.9, mutpb=0.2, ngen=30,
+                                                     halloffame=hof, verbose=False, rng=rng)
+
+        np.testing.assert_array_equal(np.broadcast_to(np.arange(12), population.shape), np.sort(population, axis=1))
+        self.assertTrue(hof.fitness[0, 0] < tourLengths(np.arange(12)[np.newaxis])[0, 0])
+
+    def test_one_dimensional_fitness(self):
+        # a batched evaluator may return a flat array, e.g. TSP.getTotalDistances()
+        self.toolbox.register('evaluate', lambda rows: rows.sum(axis=1))
+        rng = np.random.default_rng(42)
+        hof = elitism.MatrixHallOfFame(1, weights=(1.0,))
+        population, logbook = elitism.eaMatrixWithElitism(rng.integers(0, 2, size=(50, 20)), self.toolbox, cxpb=0.9,
+                                                          mutpb=0.1, ngen=5, halloffame=hof, verbose=False, rng=rng)
+        self.assertEqual(6, len(logbook))
+        self.assertEqual(hof.items[0].sum(), hof.fitness[0, 0])
@@ -0,0 +1,403 @@
+import collections
+import time
+
+# gains below this value are rounding noise rather than improvements
+EPSILON = 1e-9
+
+# the longest segments moved by Or-opt
+MAX_SEGMENT_LENGTH = 3
+
+
+class TourImprover:
+    """
+    Local search for a single tour with 2-opt and Or-opt moves. Only the moves that connect a city to one of its
+    nearest neighbors are tried, and don't-look bits keep the search on the cities whose edges changed recently: a city
+    is only looked at again once a move touched one of its edges.
+    """
+
+    def __init__(self, tour: list, distances, neighbors):
+        """
+        :param tour: the city indices of the tour, improved in place.
+        :param distances: the distances of the problem, supporting [i, j] lookups, see TSP.distances.
+        :param neighbors: the candidate lists, an array with the nearest neighbors of each city, see TSP.getNeighbors().
+        """
+        self.tour = tour
+        self.distances = distances
+        self.neighbors = neighbors.tolist()
+        self.size = len(tour)
+        self.position = [0] * self.size
+        for i, city in enumerate(tour):
+            self.position[city] = i
+
+        self.queue = collections.deque(tour)
+        self.active = [True] * self.size
+
+    def distance(self, city1, city2):
+        return self.distances[city1, city2]
+
+    def next(self, city):
+        return self.tour[(self.position[city] + 1) % self.size]
+
+    def previous(self, city):
+        return self.tour[self.position[city] - 1]
+
+    def activate(self, *cities):
+        """
+        Clears the don't-look bits of the given cities.
+        """
+        for city in cities:
+            if not self.active[city]:
+                self.active[city] = True
+                self.queue.append(city)
+
+    def reverse(self, start: int, end: int):
+        """
+        Reverses the path between the given positions, going forward and wrapping around the end of the tour. When the
+        path is longer than half the tour, the rest of the tour is reversed instead, which gives the same cycle.
+        """
+        length = (end - start) % self.size + 1
+        if 2 * length > self.size:
+            start, end = end + 1, start - 1
+            length = self.size - length
+
+        for k in range(length // 2):
+            i, j = (start + k) % self.size, (end - k) % self.size
+            city1, city2 = self.tour[i], self.tour[j]
+            self.tour[i], self.tour[j] = city2, city1
+            self.position[city2], self.position[city1] = i, j
+
+    def tryTwoOpt(self, a) -> float:
+        """
+        Looks for an improving 2-opt move that replaces an edge of city a with an edge to one of its neighbors.
+        :return: the gain of the move applied, or 0.
+        """
+        for forward in (True, False):
+            b = self.next(a) if forward else self.previous(a)
+            removed = self.distance(a, b)
+
+            for c in self.neighbors[a]:
+                added = self.distance(a, c)
+                if added >= removed:
+                    break
+
+                d = self.next(c) if forward else self.previous(c)
+                if c == b or d == a:
+                    continue
+
+                gain = removed + self.distance(c, d) - added - self.distance(b, d)
+                if gain > EPSILON:
+                    # a-b ... c-d becomes a-c ... b-d, reversing the path from b to c, or from a to d backwards
+                    if forward:
+                        self.reverse(self.position[b], self.position[c])
+                    else:
+                        self.reverse(self.position[a], self.position[d])
+                    self.activate(a, b, c, d)
+                    return gain
+
+        return 0.0
+
+    def tryOrOpt(self, a) -> float:
+        """
+        Looks for an improving Or-opt move that moves the segment of up to MAX_SEGMENT_LENGTH cities starting at
+        city a elsewhere in the tour, next to a neighbor of one of its ends, possibly reversed.
+        :return: the gain of the move applied, or 0.
+        """
+        start = self.position[a]
+        for length in range(1, min(MAX_SEGMENT_LENGTH, self.size - 3) + 1):
+            segment = [self.tour[(start + k) % self.size] for k in range(length)]
+            first, last = segment[0], segment[-1]
+            before, after = self.previous(first), self.next(last)
+            removed = self.distance(before, first) + self.distance(last, after) - self.distance(before, after)
+
+            for end, other in ((first, last), (last, first)):
+                for c in self.neighbors[end]:
+                    if self.distance(end, c) >= removed:
+                        break
+                    if c in segment:
+                        continue
+
+                    # the neighbors of c once the segment is removed
+                    cNext = after if c == before else self.next(c)
+                    cPrevious = before if c == after else self.previous(c)
+
+                    # c-end...other-cNext, or cPrevious-other...end-c
+                    insertions = ((c, cNext, self.distance(c, end) + self.distance(other, cNext)),
+                                  (cPrevious, c, self.distance(cPrevious, other) + self.distance(end, c)))
+                    for left, right, inserted in insertions:
+                        gain = removed - inserted + self.distance(left, right)
+                        if gain > EPSILON:
+                            if left == c:
+                                self.moveSegment(segment if end == first else segment[::-1], c)
+                            else:
+                                self.moveSegment(segment[::-1] if end == first else segment, left)
+                            self.activate(before, after, first, last, left, right)
+                            return gain
+
+        return 0.0
+
+    def moveSegment(self, segment: list, left):
+        """
+        Removes the given cities from the tour and inserts them, in the given order, right after city left.
+        """
+        removed = set(segment)
+        rest = [city for city in self.tour if city not in removed]
+        i = rest.index(left) + 1
+        self.tour[:] = rest[:i] + segment + rest[i:]
+        for i, city in enumerate(self.tour):
+            self.position[city] = i
+
+    def run(self, maxMoves: int = None, timeLimit: float = None, orOpt: bool = True) -> float:
+        """
+        Applies improving moves until no city is left to look at, or the budget is spent.
+        :param maxMoves: the maximum number of moves to apply.
+        :param timeLimit: the maximum number of seconds to spend.
+        :param orOpt: whether to try Or-opt moves when no 2-opt move improves the edges of a city.
+        :return: the total gain, i.e. how much shorter the tour became.
+        """
+        deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+        totalGain = 0.0
+        moves = 0
+
+        while self.queue:
+            if maxMoves is not None and moves >= maxMoves:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+            a = self.queue.popleft()
+            self.active[a] = False
+
+            gain = self.tryTwoOpt(a) or (orOpt and self.tryOrOpt(a))
+            if gain:
+                totalGain += gain
+                moves += 1
+                self.activate(a)
+
+        return totalGain
+
+
+def improveTour(individual, tsp, numOfNeighbors: int = 8, maxMoves: int = None, timeLimit: float = None,
+                orOpt: bool = True):
+    """
+    Memetic local search operator for tour individuals, to be registered as toolbox.improve (see eaSimpleWithElitism).
+    Applies 2-opt and Or-opt moves restricted to the nearest neighbors of each city, see TourImprover.
+    :param individual: an individual holding a tour, with the tour length as its single fitness value.
+    :param tsp: the TSP instance.
+    :param numOfNeighbors: the number of candidate neighbors of each city.
+    :param maxMoves: the maximum number of moves applied to the individual.
+    :param timeLimit: the maximum number of seconds spent on the individual.
+    :param orOpt: whether to try Or-opt moves as well.
+    :return: the individual, improved in place, with its fitness updated.
+    """
+    tour = list(individual)
+    if not individual.fitness.valid:
+        individual.fitness.values = tsp.getTotalDistance(tour),
+
+    gain = TourImprover(tour, tsp.distances, tsp.getNeighbors(numOfNeighbors)).run(maxMoves, timeLimit, orOpt)
+    if gain > 0:
+        for i, city in enumerate(tour):
+            individual[i] = city
+        individual.fitness.values = float(individual.fitness.values[0] - gain),
+
+    return individual
+
+
+class RouteImprover:
+    """
+    Local search between the routes of a VRP solution, with relocate, swap and 2-opt* moves. Like TourImprover, only
+    the moves that connect a city to one of its nearest neighbors in another route are tried, and don't-look bits
+    keep the search on the cities whose routes changed recently. A move is applied when it shortens the longer of the
+    two routes it changes, or keeps it and shortens both routes together, so the longest route never grows.
+    """
+
+    def __init__(self, routes: list, distances, neighbors, depot: int):
+        """
+        :param routes: the routes, each a list of city indices without the depot, improved in place.
+        :param distances: the distances of the problem, supporting [i, j] lookups, see TSP.distances.
+        :param neighbors: the candidate lists, an array with the nearest neighbors of each city, see TSP.getNeighbors().
+        :param depot: the index of the depot, where every route starts and ends.
+        """
+        self.routes = routes
+        self.distances = distances
+        self.neighbors = neighbors.tolist()
+        self.depot = depot
+        self.routeOf = [-1] * len(self.neighbors)
+        self.position = [0] * len(self.neighbors)
+        self.prefixes = [None] * len(routes)
+        self.lengths = [0.0] * len(routes)
+        for r in range(len(routes)):
+            self.update(r)
+
+        self.queue = collections.deque(city for route in routes for city in route)
+        self.active = [False] * len(self.neighbors)
+        for city in self.queue:
+            self.active[city] = True
+
+    def distance(self, city1, city2):
+        return self.distances[city1, city2]
+
+    def update(self, r: int):
+        """
+        Indexes the cities of route r again, and its prefix distances: prefixes[r][k] is the distance from the depot
+        to the k-th city of the route, and the last prefix is the length of the route.
+        """
+        route = self.routes[r]
+        prefix = [0.0]
+        previous = self.depot
+        for i, city in enumerate(route):
+            self.routeOf[city] = r
+            self.position[city] = i
+            prefix.append(prefix[-1] + self.distance(previous, city))
+            previous = city
+        self.lengths[r] = prefix[-1] + self.distance(previous, self.depot) if route else 0.0
+        self.prefixes[r] = prefix
+
+    def next(self, city):
+        route = self.routes[self.routeOf[city]]
+        i = self.position[city] + 1
+        return route[i] if i < len(route) else self.depot
+
+    def previous(self, city):
+        i = self.position[city]
+        return self.routes[self.routeOf[city]][i - 1] if i > 0 else self.depot
+
+    def activate(self, *cities):
+        """
+        Clears the don't-look bits of the given cities, ignoring the depot.
+        """
+        for city in cities:
+            if city != self.depot and not self.active[city]:
+                self.active[city] = True
+                self.queue.append(city)
+
+    @staticmethod
+    def isBetter(old1, old2, new1, new2) -> bool:
+        """
+        :return: True if the new lengths of two routes improve on the old ones, see RouteImprover.
+        """
+        oldMax, newMax = max(old1, old2), max(new1, new2)
+        return newMax < oldMax - EPSILON or (newMax < oldMax + EPSILON and new1 + new2 < old1 + old2 - EPSILON)
+
+    def apply(self, r1: int, route1: list, r2: int, route2: list):
+        """
+        Replaces routes r1 and r2 with the given ones, and looks at the cities of both routes again.
+        """
+        self.routes[r1], self.routes[r2] = route1, route2
+        self.update(r1)
+        self.update(r2)
+        self.activate(*route1, *route2)
+
+    def getSegmentLength(self, r: int, start: int):
+        """
+        :return: the distance from the city at position start of route r to the end of the route at the depot.
+        """
+        return self.lengths[r] - self.prefixes[r][start + 1]
+
+    def tryMoves(self, a) -> bool:
+        """
+        Looks for an improving move of city a to the route of one of its neighbors b, or to an empty route: a is
+        relocated next to b, swapped with a city next to b, or the routes are crossed so that a and b become adjacent.
+        :return: True if a move was applied.
+        """
+        ra, i = self.routeOf[a], self.position[a]
+        routeA, lengthA = self.routes[ra], self.lengths[ra]
+        aPrevious, aNext = self.previous(a), self.next(a)
+        removal = self.distance(aPrevious, aNext) - self.distance(aPrevious, a) - self.distance(a, aNext)
+        rest = routeA[:i] + routeA[i + 1:]
+
+        for rb, route in enumerate(self.routes):
+            if not route and self.isBetter(lengthA, 0.0, lengthA + removal, 2 * self.distance(self.depot, a)):
+                self.apply(ra, rest, rb, [a])
+                return True
+
+        for b in self.neighbors[a]:
+            rb = self.routeOf[b]
+            if b == self.depot or rb == ra:
+                continue
+            j = self.position[b]
+            routeB, lengthB = self.routes[rb], self.lengths[rb]
+            bPrevious, bNext = self.previous(b), self.next(b)
+
+            # relocate a after b, or before b
+            for left, right, k in ((b, bNext, j + 1), (bPrevious, b, j)):
+                insertion = self.distance(left, a) + self.distance(a, right) - self.distance(left, right)
+                if self.isBetter(lengthA, lengthB, lengthA + removal, lengthB + insertion):
+                    self.apply(ra, rest, rb, routeB[:k] + [a] + routeB[k:])
+                    return True
+
+            # swap a with the city after b, or before b, so that a becomes adjacent to b
+            for c in (bNext, bPrevious):
+                if c == self.depot:
+                    continue
+                k = self.position[c]
+                cPrevious, cNext = self.previous(c), self.next(c)
+                newA = lengthA + (self.distance(aPrevious, c) + self.distance(c, aNext) -
+                                  self.distance(aPrevious, a) - self.distance(a, aNext))
+                newB = lengthB + (self.distance(cPrevious, a) + self.distance(a, cNext) -
+                                  self.distance(cPrevious, c) - self.distance(c, cNext))
+                if self.isBetter(lengthA, lengthB, newA, newB):
+                    self.apply(ra, routeA[:i] + [c] + routeA[i + 1:], rb, routeB[:k] + [a] + routeB[k + 1:])
+                    return True
+
+            # 2-opt*: exchange the ends of the routes, after a and before b, or after b and before a
+            newA = self.prefixes[ra][i + 1] + self.distance(a, b) + self.getSegmentLength(rb, j)
+            newB = (self.prefixes[rb][j] + self.distance(bPrevious, aNext) +
+                    (self.getSegmentLength(ra, i + 1) if aNext != self.depot else 0.0))
+            if self.isBetter(lengthA, lengthB, newA, newB):
+                self.apply(ra, routeA[:i + 1] + routeB[j:], rb, routeB[:j] + routeA[i + 1:])
+                return True
+
+            newB = self.prefixes[rb][j + 1] + self.distance(b, a) + self.getSegmentLength(ra, i)
+            newA = (self.prefixes[ra][i] + self.distance(aPrevious, bNext) +
+                    (self.getSegmentLength(rb, j + 1) if bNext != self.depot else 0.0))
+            if self.isBetter(lengthA, lengthB, newA, newB):
+                self.apply(ra, routeA[:i] + routeB[j + 1:], rb, routeB[:j + 1] + routeA[i:])
+                return True
+
+        return False
+
+    def run(self, maxMoves: int = None, timeLimit: float = None) -> int:
+        """
+        Applies improving moves until no city is left to look at, or the budget is spent.
+        :param maxMoves: the maximum number of moves to apply.
+        :param timeLimit: the maximum number of seconds to spend.
+        :return: the number of moves applied.
+        """
+        deadline = time.perf_counter() + timeLimit if timeLimit is not None else None
+        moves = 0
+
+        while self.queue:
+            if maxMoves is not None and moves >= maxMoves:
+                break
+            if deadline is not None and time.perf_counter() > deadline:
+                break
+
+            a = self.queue.popleft()
+            self.active[a] = False
+            if self.tryMoves(a):
+                moves += 1
+
+        return moves
+
+
+def improveRoutes(individual, vrp, numOfNeighbors: int = 8, maxMoves: int = None, timeLimit: float = None):
+    """
+    Memetic local search operator for VRP individuals in the separator encoding, see RouteImprover. As the fitness
+    depends on how the script combines the route distances, it is not updated here: wrap this operator in a function
+    that evaluates the improved individual before registering it as toolbox.improve (see eaSimpleWithElitism).
+    :param individual: an individual holding city and separator indices, see VRP.getRoutes().
+    :param vrp: the VRP instance.
+    :param numOfNeighbors: the number of candidate neighbors of each city.
+    :param maxMoves: the maximum number of moves applied to the individual.
+    :param timeLimit: the maximum number of seconds spent on the individual.
+    :return: the number of moves applied; the individual is changed in place, and its fitness deleted, if any.
+    """
+    routes = vrp.getRoutes(individual)
+    improver = RouteImprover(routes, vrp.tsp.distances, vrp.tsp.getNeighbors(numOfNeighbors), vrp.depotIndex)
+    moves = improver.run(maxMoves, timeLimit)
+    if moves:
+        for i, index in enumerate(vrp.encodeRoutes(routes)):
+            individual[i] = index
+        del individual.fitness.values
+
+    return moves
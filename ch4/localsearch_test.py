@@ -0,0 +1,108 @@
+import random
+import unittest
+import numpy as np
+from deap import base
+from deap import creator
+from deap import tools
+
+import elitism
+import localsearch
+from tsp import TSP
+from vrp import VRP
+
+creator.create('TourFitness', base.Fitness, weights=(-1.0,))
+creator.create('ImprovedTour', list, fitness=creator.TourFitness)
+creator.create('ImprovedRoutes', list, fitness=creator.TourFitness)
+
+
+class LocalSearchTestSuite(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+        self.tsp = TSP('random100', self.rng.uniform(0, 1000, size=(100, 2)))
+
+    def test_improver(self):
+        for orOpt in (False, True):
+            tour = self.rng.permutation(100).tolist()
+            distance = self.tsp.getTotalDistance(tour)
+
+            improver = localsearch.TourImprover(tour, self.tsp.distances, self.tsp.getNeighbors(8))
+            gain = improver.run(orOpt=orOpt)
+
+            self.assertEqual(list(range(100)), sorted(tour))
+            self.assertEqual(list(range(100)), [improver.position[city] for city in tour])
+            self.assertAlmostEqual(distance - gain, self.tsp.getTotalDistance(tour))
+            self.assertTrue(gain > distance / 2)
+
+    def test_move_budget(self):
+        tour = self.rng.permutation(100).tolist()
+        distance = self.tsp.getTotalDistance(tour)
+        gain = localsearch.TourImprover(tour, self.tsp.distances, self.tsp.getNeighbors(8)).run(maxMoves=5)
+        self.assertAlmostEqual(distance - gain, self.tsp.getTotalDistance(tour))
+
+        # a fresh search from the same tour goes on improving it
+        self.assertTrue(localsearch.TourImprover(tour, self.tsp.distances, self.tsp.getNeighbors(8)).run() > 0)
+
+    def test_improve_tour(self):
+        individual = creator.ImprovedTour(self.rng.permutation(100).tolist())
+        individual.fitness.values = self.tsp.getTotalDistance(individual),
+
+        self.assertIs(individual, localsearch.improveTour(individual, self.tsp))
+        self.assertAlmostEqual(self.tsp.getTotalDistance(individual), individual.fitness.values[0])
+
+    def runEngine(self, improve):
+        random.seed(42)
+        toolbox = base.Toolbox()
+        toolbox.register('randomOrder', random.sample, range(100), 100)
+        toolbox.register('individualCreator', tools.initIterate, creator.ImprovedTour, toolbox.randomOrder)
+        toolbox.register('evaluate', lambda individual: (self.tsp.getTotalDistance(individual),))
+        toolbox.register('select', tools.selTournament, tournsize=3)
+        toolbox.register('mate', tools.cxOrdered)
+        toolbox.register('mutate', tools.mutShuffleIndexes, indpb=0.01)
+        if improve:
+            toolbox.register('improve', improve)
+
+        population = tools.initRepeat(list, toolbox.individualCreator, 20)
+        hof = tools.HallOfFame(2)
+        elitism.eaSimpleWithElitism(population, toolbox, cxpb=0.9, mutpb=0.2, ngen=5, halloffame=hof, verbose=False,
+                                    improveBest=3)
+        return hof.items[0]
+
+    def test_engine(self):
+        improved = []
+
+        def improve(individual):
+            improved.append(individual)
+            return localsearch.improveTour(individual, self.tsp, maxMoves=100)
+
+        best = self.runEngine(improve)
+        self.assertEqual(5 * 3, len(improved))
+        self.assertAlmostEqual(self.tsp.getTotalDistance(best), best.fitness.values[0])
+        self.assertTrue(best.fitness.values[0] < self.runEngine(None).fitness.values[0] / 2)
+
+
+class RouteLocalSearchTestSuite(unittest.TestCase):
+    def setUp(self):
+        self.rng = np.random.default_rng(42)
+        self.vrp = VRP('random60', 5, 7, self.rng.uniform(0, 1000, size=(60, 2)))
+
+    def test_improver(self):
+        routes = self.vrp.getRoutes(self.rng.permutation(len(self.vrp)).tolist())
+        longest = max(self.vrp.getRouteDistance(route) for route in routes)
+
+        improver = localsearch.RouteImprover(routes, self.vrp.tsp.distances, self.vrp.tsp.getNeighbors(8), 7)
+        self.assertTrue(improver.run() > 0)
+
+        self.assertEqual([city for city in range(60) if city != 7], sorted(sum(routes, [])))
+        for route, length in zip(routes, improver.lengths):
+            self.assertAlmostEqual(self.vrp.getRouteDistance(route), length)
+        self.assertTrue(max(improver.lengths) < longest / 2)
+
+    def test_improve_routes(self):
+        individual = creator.ImprovedRoutes(self.rng.permutation(len(self.vrp)).tolist())
+        individual.fitness.values = self.vrp.getMaxDistance(individual),
+        longest = individual.fitness.values[0]
+
+        self.assertEqual(5, localsearch.improveRoutes(individual, self.vrp, maxMoves=5))
+        self.assertFalse(individual.fitness.valid)
+        self.assertEqual(list(range(len(self.vrp))), sorted(individual))
+        self.assertTrue(self.vrp.getMaxDistance(individual) <= longest)
@@ -0,0 +1,80 @@
+import numpy as np
+
+# above this number of cities, only every k-th city and every k-th stop of a route are drawn
+MAX_POINTS = 5000
+
+
+def decimate(points, maxPoints: int = MAX_POINTS):
+    """
+    :return: every k-th of the given points, with k chosen so that at most maxPoints are left.
+    """
+    step = -(-len(points) // maxPoints) if maxPoints else 1
+    return points[::max(step, 1)]
+
+
+def getSegments(locations, route, closed: bool = True, maxPoints: int = MAX_POINTS):
+    """
+    :param locations: the array of city coordinates.
+    :param route: the city indices visited by the route, in order.
+    :param closed: whether the route returns to its first city.
+    :param maxPoints: the maximum number of stops drawn, see decimate().
+    :return: a (segments, 2, 2) array with the start and end coordinates of each leg of the route.
+    """
+    stops = np.asarray(route, dtype=np.intp)
+    kept = decimate(stops, maxPoints)
+    if len(kept) and kept[-1] != stops[-1]:
+        kept = np.append(kept, stops[-1])
+
+    ends = np.roll(kept, -1) if closed else kept[1:]
+    return np.asarray(locations)[np.stack((kept[:len(ends)], ends), axis=1)]
+
+
+def drawRoutes(ax, locations, routes, depot=None, closed: bool = True, colors=None, maxPoints: int = MAX_POINTS):
+    """
+    Draws the cities as a single scatter plot and all the legs of the given routes as a single line collection, which
+    is much faster than one line per route for large instances.
+    :param ax: the matplotlib Axes to draw on.
+    :param locations: the array of city coordinates.
+    :param routes: a list of routes, each a list of city indices.
+    :param depot: the index of a city to mark with an 'X', or None.
+    :param closed: whether each route returns to its first city.
+    :param colors: one color per route, or None for blue routes.
+    :param maxPoints: the maximum number of cities and of stops per route drawn, see decimate().
+    :return: the Axes.
+    """
+    from matplotlib.collections import LineCollection
+
+    locations = np.asarray(locations)
+    cities = decimate(locations, maxPoints)
+    ax.scatter(cities[:, 0], cities[:, 1], marker='.', color='red')
+    if depot is not None:
+        ax.plot(locations[depot, 0], locations[depot, 1], marker='x', markersize=10, color='green')
+
+    segments = [getSegments(locations, route, closed, maxPoints) for route in routes if len(route)]
+    if segments:
+        lines = LineCollection(np.concatenate(segments), linestyles='-', colors='blue')
+        if colors is not None:
+            # each leg gets the color of its route
+            lines.set_color(np.repeat(np.asarray(colors)[:len(segments)], [len(s) for s in segments], axis=0))
+        ax.add_collection(lines)
+        ax.autoscale_view()
+    return ax
+
+
+def saveRoutes(path: str, locations, routes, depot=None, closed: bool = True, colors=None,
+               maxPoints: int = MAX_POINTS, size=(8, 8), dpi: int = 100):
+    """
+    Renders the routes to an image file, without pyplot nor an interactive backend, so that it works on servers
+    without a display. The format is taken from the file extension, e.g. '.png' or '.svg', and the other parameters
+    are those of drawRoutes().
+    :param path: the path of the image file.
+    :param size: the size of the image in inches.
+    :param dpi: the resolution of raster images.
+    """
+    from matplotlib.backends.backend_agg import FigureCanvasAgg
+    from matplotlib.figure import Figure
+
+    figure = Figure(figsize=size, dpi=dpi)
+    FigureCanvasAgg(figure)
+    drawRoutes(figure.add_subplot(), locations, routes, depot, closed, colors, maxPoints)
+    figure.savefig(path)
@@ -0,0 +1,47 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+
+import plotting
+from tsp import TSP
+from vrp import VRP
+
+
+class PlottingTestSuite(unittest.TestCase):
+    def setUp(self):
+        self.locations = np.random.default_rng(42).uniform(0, 100, size=(20, 2))
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def test_segments(self):
+        route = [3, 1, 4, 0, 2]
+        segments = plotting.getSegments(self.locations, route)
+        np.testing.assert_array_equal(self.locations[route], segments[:, 0])
+        np.testing.assert_array_equal(self.locations[route[1:] + route[:1]], segments[:, 1])
+        self.assertEqual(4, len(plotting.getSegments(self.locations, route, closed=False)))
+
+        # the decimated route still starts and ends at the same cities
+        route = list(range(20))
+        segments = plotting.getSegments(self.locations, route, maxPoints=6)
+        np.testing.assert_array_equal(self.locations[[0, 4, 8, 12, 16, 19]], segments[:, 0])
+        np.testing.assert_array_equal(self.locations[0], segments[-1, 1])
+        self.assertEqual(5, len(plotting.decimate(self.locations, 5)))
+
+    def test_save(self):
+        tsp = TSP('random20', self.locations)
+        vrp = VRP('random20', 3, 0, self.locations)
+        paths = [os.path.join(self.directory.name, name) for name in ('tour.png', 'tour.svg', 'routes.png')]
+
+        self.assertIsNone(tsp.plotData(list(range(20)), paths[0]))
+        tsp.plotData(list(range(20)), paths[1])
+        vrp.plotData(list(range(len(vrp))), paths[2])
+
+        for path in paths:
+            self.assertTrue(os.path.getsize(path) > 0)
+        with open(paths[0], 'rb') as f:
+            self.assertEqual(b'\x89PNG', f.read(4))
+        with open(paths[1]) as f:
+            self.assertIn('<svg', f.read())
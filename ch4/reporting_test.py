@@ -0,0 +1,44 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from deap import base
+from deap import creator
+from deap import tools
+
+from reporting import FitnessStatistics, LogbookWriter
+
+creator.create('FitnessMulti', base.Fitness, weights=(-1.0, 1.0))
+creator.create('Pair', list, fitness=creator.FitnessMulti)
+
+
+class ReportingTestSuite(unittest.TestCase):
+    def test_matches_deap_statistics(self):
+        population = [creator.Pair([i]) for i in range(10)]
+        for ind in population:
+            ind.fitness.values = (ind[0] * 2.0, 100.0 - ind[0])
+
+        stats = FitnessStatistics()
+        record = stats.compile(population)
+
+        deapStats = tools.Statistics(lambda ind: ind.fitness.values)
+        for field, function in FitnessStatistics.FUNCTIONS.items():
+            deapStats.register(field, function, axis=0)
+        expected = deapStats.compile(population)
+
+        for field in stats.fields:
+            np.testing.assert_allclose(expected[field], record[field])
+
+    def test_single_objective(self):
+        stats = FitnessStatistics(('min', 'avg'))
+        fitness = np.array([[3.0], [1.0], [2.0]])
+        self.assertEqual({'min': 1.0, 'avg': 2.0}, stats.compile(fitness))
+
+    def test_writer(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'logbook.txt')
+            with LogbookWriter(path) as writer:
+                for gen in range(100):
+                    writer.write(f'gen {gen}')
+            with open(path) as f:
+                self.assertEqual([f'gen {gen}' for gen in range(100)], f.read().splitlines())
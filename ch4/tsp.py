@@ -1,87 +1,154 @@
-import csv
-import pickle
 import os
-import codecs
 import numpy as np
 from urllib.request import urlopen
-import matplotlib.pyplot as plt
+
+import plotting
+import tsplib
 
 URL_PREFIX = 'http://elib.zib.de/pub/mp-testdata/tsp/tsplib/tsp/'
 
+# the folder of the downloaded .tsp files and of their cached arrays, by default next to this module
+DATA_DIRECTORY = os.environ.get('TSP_DATA_DIR', os.path.join(os.path.dirname(os.path.abspath(__file__)), 'tsp-data'))
+
 
 class TSP:
 
-    def __init__(self, name: str):
+    def __init__(self, name: str, locations=None, path: str = None, dtype=np.float64, condensed: bool = False,
+                 onDemand: bool = False):
+        """
+        :param name: name of the TSPLIB problem, read from the data folder and downloaded there if missing.
+        :param locations: optional list of city coordinates; when given, nothing is loaded or downloaded, e.g. for
+        synthetic problems of any size.
+        :param path: optional path of a local .tsp file to read instead of the data folder, e.g. on offline machines.
+        :param dtype: the type of the stored distances, e.g. float32, or int32 which is exact for TSPLIB distances.
+        :param condensed: whether to store only the upper triangle of the distance matrix, for large problems.
+        :param onDemand: whether to compute the distances from the coordinates when needed instead of storing any
+        distance matrix, for the largest problems.
+        """
         self.name = name
-        self.locations = []
-        self.distances = []
+        self.locations = np.empty((0, 2))
+        self.distances = np.empty((0, 0))
+        self.neighbors = {}
         self.tspSize = 0
 
-        self.__initData()
+        if locations is not None:
+            self.locations = np.asarray(locations, dtype=np.float64)
+            if onDemand:
+                self.distances = tsplib.CoordinateDistances(self.locations)
+            else:
+                self.distances = tsplib.computeDistances(self.locations, dtype=dtype, condensed=condensed)
+        else:
+            self.__initData(path or os.path.join(DATA_DIRECTORY, name + '.tsp'), dtype, condensed, onDemand)
+
+        self.tspSize = len(self.distances)
 
     def __len__(self):
         return self.tspSize
 
-    def __initData(self):
-        try:
-            self.locations = pickle.load(open(os.path.join('tsp-data', self.name + '-loc.pickle'), 'rb'))
-            self.distances = pickle.load(open(os.path.join('tsp-data', self.name + '-dist.pickle'), 'rb'))
-        except(OSError, IOError):
-            pass
-
-        if not self.locations or not self.distances:
-            self.__createData()
+    def __initData(self, path, dtype, condensed, onDemand):
+        if not os.path.exists(path):
+            self.__download(path)
 
-        self.tspSize = len(self.locations)
-
-    def __createData(self):
-        self.locations = []
+        # the distances follow the EDGE_WEIGHT_TYPE of the file, and are memory-mapped from the cache
+        if onDemand:
+            locations, self.distances = tsplib.loadCoordinates(path)
+        else:
+            locations, self.distances = tsplib.load(path, DATA_DIRECTORY, dtype, condensed)
+        if locations is not None:
+            self.locations = locations
 
+    def __download(self, path):
         with urlopen(URL_PREFIX + self.name + '.tsp') as f:
-            reader = csv.reader(codecs.iterdecode(f, 'utf-8'), delimiter=' ', skipinitialspace=True)
-
-            for row in reader:
-                if row[0] in ('DISPLAY_DATA_SECTION', 'NODE_COORD_SECTION'):
-                    break
-
-            for row in reader:
-                if row[0] == 'EOF':
-                    break
-
-                del row[0]
-                self.locations.append(np.asarray(row, dtype=np.float32))
-
-            self.tspSize = len(self.locations)
-
-            print(f'length={self.tspSize}, locations={self.locations}')
-
-            self.distances = [[0] * self.tspSize for _ in range(self.tspSize)]
-
-            for i in range(self.tspSize):
-                for j in range(i + 1, self.tspSize):
-                    distance = np.linalg.norm(self.locations[j] - self.locations[i])
-                    self.distances[i][j] = self.distances[j][i] = distance
-                    print(f'{i},{j}: location1={self.locations[i]}, location2={self.locations[j]} '
-                          f'=> distance = {distance}')
-
-            if not os.path.exists('tsp-data'):
-                os.makedirs('tsp-data')
-            pickle.dump(self.locations, open(os.path.join('tsp-data', self.name + '-loc.pickle'), 'wb'))
-            pickle.dump(self.distances, open(os.path.join('tsp-data', self.name + '-dist.pickle'), 'wb'))
+            data = f.read()
+
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, 'wb') as f:
+            f.write(data)
+        print(f'{self.name}: downloaded to {path}')
+
+    def getNeighbors(self, k: int):
+        """
+        :param k: the number of neighbors of each city.
+        :return: an array with the indices of the k nearest neighbors of each city, nearest first, computed once per k.
+        """
+        if k not in self.neighbors:
+            self.neighbors[k] = tsplib.getNeighbors(self.distances, k)
+        return self.neighbors[k]
 
     def getTotalDistance(self, indices):
-        distance = self.distances[indices[-1]][indices[0]]
-
-        for i in range(len(indices) - 1):
-            distance += self.distances[indices[i]][indices[i + 1]]
-
-        return distance
-
-    def plotData(self, indices):
-        plt.scatter(*zip(*self.locations), marker='.', color='red')
-        locs = [self.locations[i] for i in indices]
-        locs.append(locs[0])
-        plt.plot(*zip(*locs), linestyle='-', color='blue')
+        indices = np.asarray(indices)
+        # accumulate in double precision, also for compact float32 distances
+        return float(self.distances[indices[:-1], indices[1:]].sum(dtype=np.float64)
+                     + self.distances[indices[-1], indices[0]])
+
+    def getTotalDistances(self, tours):
+        """
+        Calculates the total distances of many tours at once, gathering the weights of all their edges, including the
+        edges that close each tour, with a single array lookup.
+        :param tours: a 2-D array, or a list of tours, with one tour of city indices per row.
+        :return: an array with the total distance of each tour.
+        """
+        tours = np.asarray(tours)
+        return self.distances[tours, np.roll(tours, -1, axis=1)].sum(axis=1, dtype=np.float64)
+
+    def getDeltaDistance(self, parent, child, parentDistance, positions):
+        """
+        Calculates the total distance of a tour that differs from a parent tour of known length only in a few positions,
+        e.g. after swapping cities, by updating only the edges that touch these positions.
+        :param parent: the city indices of the parent tour.
+        :param child: the city indices of the new tour.
+        :param parentDistance: the total distance of the parent tour.
+        :param positions: the positions where the child differs from the parent.
+        :return: the total distance of the new tour.
+        """
+        size = len(child)
+
+        # edge i connects the cities at positions i and i + 1
+        edges = set()
+        for position in positions:
+            edges.add(position - 1 if position > 0 else size - 1)
+            edges.add(position)
+
+        distance = parentDistance
+        for i in edges:
+            j = i + 1 if i < size - 1 else 0
+            distance += self.distances[child[i], child[j]] - self.distances[parent[i], parent[j]]
+
+        return float(distance)
+
+    def getReversalDistance(self, indices, distance, start, end):
+        """
+        Calculates the total distance of the tour obtained by reversing the segment indices[start:end + 1].
+        As distances are symmetric, only the two edges at the ends of the segment change.
+        :param indices: the city indices of the tour.
+        :param distance: the total distance of the tour.
+        :param start: the position of the first city of the reversed segment.
+        :param end: the position of the last city of the reversed segment.
+        :return: the total distance of the tour after the reversal.
+        """
+        size = len(indices)
+        if end - start >= size - 2:
+            # reversing all the cities, or all but one, describes the same cycle
+            return distance
+
+        before, first, last, after = indices[start - 1], indices[start], indices[end], indices[(end + 1) % size]
+        return float(distance - self.distances[before, first] - self.distances[last, after]
+                     + self.distances[before, last] + self.distances[first, after])
+
+    def plotData(self, indices, path: str = None):
+        """
+        Plots the cities and the given tour, see plotting.drawRoutes().
+        :param indices: the city indices of the tour.
+        :param path: the path of an image file to write the plot to instead, e.g. 'tour.png', for headless runs.
+        :return: the pyplot module, to show the plot, or None when it was written to a file.
+        """
+        if path is not None:
+            plotting.saveRoutes(path, self.locations, [indices])
+            return None
+
+        import matplotlib.pyplot as plt
+
+        plotting.drawRoutes(plt.gca(), self.locations, [indices])
         return plt
 
 
@@ -0,0 +1,41 @@
+import unittest
+import numpy as np
+
+from tsp import TSP
+
+
+class TspTestSuite(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.tsp = TSP('random20', rng.uniform(0, 100, size=(20, 2)))
+        self.tour = rng.permutation(20).tolist()
+
+    def getLoopDistance(self, indices):
+        locations = self.tsp.locations
+        return sum(np.linalg.norm(locations[a] - locations[b]) for a, b in zip(indices, indices[1:] + indices[:1]))
+
+    def test_distances(self):
+        locations = self.tsp.locations
+        self.assertEqual((20, 20), self.tsp.distances.shape)
+        for i in range(20):
+            for j in range(20):
+                self.assertAlmostEqual(np.linalg.norm(locations[i] - locations[j]), self.tsp.distances[i, j])
+
+    def test_total_distance(self):
+        self.assertAlmostEqual(self.getLoopDistance(self.tour), self.tsp.getTotalDistance(self.tour))
+
+    def test_delta_and_reversal_distance(self):
+        distance = self.tsp.getTotalDistance(self.tour)
+
+        child = list(self.tour)
+        child[3], child[11] = child[11], child[3]
+        self.assertAlmostEqual(self.getLoopDistance(child),
+                               self.tsp.getDeltaDistance(self.tour, child, distance, [3, 11]))
+
+        reversed = self.tour[:4] + self.tour[4:10][::-1] + self.tour[10:]
+        self.assertAlmostEqual(self.getLoopDistance(reversed), self.tsp.getReversalDistance(self.tour, distance, 4, 9))
+
+    def test_total_distances(self):
+        tours = np.array([np.random.default_rng(seed).permutation(20) for seed in range(10)])
+        np.testing.assert_allclose([self.tsp.getTotalDistance(tour) for tour in tours],
+                                   self.tsp.getTotalDistances(tours))
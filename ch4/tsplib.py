@@ -0,0 +1,472 @@
+import hashlib
+import math
+import os
+import tempfile
+
+import numpy as np
+
+# maximum number of coordinate differences held in memory while building a distance matrix
+BLOCK_SIZE = 1 << 22
+
+# bump when the cached arrays of a given file would change, e.g. after fixing a distance function
+CACHE_VERSION = 1
+
+# the earth radius and the value of pi defined by TSPLIB for GEO distances
+EARTH_RADIUS = 6378.388
+GEO_PI = 3.141592
+
+
+def nint(values):
+    """
+    :return: the given values rounded to the nearest integer the way TSPLIB does, i.e. (int) (x + 0.5).
+    """
+    return np.floor(values + 0.5)
+
+
+def getEuclideanDistances(coordinates1, coordinates2):
+    """
+    The distance functions broadcast the cities of both arrays against each other, e.g. coordinates1[:, np.newaxis]
+    and coordinates2[np.newaxis] give the matrix of distances, while two arrays of the same shape give the distances
+    between their cities one by one.
+    :param coordinates1: an array of coordinates, the last axis holding the coordinates of each city.
+    :param coordinates2: another array of coordinates.
+    :return: the exact Euclidean distances between the cities of both arrays.
+    """
+    differences = coordinates1 - coordinates2
+    return np.sqrt(np.einsum('...k,...k->...', differences, differences))
+
+
+def getGeoCoordinates(coordinates):
+    """
+    Converts TSPLIB GEO coordinates, given as DDD.MM degrees and minutes, to latitudes and longitudes in radians.
+    """
+    degrees = np.trunc(coordinates)
+    return GEO_PI * (degrees + 5.0 * (coordinates - degrees) / 3.0) / 180.0
+
+
+def getGeoDistances(coordinates1, coordinates2):
+    """
+    :return: the TSPLIB GEO distances, in km on an idealized sphere, between the cities of both arrays.
+    """
+    radians1, radians2 = getGeoCoordinates(coordinates1), getGeoCoordinates(coordinates2)
+    latitude1, longitude1 = radians1[..., 0], radians1[..., 1]
+    latitude2, longitude2 = radians2[..., 0], radians2[..., 1]
+
+    q1 = np.cos(longitude1 - longitude2)
+    q2 = np.cos(latitude1 - latitude2)
+    q3 = np.cos(latitude1 + latitude2)
+    cosines = np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)
+    return np.trunc(EARTH_RADIUS * np.arccos(cosines) + 1.0)
+
+
+def getAttDistances(coordinates1, coordinates2):
+    """
+    :return: the TSPLIB pseudo-Euclidean (ATT) distances between the cities of both arrays.
+    """
+    distances = getEuclideanDistances(coordinates1, coordinates2) / np.sqrt(10.0)
+    rounded = nint(distances)
+    return np.where(rounded < distances, rounded + 1.0, rounded)
+
+
+DISTANCE_FUNCTIONS = {
+    'EUC_2D': lambda coordinates1, coordinates2: nint(getEuclideanDistances(coordinates1, coordinates2)),
+    'EUC_3D': lambda coordinates1, coordinates2: nint(getEuclideanDistances(coordinates1, coordinates2)),
+    'CEIL_2D': lambda coordinates1, coordinates2: np.ceil(getEuclideanDistances(coordinates1, coordinates2)),
+    'GEO': getGeoDistances,
+    'ATT': getAttDistances,
+}
+
+# the triangle of the matrix listed by each EXPLICIT format, as (upper, withDiagonal, byColumn)
+EDGE_WEIGHT_FORMATS = {
+    'UPPER_ROW': (True, False, False),
+    'LOWER_ROW': (False, False, False),
+    'UPPER_DIAG_ROW': (True, True, False),
+    'LOWER_DIAG_ROW': (False, True, False),
+    'UPPER_COL': (True, False, True),
+    'LOWER_COL': (False, False, True),
+    'UPPER_DIAG_COL': (True, True, True),
+    'LOWER_DIAG_COL': (False, True, True),
+}
+
+
+class CondensedDistances:
+    """
+    A symmetric distance matrix stored as its upper triangle, row by row and without the zero diagonal, in about half
+    the memory of the full matrix. It supports the [i, j] lookups of a NumPy matrix, with integers or index arrays, so
+    the code reading the distances works the same with both storages.
+    """
+
+    def __init__(self, data, size: int = None):
+        """
+        :param data: a 1-D array with the distances of the upper triangle, row by row.
+        :param size: the number of cities, deduced from the length of the data by default.
+        """
+        self.data = data
+        self.size = size if size is not None else (1 + math.isqrt(1 + 8 * len(data))) // 2
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def shape(self) -> tuple:
+        return self.size, self.size
+
+    @property
+    def dtype(self):
+        return self.data.dtype
+
+    @property
+    def nbytes(self) -> int:
+        return self.data.nbytes
+
+    def getIndex(self, i, j):
+        """
+        :return: the position of the distance between cities i < j in the data, for integers or index arrays.
+        """
+        return i * (2 * self.size - i - 3) // 2 + j - 1
+
+    def __getitem__(self, key):
+        i, j = key
+        if isinstance(i, (int, np.integer)) and isinstance(j, (int, np.integer)):
+            if i == j:
+                return self.data.dtype.type(0)
+            return self.data[self.getIndex(i, j) if i < j else self.getIndex(j, i)]
+
+        low, high = np.minimum(i, j), np.maximum(i, j)
+        # the index computed for a diagonal cell is the one before (i, i + 1), always a valid position
+        return np.where(low == high, 0, self.data[self.getIndex(low, high)])
+
+    def toMatrix(self):
+        """
+        :return: the full distance matrix.
+        """
+        matrix = np.zeros(self.shape, dtype=self.dtype)
+        rows, columns = np.triu_indices(self.size, 1)
+        matrix[rows, columns] = matrix[columns, rows] = self.data
+        return matrix
+
+
+class CoordinateDistances:
+    """
+    Distances computed on demand from the coordinates of the cities, for problems too large for any distance matrix.
+    Like CondensedDistances, it supports the [i, j] lookups of a NumPy matrix, so that looking up the edges of a whole
+    tour is a single vectorized computation over the coordinates.
+    """
+
+    def __init__(self, coordinates, edgeWeightType: str = None):
+        """
+        :param coordinates: an array of coordinates, one row per city.
+        :param edgeWeightType: the TSPLIB EDGE_WEIGHT_TYPE of the distances, exact Euclidean distances by default.
+        """
+        self.coordinates = coordinates
+        self.edgeWeightType = edgeWeightType
+        self.distanceFunction = DISTANCE_FUNCTIONS[edgeWeightType] if edgeWeightType else getEuclideanDistances
+
+    def __len__(self):
+        return len(self.coordinates)
+
+    @property
+    def shape(self) -> tuple:
+        return len(self), len(self)
+
+    @property
+    def dtype(self):
+        return np.dtype(np.float64)
+
+    @property
+    def nbytes(self) -> int:
+        return self.coordinates.nbytes
+
+    def __getitem__(self, key):
+        i, j = key
+        distances = self.distanceFunction(self.coordinates[i], self.coordinates[j])
+        # GEO distances are never zero, even between a city and itself
+        return np.where(np.equal(i, j), 0.0, distances)[()]
+
+    def getSpatialCoordinates(self):
+        """
+        :return: coordinates whose Euclidean distances are ordered like the distances of the problem, e.g. to build a
+        spatial index; GEO cities are placed on the unit sphere.
+        """
+        if self.edgeWeightType != 'GEO':
+            return self.coordinates
+
+        latitudes, longitudes = getGeoCoordinates(self.coordinates).T
+        return np.column_stack((np.cos(latitudes) * np.cos(longitudes), np.cos(latitudes) * np.sin(longitudes),
+                                np.sin(latitudes)))
+
+
+def getNeighbors(distances, k: int):
+    """
+    Finds the nearest neighbors of every city, e.g. as candidate lists for local search and for operators.
+    Distances on demand are searched with a KD-tree of the coordinates, without computing all pairwise distances,
+    while the other storages are scanned a block of rows at a time.
+    :param distances: a NumPy distance matrix, a CondensedDistances or a CoordinateDistances.
+    :param k: the number of neighbors of each city.
+    :return: an array with the indices of the k nearest neighbors of each city, nearest first.
+    """
+    size = len(distances)
+    k = min(k, size - 1)
+    cities = np.arange(size)
+
+    if isinstance(distances, CoordinateDistances):
+        from scipy.spatial import cKDTree
+
+        points = distances.getSpatialCoordinates()
+        _, neighbors = cKDTree(points).query(points, k + 1)
+        # a city usually comes first among its own neighbors, but duplicated locations may come before it
+        order = np.argsort(neighbors == cities[:, np.newaxis], axis=1, kind='stable')
+        return np.take_along_axis(neighbors, order, axis=1)[:, :k]
+
+    neighbors = np.empty((size, k), dtype=np.intp)
+    rows = max(1, BLOCK_SIZE // size)
+    for start in range(0, size, rows):
+        block = cities[start:start + rows]
+        blockDistances = np.array(distances[block[:, np.newaxis], cities[np.newaxis, :]], dtype=np.float64)
+        blockDistances[np.arange(len(block)), block] = np.inf
+
+        nearest = np.argpartition(blockDistances, k - 1, axis=1)[:, :k]
+        order = np.argsort(np.take_along_axis(blockDistances, nearest, axis=1), axis=1, kind='stable')
+        neighbors[start:start + rows] = np.take_along_axis(nearest, order, axis=1)
+    return neighbors
+
+
+def toStorage(matrix, dtype=np.float64, condensed: bool = False):
+    """
+    :param matrix: a full distance matrix.
+    :param dtype: the type of the stored distances; integer types round the distances to the nearest integer.
+    :param condensed: whether to keep only the upper triangle, see CondensedDistances.
+    :return: the distances in the requested storage.
+    """
+    if np.dtype(dtype).kind in 'iu':
+        matrix = np.rint(matrix)
+    if condensed:
+        return CondensedDistances(matrix[np.triu_indices(len(matrix), 1)].astype(dtype))
+    return matrix.astype(dtype, copy=False)
+
+
+def computeDistances(coordinates, distanceFunction=getEuclideanDistances, dtype=np.float64, condensed: bool = False):
+    """
+    Computes the distance matrix a block of rows at a time, so that the intermediate arrays stay small even for
+    thousands of cities.
+    :param coordinates: an array of coordinates, one row per city.
+    :param distanceFunction: one of the distance functions, e.g. getEuclideanDistances().
+    :param dtype: the type of the stored distances; integer types round the distances to the nearest integer, which
+    is exact for the TSPLIB distance functions.
+    :param condensed: whether to keep only the upper triangle, see CondensedDistances.
+    :return: the distance matrix, a NumPy array or a CondensedDistances.
+    """
+    size = len(coordinates)
+    if condensed:
+        distances = CondensedDistances(np.empty(size * (size - 1) // 2, dtype=dtype), size)
+    else:
+        distances = np.empty((size, size), dtype=dtype)
+
+    rows = max(1, BLOCK_SIZE // max(1, coordinates.size))
+    for start in range(0, size, rows):
+        # the condensed storage only needs the distances to the cities after each row
+        block = toStorage(distanceFunction(coordinates[start:start + rows, np.newaxis],
+                                           (coordinates[start:] if condensed else coordinates)[np.newaxis]), dtype)
+        if condensed:
+            for row, i in enumerate(range(start, min(start + rows, size - 1))):
+                position = distances.getIndex(i, i + 1)
+                distances.data[position:position + size - i - 1] = block[row, row + 1:]
+        else:
+            distances[start:start + rows] = block
+
+    if not condensed:
+        np.fill_diagonal(distances, 0)
+    return distances
+
+
+def parse(path: str) -> dict:
+    """
+    Reads a file in the TSPLIB format.
+    :param path: path of the .tsp file.
+    :return: a dictionary with the specification entries (NAME, DIMENSION, EDGE_WEIGHT_TYPE...) as strings, except for
+    the integer DIMENSION, and the data sections (NODE_COORD_SECTION, EDGE_WEIGHT_SECTION...) as flat float arrays.
+    """
+    problem = {}
+    section = None
+    values = {}
+
+    with open(path) as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+
+            keyword = line.split(':')[0].strip()
+            if keyword == 'EOF':
+                break
+            if keyword.endswith('_SECTION'):
+                section = keyword
+                values[section] = []
+            elif ':' in line:
+                section = None
+                problem[keyword] = line.split(':', 1)[1].strip()
+            elif section:
+                values[section].append(line)
+            else:
+                raise ValueError('unexpected line in TSPLIB file ', line)
+
+    problem['DIMENSION'] = int(problem['DIMENSION'])
+    for section, lines in values.items():
+        problem[section] = np.array(' '.join(lines).split(), dtype=np.float64)
+
+    return problem
+
+
+def getCoordinates(problem: dict, section: str):
+    """
+    :return: the coordinates listed in the given section of a parsed problem, one row per city, or None.
+    """
+    if section not in problem:
+        return None
+
+    # each line holds the node number followed by its coordinates
+    return problem[section].reshape(problem['DIMENSION'], -1)[:, 1:]
+
+
+def getDemands(problem: dict):
+    """
+    :return: the demand of each city listed in the DEMAND_SECTION of a parsed CVRP problem, or None.
+    """
+    if 'DEMAND_SECTION' not in problem:
+        return None
+
+    # each line holds the node number followed by its demand
+    return problem['DEMAND_SECTION'].reshape(problem['DIMENSION'], 2)[:, 1]
+
+
+def getDepots(problem: dict) -> list:
+    """
+    :return: the zero-based indices of the depots listed in the DEPOT_SECTION of a parsed CVRP problem, which ends
+    with -1, or an empty list.
+    """
+    depots = []
+    for node in problem.get('DEPOT_SECTION', ()):
+        if node < 0:
+            break
+        depots.append(int(node) - 1)
+    return depots
+
+
+def getDistances(problem: dict, dtype=np.float64, condensed: bool = False):
+    """
+    :param problem: a problem returned by parse().
+    :param dtype: the type of the stored distances, see computeDistances().
+    :param condensed: whether to keep only the upper triangle, see CondensedDistances.
+    :return: the distance matrix following the EDGE_WEIGHT_TYPE and EDGE_WEIGHT_FORMAT of the problem.
+    """
+    edgeWeightType = problem.get('EDGE_WEIGHT_TYPE')
+    if edgeWeightType in DISTANCE_FUNCTIONS:
+        return computeDistances(getCoordinates(problem, 'NODE_COORD_SECTION'), DISTANCE_FUNCTIONS[edgeWeightType],
+                                dtype, condensed)
+
+    # explicit weights are listed in the file, and are only practical for small problems
+    return toStorage(getExplicitDistances(problem), dtype, condensed)
+
+
+def getExplicitDistances(problem: dict):
+    """
+    :param problem: a problem returned by parse(), with an EXPLICIT EDGE_WEIGHT_TYPE.
+    :return: the full distance matrix listed in the EDGE_WEIGHT_SECTION of the problem.
+    """
+    size = problem['DIMENSION']
+    edgeWeightType = problem.get('EDGE_WEIGHT_TYPE')
+
+    if edgeWeightType != 'EXPLICIT':
+        raise ValueError('unsupported EDGE_WEIGHT_TYPE ', edgeWeightType)
+
+    weights = problem['EDGE_WEIGHT_SECTION']
+    edgeWeightFormat = problem.get('EDGE_WEIGHT_FORMAT')
+    if edgeWeightFormat == 'FULL_MATRIX':
+        return weights[:size * size].reshape(size, size).copy()
+
+    if edgeWeightFormat not in EDGE_WEIGHT_FORMATS:
+        raise ValueError('unsupported EDGE_WEIGHT_FORMAT ', edgeWeightFormat)
+
+    # listing the upper triangle column by column visits the cells in the order of the lower triangle row by row,
+    # and as the matrix is symmetric, the same weights fill both triangles
+    upper, withDiagonal, byColumn = EDGE_WEIGHT_FORMATS[edgeWeightFormat]
+    offset = 0 if withDiagonal else 1
+    if upper != byColumn:
+        rows, columns = np.triu_indices(size, offset)
+    else:
+        rows, columns = np.tril_indices(size, -offset)
+
+    distances = np.zeros((size, size))
+    distances[rows, columns] = distances[columns, rows] = weights[:len(rows)]
+    return distances
+
+
+def loadCoordinates(path: str) -> tuple:
+    """
+    Loads a TSPLIB file for distances on demand, without any distance matrix or cache.
+    :param path: path of the .tsp file, with an EDGE_WEIGHT_TYPE computed from coordinates.
+    :return: the locations used to plot the cities, see load(), and the CoordinateDistances of the problem.
+    """
+    problem = parse(path)
+    edgeWeightType = problem.get('EDGE_WEIGHT_TYPE')
+    if edgeWeightType not in DISTANCE_FUNCTIONS:
+        raise ValueError('distances on demand need coordinates, unsupported EDGE_WEIGHT_TYPE ', edgeWeightType)
+
+    coordinates = getCoordinates(problem, 'NODE_COORD_SECTION')
+    locations = getCoordinates(problem, 'DISPLAY_DATA_SECTION')
+    return coordinates if locations is None else locations, CoordinateDistances(coordinates, edgeWeightType)
+
+
+def getFileDigest(path: str) -> str:
+    """
+    :return: a digest of the content of the given file, identifying its cached arrays.
+    """
+    digest = hashlib.sha256(str(CACHE_VERSION).encode())
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def saveArray(path: str, array):
+    """
+    Saves an array as a .npy file through a temporary file, so that concurrent readers never see a partial file.
+    """
+    directory = os.path.dirname(path)
+    handle, temporaryPath = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'wb') as f:
+        np.save(f, array)
+    os.replace(temporaryPath, path)
+
+
+def load(path: str, cacheDirectory: str, dtype=np.float64, condensed: bool = False) -> tuple:
+    """
+    Loads the locations and the distance matrix of a TSPLIB file. The arrays are cached as .npy files named after the
+    digest of the file content and the storage of the distances, and the distances are memory-mapped, so that
+    processes loading the same problem share a single copy of them in the page cache.
+    :param path: path of the .tsp file.
+    :param cacheDirectory: the folder of the cached arrays.
+    :param dtype: the type of the stored distances, see computeDistances().
+    :param condensed: whether to keep only the upper triangle, see CondensedDistances.
+    :return: the locations used to plot the cities, preferring the DISPLAY_DATA_SECTION over the NODE_COORD_SECTION,
+    or None if the file has neither, and the read-only distance matrix.
+    """
+    digest = getFileDigest(path)
+    locationsPath = os.path.join(cacheDirectory, digest + '-locations.npy')
+    storage = 'condensed' if condensed else 'full'
+    distancesPath = os.path.join(cacheDirectory, f'{digest}-distances-{storage}-{np.dtype(dtype).name}.npy')
+
+    if not os.path.exists(distancesPath):
+        problem = parse(path)
+        locations = getCoordinates(problem, 'DISPLAY_DATA_SECTION')
+        if locations is None:
+            locations = getCoordinates(problem, 'NODE_COORD_SECTION')
+
+        os.makedirs(cacheDirectory, exist_ok=True)
+        saveArray(locationsPath, np.empty((0, 2)) if locations is None else locations)
+        distances = getDistances(problem, dtype, condensed)
+        saveArray(distancesPath, distances.data if condensed else distances)
+
+    locations = np.load(locationsPath)
+    distances = np.load(distancesPath, mmap_mode='r')
+    return locations if len(locations) else None, CondensedDistances(distances) if condensed else distances
@@ -0,0 +1,185 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+
+import tsp
+import tsplib
+
+BURMA14 = '''NAME: burma14
+TYPE: TSP
+DIMENSION: 14
+EDGE_WEIGHT_TYPE: GEO
+NODE_COORD_SECTION
+   1  16.47       96.10
+   2  16.47       94.44
+   3  20.09       92.54
+   4  22.39       93.37
+   5  25.23       97.24
+   6  22.00       96.05
+   7  20.47       97.02
+   8  17.20       96.29
+   9  16.30       97.38
+  10  14.05       98.12
+  11  16.53       97.38
+  12  21.52       95.59
+  13  19.41       97.13
+  14  20.09       94.55
+EOF
+'''
+
+# the optimal burma14 tour published with TSPLIB, and its length
+BURMA14_TOUR = [0, 1, 13, 2, 3, 4, 5, 11, 6, 12, 7, 10, 8, 9]
+BURMA14_LENGTH = 3323
+
+COORDINATES = np.array([[0.0, 0.0], [3.0, 4.0], [6.5, 0.2], [1.0, 9.0], [7.0, 7.0]])
+
+
+def writeCoordinates(edgeWeightType, coordinates=COORDINATES):
+    lines = ['NAME : test', f'DIMENSION : {len(coordinates)}', f'EDGE_WEIGHT_TYPE : {edgeWeightType}',
+             'NODE_COORD_SECTION']
+    lines += [f'{i + 1} {x} {y}' for i, (x, y) in enumerate(coordinates)]
+    return '\n'.join(lines + ['EOF'])
+
+
+def writeExplicit(edgeWeightFormat, weights):
+    lines = ['NAME: test', f'DIMENSION: {len(COORDINATES)}', 'EDGE_WEIGHT_TYPE: EXPLICIT',
+             f'EDGE_WEIGHT_FORMAT: {edgeWeightFormat}', 'EDGE_WEIGHT_SECTION', ' '.join(str(w) for w in weights), 'EOF']
+    return '\n'.join(lines)
+
+
+class TsplibTestSuite(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def getDistances(self, content):
+        path = os.path.join(self.directory.name, 'test.tsp')
+        with open(path, 'w') as f:
+            f.write(content)
+        return tsplib.getDistances(tsplib.parse(path))
+
+    def test_geo(self):
+        path = os.path.join(self.directory.name, 'burma14.tsp')
+        with open(path, 'w') as f:
+            f.write(BURMA14)
+
+        with mock.patch.object(tsp, 'DATA_DIRECTORY', self.directory.name):
+            burma14 = tsp.TSP('burma14', path=path)
+        self.assertEqual(14, len(burma14))
+        self.assertEqual(BURMA14_LENGTH, burma14.getTotalDistance(BURMA14_TOUR))
+
+    def test_coordinate_types(self):
+        exact = tsplib.getEuclideanDistances(COORDINATES[:, np.newaxis], COORDINATES[np.newaxis])
+        np.testing.assert_array_equal(np.floor(exact + 0.5), self.getDistances(writeCoordinates('EUC_2D')))
+        np.testing.assert_array_equal(np.ceil(exact), self.getDistances(writeCoordinates('CEIL_2D')))
+
+        att = self.getDistances(writeCoordinates('ATT'))
+        self.assertTrue(np.all(att >= exact / np.sqrt(10.0)))
+        self.assertTrue(np.all(att < exact / np.sqrt(10.0) + 1.0 + 1e-9))
+        self.assertEqual(2.0, att[0, 1])
+
+    def test_explicit_formats(self):
+        expected = self.getDistances(writeCoordinates('EUC_2D'))
+        size = len(expected)
+
+        def getWeights(rows, columns, byColumn):
+            cells = sorted(zip(rows, columns), key=lambda cell: (cell[1], cell[0]) if byColumn else cell)
+            return [int(expected[i, j]) for i, j in cells]
+
+        for edgeWeightFormat, (upper, withDiagonal, byColumn) in tsplib.EDGE_WEIGHT_FORMATS.items():
+            offset = 0 if withDiagonal else 1
+            rows, columns = np.triu_indices(size, offset) if upper else np.tril_indices(size, -offset)
+            distances = self.getDistances(writeExplicit(edgeWeightFormat, getWeights(rows, columns, byColumn)))
+            np.testing.assert_array_equal(expected, distances, edgeWeightFormat)
+
+        np.testing.assert_array_equal(expected, self.getDistances(writeExplicit('FULL_MATRIX', expected.ravel())))
+
+    def test_cache(self):
+        path = os.path.join(self.directory.name, 'test.tsp')
+        with open(path, 'w') as f:
+            f.write(writeCoordinates('EUC_2D'))
+
+        cacheDirectory = os.path.join(self.directory.name, 'cache')
+        locations, distances = tsplib.load(path, cacheDirectory)
+        self.assertEqual(2, len(os.listdir(cacheDirectory)))
+
+        cachedLocations, cachedDistances = tsplib.load(path, cacheDirectory)
+        self.assertIsInstance(cachedDistances, np.memmap)
+        np.testing.assert_array_equal(COORDINATES, cachedLocations)
+        np.testing.assert_array_equal(distances, cachedDistances)
+
+        # a changed file gets its own cached arrays
+        with open(path, 'w') as f:
+            f.write(writeCoordinates('CEIL_2D'))
+        tsplib.load(path, cacheDirectory)
+        self.assertEqual(4, len(os.listdir(cacheDirectory)))
+
+    def test_compact_storage(self):
+        rng = np.random.default_rng(42)
+        coordinates = rng.uniform(0, 1000, size=(50, 2))
+        full = tsplib.computeDistances(coordinates, tsplib.DISTANCE_FUNCTIONS['EUC_2D'])
+        tour = rng.permutation(50)
+
+        for dtype in (np.float64, np.float32, np.int32):
+            condensed = tsplib.computeDistances(coordinates, tsplib.DISTANCE_FUNCTIONS['EUC_2D'], dtype, True)
+            self.assertEqual(50 * 49 // 2 * np.dtype(dtype).itemsize, condensed.nbytes)
+            np.testing.assert_array_equal(full, condensed.toMatrix())
+            np.testing.assert_array_equal(full[tour, np.roll(tour, 1)], condensed[tour, np.roll(tour, 1)])
+            np.testing.assert_array_equal(full[tour, tour], condensed[tour, tour])
+            self.assertEqual(full[7, 3], condensed[7, 3])
+            self.assertEqual(full[3, 7], condensed[3, 7])
+            self.assertEqual(0, condensed[5, 5])
+
+            np.testing.assert_array_equal(full, tsplib.computeDistances(coordinates,
+                                                                        tsplib.DISTANCE_FUNCTIONS['EUC_2D'], dtype))
+
+    def test_compact_tsp(self):
+        path = os.path.join(self.directory.name, 'burma14.tsp')
+        with open(path, 'w') as f:
+            f.write(BURMA14)
+
+        with mock.patch.object(tsp, 'DATA_DIRECTORY', self.directory.name):
+            burma14 = tsp.TSP('burma14', path=path, dtype=np.int32, condensed=True)
+            reloaded = tsp.TSP('burma14', path=path, dtype=np.int32, condensed=True)
+        self.assertEqual(BURMA14_LENGTH, burma14.getTotalDistance(BURMA14_TOUR))
+        self.assertIsInstance(reloaded.distances.data, np.memmap)
+        self.assertEqual(np.int32, reloaded.distances.dtype)
+        self.assertEqual(BURMA14_LENGTH, reloaded.getTotalDistance(BURMA14_TOUR))
+
+    def test_distances_on_demand(self):
+        path = os.path.join(self.directory.name, 'burma14.tsp')
+        with open(path, 'w') as f:
+            f.write(BURMA14)
+
+        with mock.patch.object(tsp, 'DATA_DIRECTORY', self.directory.name):
+            burma14 = tsp.TSP('burma14', path=path)
+            onDemand = tsp.TSP('burma14', path=path, onDemand=True)
+        self.assertIsInstance(onDemand.distances, tsplib.CoordinateDistances)
+        self.assertEqual(BURMA14_LENGTH, onDemand.getTotalDistance(BURMA14_TOUR))
+        for i in range(14):
+            for j in range(14):
+                self.assertEqual(burma14.distances[i, j], onDemand.distances[i, j])
+
+        # the KD-tree of the cities on the unit sphere finds the same neighbors as the matrix
+        np.testing.assert_array_equal(burma14.getNeighbors(5)[:, 0], onDemand.getNeighbors(5)[:, 0])
+
+    def test_neighbors(self):
+        rng = np.random.default_rng(42)
+        coordinates = rng.uniform(0, 1000, size=(200, 2))
+        matrix = tsp.TSP('random200', coordinates)
+        onDemand = tsp.TSP('random200', coordinates, onDemand=True)
+
+        tour = rng.permutation(200).tolist()
+        self.assertAlmostEqual(matrix.getTotalDistance(tour), onDemand.getTotalDistance(tour))
+
+        neighbors = onDemand.getNeighbors(8)
+        self.assertEqual((200, 8), neighbors.shape)
+        np.testing.assert_array_equal(np.argsort(matrix.distances, axis=1, kind='stable')[:, 1:9], neighbors)
+        np.testing.assert_array_equal(neighbors, matrix.getNeighbors(8))
+        np.testing.assert_array_equal(neighbors, tsplib.getNeighbors(tsplib.computeDistances(coordinates,
+                                                                                             condensed=True), 8))
+        self.assertIs(neighbors, onDemand.getNeighbors(8))
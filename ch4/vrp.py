@@ -1,19 +1,21 @@
 import random
 import numpy as np
-import matplotlib.pyplot as plt
+import plotting
 from tsp import TSP
 
 
 class VRP:
 
-    def __init__(self, tspName, numOfVehicles, depotIndex):
+    def __init__(self, tspName, numOfVehicles, depotIndex, locations=None, path=None):
         """
         Creates an instance of a VRP.
         :param tspName: name of the underlying TSP.
         :param numOfVehicles: number of vehicles used.
         :param depotIndex: the index of the TSP city used as depot location.
+        :param locations: optional city coordinates of the underlying TSP, see TSP.
+        :param path: optional path of a local TSPLIB file with the cities, see TSP.
         """
-        self.tsp = TSP(tspName)
+        self.tsp = TSP(tspName, locations, path)
         self.numOfVehicles = numOfVehicles
         self.depotIndex = depotIndex
 
@@ -29,30 +31,15 @@ class VRP:
         :param indices: list of indices, including 'separator' indices.
         :return: a list of routes, each route being a list of location indices from the TSP problem.
         """
+        # skip the depot index, found once in each permutation
+        cities = list(indices)
+        if self.depotIndex in cities:
+            cities.remove(self.depotIndex)
 
-        routes = []
-        route = []
-
-        for i in indices:
-
-            # skip depot index
-            if i == self.depotIndex:
-                continue
-
-            # index is part of the current route
-            if not self.isSeparatorIndex(i):
-                route.append(i)
-
-            # separator index, the route is complete
-            else:
-                routes.append(route)
-                route = []
-
-        # append the last route
-        if route or self.isSeparatorIndex(i):
-            routes.append(route)
-
-        return routes
+        # the routes lie between the separator indices, one route per vehicle even when some are empty
+        separatorStart = len(self.tsp)
+        separators = [k for k, i in enumerate(cities) if i >= separatorStart]
+        return [cities[start + 1:end] for start, end in zip([-1] + separators, separators + [len(cities)])]
 
     def isSeparatorIndex(self, index):
         """
@@ -72,17 +59,142 @@ class VRP:
         if not indices:
             return 0
 
+        distances = self.tsp.distances
+
         # find the distance between the depot location and the first city
-        distance = self.tsp.distances[self.depotIndex][indices[0]]
+        distance = distances[self.depotIndex, indices[0]]
 
         # find the distance between the depot location and the last city
-        distance += self.tsp.distances[indices[-1]][self.depotIndex]
+        distance += distances[indices[-1], self.depotIndex]
 
-        # add the distances of between the cities along the route
+        # add the distances of between the cities along the route, which are too short to gain from vectorizing
         for i in range(len(indices) - 1):
-            distance += self.tsp.distances[indices[i]][indices[i + 1]]
+            distance += distances[indices[i], indices[i + 1]]
+
+        return float(distance)
+
+    def getRouteDistances(self, indices):
+        """
+        Splits the given indices into routes once and measures each route.
+        :param indices: a list of ordered city indices and separator indices describing one or more paths.
+        :return: a list with the distance of each path, 0 for the empty ones.
+        """
+        return [self.getRouteDistance(route) for route in self.getRoutes(indices)]
+
+    def getDistanceStatistics(self, indices):
+        """
+        Calculates all the distance metrics of the various paths described by the given indices with a single split
+        of the indices, for fitness functions combining several of them.
+        :param indices: a list of ordered city indices and separator indices describing one or more paths.
+        :return: a dict with the 'distances' of the paths, and their 'total', 'min', 'max' and 'avg' distance, where
+        the average does not consider empty paths.
+        """
+        routes = self.getRoutes(indices)
+        distances = [self.getRouteDistance(route) for route in routes]
+        return self.__getStatistics(distances, sum(1 for route in routes if route))
+
+    def getDeltaDistanceStatistics(self, parent, child, parentDistances, positions):
+        """
+        Incremental counterpart of getDistanceStatistics(), for indices that differ from parent indices of known route
+        distances only in a few positions, e.g. after swapping cities: the changed positions are mapped to their routes
+        through the separator positions, and only the routes that contain them, or whose separators moved, are
+        measured again, while the distances of the other routes are taken from the parent.
+        :param parent: the indices of the parent.
+        :param child: the indices of the child.
+        :param parentDistances: the distance of each path of the parent, as in getDistanceStatistics()['distances'].
+        :param positions: the positions where the child differs from the parent.
+        :return: the statistics of the child, as returned by getDistanceStatistics().
+        """
+        separatorStart = len(self.tsp)
+        child = np.asarray(child, dtype=np.intp)
+
+        # the path k lies between the positions of the separators k - 1 and k
+        childBounds = np.concatenate(([-1], np.flatnonzero(child >= separatorStart), [len(child)]))
+        parentBounds = np.concatenate(([-1], np.flatnonzero(np.asarray(parent) >= separatorStart), [len(child)]))
+        touched = (childBounds[:-1] != parentBounds[:-1]) | (childBounds[1:] != parentBounds[1:])
+        touched[np.searchsorted(childBounds, np.asarray(positions, dtype=np.intp)) - 1] = True
+
+        distances = list(parentDistances)
+        for k in np.flatnonzero(touched).tolist():
+            route = child[childBounds[k] + 1:childBounds[k + 1]]
+            distances[k] = self.getRouteDistance(route[route != self.depotIndex].tolist())
+
+        # a path is empty when its separators are next to each other, or only have the depot between them
+        lengths = np.diff(childBounds) - 1
+        lengths[np.searchsorted(childBounds, np.flatnonzero(child == self.depotIndex)) - 1] -= 1
+        return self.__getStatistics(distances, np.count_nonzero(lengths))
+
+    @staticmethod
+    def __getStatistics(distances, numOfRoutes):
+        """
+        :param distances: the distance of each path.
+        :param numOfRoutes: the number of paths that are not empty.
+        :return: the statistics of getDistanceStatistics().
+        """
+        totalDistance = sum(distances)
+        return {
+            'distances': distances,
+            'total': totalDistance,
+            'min': min(distances),
+            'max': max(distances),
+            'avg': totalDistance / numOfRoutes,
+        }
+
+    def getSeparatorMask(self, population):
+        """
+        Removes the depot index from each row of the population, as getRoutes() skips it, and marks the separators.
+        :param population: a 2-D integer array, or a list of individuals of the same length, one individual per row.
+        :return: the remaining indices, and a boolean mask of the same shape that is True for the separator indices.
+        """
+        population = np.asarray(population, dtype=np.intp)
+        stops = population[population != self.depotIndex].reshape(len(population), -1)
+        return stops, stops >= len(self.tsp)
 
-        return distance
+    def getRouteDistancesBatch(self, population):
+        """
+        Batched counterpart of getRouteDistances(), measuring all the routes of all the given individuals at once:
+        the separator indices become legs through the depot, and the legs are summed per route with a single bincount.
+        :param population: a 2-D integer array, or a list of individuals of the same length, one individual per row.
+        :return: a (individuals, numOfVehicles) array with the distance of each path, 0 for the empty ones.
+        """
+        stops, separators = self.getSeparatorMask(population)
+        count = len(stops)
+
+        # every row starts and ends at the depot, and each separator is a leg back to the depot and out again
+        depots = np.full((count, 1), self.depotIndex)
+        path = np.concatenate((depots, np.where(separators, self.depotIndex, stops), depots), axis=1)
+        legs = self.tsp.distances[path[:, :-1], path[:, 1:]]
+
+        # a leg belongs to the route of its start, i.e. the number of separators before it
+        routeIds = np.zeros(legs.shape, dtype=np.intp)
+        np.cumsum(separators, axis=1, out=routeIds[:, 1:])
+        routeIds += np.arange(count)[:, np.newaxis] * self.numOfVehicles
+        return np.bincount(routeIds.ravel(), weights=legs.ravel(),
+                           minlength=count * self.numOfVehicles).reshape(count, self.numOfVehicles)
+
+    def getDistanceStatisticsBatch(self, population):
+        """
+        Batched counterpart of getDistanceStatistics().
+        :param population: a 2-D integer array, or a list of individuals of the same length, one individual per row.
+        :return: a dict with the 'distances' array of getRouteDistancesBatch(), and the 'total', 'min', 'max' and
+        'avg' arrays with one value per individual, where the average does not consider empty paths.
+        """
+        distances = self.getRouteDistancesBatch(population)
+
+        # a path is empty when its separator is right after the previous one, or at the start or the end of the row
+        _, separators = self.getSeparatorMask(population)
+        edges = np.ones((len(separators), 1), dtype=bool)
+        emptyPaths = np.count_nonzero(np.concatenate((edges, separators), axis=1) &
+                                      np.concatenate((separators, edges), axis=1), axis=1)
+
+        totalDistances = distances.sum(axis=1)
+        return {
+            'distances': distances,
+            'total': totalDistances,
+            'min': distances.min(axis=1),
+            'max': distances.max(axis=1),
+            'avg': totalDistances / (self.numOfVehicles - emptyPaths),
+        }
 
     def getTotalDistance(self, indices):
         """
@@ -90,12 +202,7 @@ class VRP:
         :param indices: a list of ordered city indices and separator indices describing one or more paths.
         :return: combined distance of various paths described by the given indices.
         """
-        totalDistance = 0
-        for route in self.getRoutes(indices):
-            routeDistance = self.getRouteDistance(route)
-            # print(f'- Route distance = {routeDistance}')
-            totalDistance += routeDistance
-        return totalDistance
+        return sum(self.getRouteDistances(indices))
 
     def getMinDistance(self, indices):
         """
@@ -103,11 +210,7 @@ class VRP:
         :param indices: a list of ordered city indices and separator indices describing one or more paths.
         :return: min distance of the various paths described by the given indices.
         """
-        minDistance = 0
-        for route in self.getRoutes(indices):
-            routeDistance = self.getRouteDistance(route)
-            minDistance = min(routeDistance, minDistance)
-        return minDistance
+        return min(self.getRouteDistances(indices))
 
     def getMaxDistance(self, indices):
         """
@@ -115,12 +218,7 @@ class VRP:
         :param indices: a list of ordered city indices and separator indices describing one of more paths.
         :return: max distance of the various paths described by the given indices.
         """
-        maxDistance = 0
-        for route in self.getRoutes(indices):
-            routeDistance = self.getRouteDistance(route)
-            # print(f'- Route distance = {routeDistance}')
-            maxDistance = max(routeDistance, maxDistance)
-        return maxDistance
+        return max(self.getRouteDistances(indices))
 
     def getAvgDistance(self, indices):
         """
@@ -129,39 +227,104 @@ class VRP:
         :param indices: a list of ordered city indices and separator indices describing one or more paths.
         :return: average distance among the distances of the various paths described by the indices.
         """
-        routes = self.getRoutes(indices)
-        totalDistance = 0
-        numberOfPaths = 0
-        for route in routes:
-            if route:  # consider non-empty routes
-                routeDistance = self.getRouteDistance(route)
-                # print(f'- Route distance = {routeDistance}')
-                totalDistance += routeDistance
-                numberOfPaths += 1
-        return totalDistance / numberOfPaths
-
-    def plotData(self, indices):
+        return self.getDistanceStatistics(indices)['avg']
+
+    def split(self, tour, window: int = None):
+        """
+        Decodes a giant tour, a permutation of the cities without separators, into the routes that minimize the
+        longest route using at most numOfVehicles vehicles. The cities keep their order, and each route is a run of
+        consecutive cities of the tour: the best cut of the tour is a shortest path in the DAG of these runs, here
+        with the longest route as the path length, found by dynamic programming over the number of vehicles.
+        :param tour: the ordered city indices; the depot index is skipped if present.
+        :param window: optional maximum number of cities per route, which makes the decoding O(n * window) rather
+        than O(n^2) per vehicle, for large problems.
+        :return: a list of numOfVehicles routes, each a list of city indices, the last ones possibly empty.
+        """
+        tour = np.asarray([city for city in tour if city != self.depotIndex], dtype=np.intp)
+        size = len(tour)
+        window = size if window is None else min(window, size)
+        if size == 0:
+            return [[] for _ in range(self.numOfVehicles)]
+
+        # the distance of the run of cities j to i - 1 is costs[j, i - 1 - j], using the distances along the tour
+        distances = self.tsp.distances
+        along = np.zeros(size)
+        np.cumsum(distances[tour[:-1], tour[1:]], out=along[1:])
+        starts = np.arange(size)[:, np.newaxis]
+        ends = starts + np.arange(window)
+        valid = ends < size
+        ends = np.minimum(ends, size - 1)
+        costs = (distances[self.depotIndex, tour][:, np.newaxis] + along[ends] - along[starts] +
+                 distances[tour[ends], self.depotIndex])
+        costs[~valid] = np.inf
+
+        # the runs that may end with each city i - 1, i.e. start with city j = i - 1 - w
+        lengths = np.arange(window)
+        firsts = np.arange(size)[:, np.newaxis] - lengths
+        usable = firsts >= 0
+        firsts = np.maximum(firsts, 0)
+        runCosts = np.where(usable, costs[firsts, lengths], np.inf)
+
+        # best[i] is the smallest longest route covering the first i cities with the vehicles used so far
+        best = np.full(size + 1, np.inf)
+        best[0] = 0.0
+        choices = []
+        for _ in range(self.numOfVehicles):
+            candidates = np.maximum(best[firsts], runCosts)
+            choice = np.argmin(candidates, axis=1)
+            extended = candidates[np.arange(size), choice]
+            improved = extended < best[1:]
+            choices.append(np.where(improved, firsts[np.arange(size), choice], -1))
+            best[1:] = np.where(improved, extended, best[1:])
+
+        if not np.isfinite(best[size]):
+            raise ValueError('no split of the tour within the window, for a window of ', window)
+
+        # walk back the chosen runs, where -1 means the cities were covered with fewer vehicles
+        routes = []
+        end = size
+        for choice in reversed(choices):
+            if end == 0:
+                break
+            start = choice[end - 1]
+            if start >= 0:
+                routes.append(tour[start:end].tolist())
+                end = start
+        return routes[::-1] + [[] for _ in range(self.numOfVehicles - len(routes))]
+
+    def encodeRoutes(self, routes) -> list:
+        """
+        Encodes the given routes as indices with separators, the depot first, so that they can be measured and
+        plotted like the individuals of the separator encoding, see getRoutes().
+        :param routes: a list of at most numOfVehicles routes, each a list of city indices.
+        :return: a list of len(self) indices.
+        """
+        indices = [self.depotIndex]
+        for separator, route in enumerate(routes):
+            if separator:
+                indices.append(len(self.tsp) + separator - 1)
+            indices += route
+        return indices + list(range(len(self.tsp) + len(routes) - 1, len(self)))
+
+    def plotData(self, indices, path: str = None):
         """
         Breaks the list of indices into separate routes and plot each route in a different color.
         :param indices: a list of ordered city indices and separator indices describing one or more paths.
-        :return: a plot object.
+        :param path: the path of an image file to write the plot to instead, e.g. 'routes.svg', for headless runs.
+        :return: a plot object, or None when the plot was written to a file.
         """
+        from matplotlib import cm
 
-        # plot the cities
-        plt.scatter(*zip(*self.tsp.locations), marker='.', color='red')
+        # each route starts and ends at the depot, which is marked with a large 'X'
+        routes = [[self.depotIndex] + route for route in self.getRoutes(indices)]
+        colors = cm.rainbow(np.linspace(0, 1, self.numOfVehicles))
+        if path is not None:
+            plotting.saveRoutes(path, self.tsp.locations, routes, self.depotIndex, colors=colors)
+            return None
 
-        # mark the depot location with a large 'X'
-        depot = self.tsp.locations[self.depotIndex]
-        plt.plot(depot[0], depot[1], marker='x', markersize=10, color='green')
-
-        # break the indices to separate routes and plot each route in a different color
-        routes = self.getRoutes(indices)
-        color = iter(plt.cm.rainbow(np.linspace(0, 1, self.numOfVehicles)))
-        for route in routes:
-            route = [self.depotIndex] + route + [self.depotIndex]
-            stops = [self.tsp.locations[i] for i in route]
-            plt.plot(*zip(*stops), linestyle='-', color=next(color))
+        import matplotlib.pyplot as plt
 
+        plotting.drawRoutes(plt.gca(), self.tsp.locations, routes, self.depotIndex, colors=colors)
         return plt
 
 
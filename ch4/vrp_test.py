@@ -0,0 +1,96 @@
+import unittest
+import numpy as np
+
+from vrp import VRP
+
+
+class VrpTestSuite(unittest.TestCase):
+    def setUp(self):
+        rng = np.random.default_rng(42)
+        self.vrp = VRP('random20', 3, 0, rng.uniform(0, 100, size=(20, 2)))
+        self.individual = rng.permutation(len(self.vrp)).tolist()
+
+    def getLoopDistance(self, route):
+        locations = self.vrp.tsp.locations
+        stops = [self.vrp.depotIndex] + route + [self.vrp.depotIndex]
+        return sum(np.linalg.norm(locations[a] - locations[b]) for a, b in zip(stops, stops[1:])) if route else 0.0
+
+    def test_distance_statistics(self):
+        distances = [self.getLoopDistance(route) for route in self.vrp.getRoutes(self.individual)]
+        statistics = self.vrp.getDistanceStatistics(self.individual)
+
+        np.testing.assert_allclose(distances, statistics['distances'])
+        self.assertAlmostEqual(sum(distances), statistics['total'])
+        self.assertAlmostEqual(min(distances), statistics['min'])
+        self.assertAlmostEqual(max(distances), statistics['max'])
+        self.assertAlmostEqual(sum(distances) / 3, statistics['avg'])
+
+        for metric in ('total', 'min', 'max', 'avg'):
+            method = getattr(self.vrp, f'get{metric.capitalize()}Distance')
+            self.assertEqual(statistics[metric], method(self.individual))
+
+    def test_empty_route(self):
+        # the two separators 20 and 21 next to each other leave the second route empty
+        individual = list(range(1, 10)) + [20, 21] + list(range(10, 20))
+        statistics = self.vrp.getDistanceStatistics(individual)
+        self.assertEqual(0, statistics['distances'][1])
+        self.assertEqual(0, statistics['min'])
+        self.assertAlmostEqual(statistics['total'] / 2, statistics['avg'])
+
+    def test_batch_statistics(self):
+        rng = np.random.default_rng(7)
+        population = [rng.permutation(len(self.vrp)).tolist() for _ in range(50)]
+        # empty routes at the start, in the middle and at the end, next to the depot
+        population += [[20, 0] + list(range(1, 20)) + [21], list(range(1, 10)) + [20, 0, 21] + list(range(10, 20)),
+                       list(range(1, 20)) + [20, 21, 0]]
+
+        batch = self.vrp.getDistanceStatisticsBatch(np.array(population))
+        self.assertEqual((53, 3), batch['distances'].shape)
+        for i, individual in enumerate(population):
+            statistics = self.vrp.getDistanceStatistics(individual)
+            np.testing.assert_allclose(statistics['distances'], batch['distances'][i])
+            for metric in ('total', 'min', 'max', 'avg'):
+                self.assertAlmostEqual(statistics[metric], batch[metric][i])
+
+    def test_delta_statistics(self):
+        rng = np.random.default_rng(3)
+        parents = [rng.permutation(len(self.vrp)).tolist() for _ in range(20)]
+        # empty routes, and the depot alone between two separators
+        parents += [list(range(1, 10)) + [20, 21] + list(range(10, 20)) + [0],
+                    list(range(1, 10)) + [20, 0, 21] + list(range(10, 20))]
+        for parent in parents:
+            parentDistances = self.vrp.getDistanceStatistics(parent)['distances']
+            for _ in range(20):
+                # swaps of cities, separators and the depot, within a route or between routes
+                child = list(parent)
+                positions = rng.choice(len(child), size=2 * rng.integers(1, 3), replace=False)
+                for i, j in positions.reshape(-1, 2):
+                    child[i], child[j] = child[j], child[i]
+
+                expected = self.vrp.getDistanceStatistics(child)
+                statistics = self.vrp.getDeltaDistanceStatistics(parent, child, parentDistances, positions)
+                np.testing.assert_allclose(expected['distances'], statistics['distances'])
+                for metric in ('total', 'min', 'max', 'avg'):
+                    self.assertAlmostEqual(expected[metric], statistics[metric])
+
+    def test_split(self):
+        tour = np.random.default_rng(7).permutation(20).tolist()
+        routes = self.vrp.split(tour)
+        self.assertEqual([city for city in tour if city != 0], sum(routes, []))
+
+        # the longest route is the smallest over all the ways to cut the tour into at most 3 runs
+        cities = [city for city in tour if city != 0]
+        best = min(max(self.getLoopDistance(cities[:i]), self.getLoopDistance(cities[i:j]),
+                       self.getLoopDistance(cities[j:]))
+                   for i in range(20) for j in range(i, 20))
+        self.assertAlmostEqual(best, max(self.vrp.getRouteDistance(route) for route in routes))
+
+        # the encoded routes are a valid individual of the separator encoding
+        individual = self.vrp.encodeRoutes(routes)
+        self.assertEqual(list(range(len(self.vrp))), sorted(individual))
+        self.assertEqual(routes, self.vrp.getRoutes(individual))
+
+        # a window large enough to allow the optimal routes finds them as well, a too small one fails
+        self.assertEqual(routes, self.vrp.split(tour, window=max(len(route) for route in routes)))
+        with self.assertRaises(ValueError):
+            self.vrp.split(tour, window=5)
@@ -4,12 +4,12 @@ from deap import tools
 
 import random
 import array
+import os
 
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 import elitism
+import evaluation
 import queens
 
 # problem constants:
@@ -19,9 +19,13 @@ NUM_OF_QUEENS = 16
 POPULATION_SIZE = 300
 MAX_GENERATIONS = 100
 HALL_OF_FAME_SIZE = 30
+FITNESS_CACHE_SIZE = 100000  # number of evaluated genomes remembered to skip repeated evaluations
 P_CROSSOVER = 0.9  # probability for crossover
 P_MUTATION = 0.1  # probability for mutating an individual
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # set the random seed for repeatable results
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
@@ -51,7 +55,14 @@ def fitness(individual):
     return nQueens.getViolationsCount(individual),  # return a tuple
 
 
+# the same for a whole list of individuals at once:
+def batchFitness(individuals):
+    return [(violations,) for violations in nQueens.getViolationsCounts(individuals).tolist()]
+
+
 toolbox.register('evaluate', fitness)
+# the whole population is evaluated at once by a single vectorized call, so no pool of worker processes is used
+toolbox.register('evaluateBatch', batchFitness)
 
 # Genetic operators
 toolbox.register('select', tools.selTournament, tournsize=2)
@@ -59,6 +70,32 @@ toolbox.register('mate', tools.cxUniformPartialyMatched, indpb=2.0 / len(nQueens
 toolbox.register('mutate', tools.mutShuffleIndexes, indpb=1.0 / len(nQueens))
 
 
+def plotResults(hof, logbook):
+    """
+    Plots the statistics and the best solution.
+    The plotting libraries are imported here, so that headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # plot statistics
+    minFitnessValues, meanFitnessValues = logbook.select('min', 'avg')
+    plt.figure(1)
+    sns.set_style('whitegrid')
+    plt.plot(minFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Min / Average Fitness')
+    plt.title('Min and Average fitness over Generations')
+
+    # plot best solution
+    sns.set_style('whitegrid', {'axes.grid': False})
+    nQueens.plotBoard(hof.items[0])
+
+    # show both plots
+    plt.show()
+
+
 def main():
     # create the initial population (generation 0)
     population = toolbox.populationCreator(n=POPULATION_SIZE)
@@ -71,31 +108,21 @@ def main():
     # define the hall-of-fame object
     hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
 
-    # perform the Genetic Algorithm fow with hof feature added.
+    # define the fitness cache object
+    cache = evaluation.FitnessCache(FITNESS_CACHE_SIZE)
+
+    # perform the Genetic Algorithm fow with hof feature added, stopping once a solution without violations is found.
     population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
-                                                      ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True)
+                                                      ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True,
+                                                      cache=cache, terminators=[elitism.TargetFitness(0)])
 
     # print hall of fame members info
     print('- Best solutions are: ')
     for i in range(HALL_OF_FAME_SIZE):
         print(i, ': ', hof.items[i].fitness.values[0], ' -> ', hof.items[i])
 
-    # plot statistics
-    minFitnessValues, meanFitnessValues = logbook.select('min', 'avg')
-    plt.figure(1)
-    sns.set_style('whitegrid')
-    plt.plot(minFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Min / Average Fitness')
-    plt.title('Min and Average fitness over Generations')
-
-    # plot best solution
-    sns.set_style('whitegrid', {'axes.grid': False})
-    nQueens.plotBoard(hof.items[0])
-
-    # show both plots
-    plt.show()
+    if not HEADLESS:
+        plotResults(hof, logbook)
 
 
 if __name__ == '__main__':
@@ -2,14 +2,14 @@ from deap import base
 from deap import creator
 from deap import tools
 
+import os
 import random
 import array
 
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 import elitism
+import evaluation
 import nurses
 
 # problem constants:
@@ -19,9 +19,13 @@ HARD_CONSTRAINT_PENALTY = 10
 POPULATION_SIZE = 300
 MAX_GENERATIONS = 200
 HALL_OF_FAME_SIZE = 30
+NUM_OF_WORKERS = 1  # number of processes used to evaluate the fitness (1 means serial evaluation)
 P_CROSSOVER = 0.9  # probability for crossover
 P_MUTATION = 0.1  # probability for mutating an individual
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # set the random seed for repeatable results
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
@@ -59,7 +63,33 @@ toolbox.register('mate', tools.cxTwoPoint)
 toolbox.register('mutate', tools.mutFlipBit, indpb=1.0 / len(nsp))
 
 
+def plotResults(logbook):
+    """
+    Plots the statistics.
+    The plotting libraries are imported here, so that headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # extract statistics:
+    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
+
+    # plot statistics:
+    sns.set_style("whitegrid")
+    plt.plot(minFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Min / Average Fitness')
+    plt.title('Min and Average fitness over Generations')
+    plt.show()
+
+
 def main():
+    # evaluate the fitness on a pool of worker processes
+    parallelMap = evaluation.ParallelMap(NUM_OF_WORKERS) if NUM_OF_WORKERS > 1 else None
+    if parallelMap:
+        toolbox.register('map', parallelMap)
+
     # create the initial population (generation 0)
     population = toolbox.populationCreator(n=POPULATION_SIZE)
 
@@ -72,8 +102,13 @@ def main():
     hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
 
     # perform the Genetic Algorithm fow with hof feature added.
-    population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
-                                                      ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True)
+    try:
+        population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
+                                                          ngen=MAX_GENERATIONS, stats=stats, halloffame=hof,
+                                                          verbose=True)
+    finally:
+        if parallelMap:
+            parallelMap.close()
 
     # print best solution found:
     best = hof.items[0]
@@ -83,17 +118,8 @@ def main():
     print("-- Schedule = ")
     nsp.printScheduleInfo(best)
 
-    # extract statistics:
-    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
-
-    # plot statistics:
-    sns.set_style("whitegrid")
-    plt.plot(minFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Min / Average Fitness')
-    plt.title('Min and Average fitness over Generations')
-    plt.show()
+    if not HEADLESS:
+        plotResults(logbook)
 
 
 if __name__ == '__main__':
@@ -2,15 +2,14 @@ from deap import base
 from deap import creator
 from deap import tools
 
+import os
 import random
 import array
 
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
-import networkx as nx
 
 import elitism
+import evaluation
 import graphs
 
 # problem constants:
@@ -20,16 +19,20 @@ HARD_CONSTRAINT_PENALTY = 10
 POPULATION_SIZE = 100
 MAX_GENERATIONS = 100
 HALL_OF_FAME_SIZE = 5
+NUM_OF_WORKERS = 1  # number of processes used to evaluate the fitness (1 means serial evaluation)
 P_CROSSOVER = 0.9  # probability for crossover
 P_MUTATION = 0.1  # probability for mutating an individual
 MAX_COLORS = 5
+MAX_STAGNATION = 30  # stop after this many generations without improvement of the best solution
+
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
 
 # set the random seed for repeatable results
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
 
-# create the desired N-Queens
-gcp = graphs.GraphColoringProblem(nx.mycielski_graph(5), HARD_CONSTRAINT_PENALTY)
+gcp = None  # created by createProblem(), not at import time
 
 toolbox = base.Toolbox()
 # define a single objective, minimizing fitness strategy:
@@ -41,50 +44,42 @@ creator.create("Individual", list, fitness=creator.FitnessMin)
 # create an operator that randomly returns 0 or 1
 toolbox.register('Integers', random.randint, 0, MAX_COLORS - 1)
 
-# create the individual creation operator to fill up an Individual instance with shuffled indices:
-toolbox.register("individualCreator", tools.initRepeat, creator.Individual, toolbox.Integers, len(gcp))
-
-# create the population creation operator to generate a list of individuals:
-toolbox.register("populationCreator", tools.initRepeat, list, toolbox.individualCreator)
-
 
 # fitness calculation - get the total number of violations of restrictions:
 def fitness(individual):
     return gcp.getCost(individual),  # return a tuple
 
 
-toolbox.register('evaluate', fitness)
+def createProblem():
+    """
+    Creates the graph coloring problem and registers the operators that depend on it.
+    """
+    import networkx as nx
 
-# Genetic operators
-toolbox.register('select', tools.selTournament, tournsize=2)
-toolbox.register('mate', tools.cxTwoPoint)
-toolbox.register('mutate', tools.mutUniformInt, low=0, up=MAX_COLORS - 1, indpb=1.0 / len(gcp))
+    global gcp
+    gcp = graphs.GraphColoringProblem(nx.mycielski_graph(5), HARD_CONSTRAINT_PENALTY)
 
+    # create the individual creation operator to fill up an Individual instance with shuffled indices:
+    toolbox.register("individualCreator", tools.initRepeat, creator.Individual, toolbox.Integers, len(gcp))
 
-def main():
-    # create the initial population (generation 0)
-    population = toolbox.populationCreator(n=POPULATION_SIZE)
+    # create the population creation operator to generate a list of individuals:
+    toolbox.register("populationCreator", tools.initRepeat, list, toolbox.individualCreator)
 
-    # prepare the statistics object
-    stats = tools.Statistics(lambda ind: ind.fitness.values)
-    stats.register('min', np.min)
-    stats.register('avg', np.mean)
+    toolbox.register('evaluate', fitness)
 
-    # define the hall-of-fame object
-    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+    # Genetic operators
+    toolbox.register('select', tools.selTournament, tournsize=2)
+    toolbox.register('mate', tools.cxTwoPoint)
+    toolbox.register('mutate', tools.mutUniformInt, low=0, up=MAX_COLORS - 1, indpb=1.0 / len(gcp))
 
-    # perform the Genetic Algorithm fow with hof feature added.
-    population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
-                                                      ngen=MAX_GENERATIONS, stats=stats, halloffame=hof, verbose=True)
 
-    # print info for best solution found:
-    best = hof.items[0]
-    print("-- Best Individual = ", best)
-    print("-- Best Fitness = ", best.fitness.values[0])
-    print()
-    print("number of colors = ", gcp.getNumberOfColors(best))
-    print("Number of violations = ", gcp.getViolationsCount(best))
-    print("Cost = ", gcp.getCost(best))
+def plotResults(best, logbook):
+    """
+    Plots the best solution and the statistics.
+    The plotting libraries are imported here, so that headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
 
     # plot best solution:
     plt.figure(1)
@@ -106,5 +101,47 @@ def main():
     plt.show()
 
 
+def main():
+    createProblem()
+
+    # evaluate the fitness on a pool of worker processes, each creating the problem once
+    parallelMap = evaluation.ParallelMap(NUM_OF_WORKERS, initializer=createProblem) if NUM_OF_WORKERS > 1 else None
+    if parallelMap:
+        toolbox.register('map', parallelMap)
+
+    # create the initial population (generation 0)
+    population = toolbox.populationCreator(n=POPULATION_SIZE)
+
+    # prepare the statistics object
+    stats = tools.Statistics(lambda ind: ind.fitness.values)
+    stats.register('min', np.min)
+    stats.register('avg', np.mean)
+
+    # define the hall-of-fame object
+    hof = tools.HallOfFame(HALL_OF_FAME_SIZE)
+
+    # perform the Genetic Algorithm fow with hof feature added.
+    try:
+        population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb=P_CROSSOVER, mutpb=P_MUTATION,
+                                                          ngen=MAX_GENERATIONS, stats=stats, halloffame=hof,
+                                                          verbose=True,
+                                                          terminators=[elitism.Stagnation(MAX_STAGNATION)])
+    finally:
+        if parallelMap:
+            parallelMap.close()
+
+    # print info for best solution found:
+    best = hof.items[0]
+    print("-- Best Individual = ", best)
+    print("-- Best Fitness = ", best.fitness.values[0])
+    print()
+    print("number of colors = ", gcp.getNumberOfColors(best))
+    print("Number of violations = ", gcp.getViolationsCount(best))
+    print("Cost = ", gcp.getCost(best))
+
+    if not HEADLESS:
+        plotResults(best, logbook)
+
+
 if __name__ == '__main__':
     main()
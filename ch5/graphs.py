@@ -1,5 +1,3 @@
-import networkx as nx
-import matplotlib.pyplot as plt
 import numpy as np
 
 
@@ -8,7 +6,7 @@ class GraphColoringProblem:
     This class encapsulates the Graph Coloring Problem
     """
 
-    def __init__(self, graph: nx.Graph, hardConstraintPenalty: int):
+    def __init__(self, graph: 'networkx.Graph', hardConstraintPenalty: int):
         """
         :param graph: a NetworkX graph to be colored.
         :param hardConstraintPenalty: penalty for coloring violation.
@@ -22,13 +20,16 @@ class GraphColoringProblem:
 
         # adjacency matrix of the nodes
         # matrix[i, j] = 1 if nodes are connected, 0 otherwise
-        self.adjMatrix = nx.adjacency_matrix(graph).todense()
+        nodeIndex = {node: i for i, node in enumerate(self.nodeList)}
+        self.adjMatrix = np.zeros((len(self.nodeList), len(self.nodeList)), dtype=int)
+        for node1, node2 in self.graph.edges:
+            self.adjMatrix[nodeIndex[node1], nodeIndex[node2]] = self.adjMatrix[nodeIndex[node2], nodeIndex[node1]] = 1
 
     def __len__(self) -> int:
         """
         :return: the number of nodes in the graph
         """
-        return nx.number_of_nodes(self.graph)
+        return self.graph.number_of_nodes()
 
     def getCost(self, colorArrangement) -> int:
         """
@@ -69,6 +70,9 @@ class GraphColoringProblem:
         Plots the graph with the nodes colored according to the given color arrangement.
         :param colorArrangement: a list of integers representing the color arrangement.
         """
+        import networkx as nx
+        import matplotlib.pyplot as plt
+
         self.checkColorArrangement(colorArrangement)
 
         # create a list of the unique colors in the arrangement
@@ -93,6 +97,8 @@ class GraphColoringProblem:
 
 
 def main():
+    import networkx as nx
+
     # create a problem instance with petersen graph
     gcp = GraphColoringProblem(nx.petersen_graph(), 10)
 
@@ -0,0 +1,136 @@
+import copy
+import pickle
+import random
+import time
+import traceback
+
+import numpy as np
+
+import elitism
+import evaluation
+
+
+def eaIslandsWithElitism(populations, toolbox, cxpb, mutpb, ngen, migrationInterval, migrants, halloffame,
+                         topology='ring', stats=None, verbose=__debug__, seed=None):
+    """Island model built on eaSimpleWithElitism(): each population evolves in its own process with its own
+    hall of fame, and every migrationInterval generations each island sends copies of its best individuals
+    to its neighbours, where they replace the worst individuals. The islands only communicate at migration
+    time, so there is no per-evaluation inter-process overhead.
+    :param populations: a list of populations, one per island.
+    :param migrationInterval: number of generations between migrations.
+    :param migrants: number of hall of fame individuals sent to each neighbour.
+    :param halloffame: the hall of fame merging the best individuals of all the islands; each island uses an
+    empty copy of it for its own elitism.
+    :param topology: 'ring' sends the migrants to the next island only, 'full' sends them to every other island.
+    :param seed: the islands random generators are seeded with seed, seed + 1, ...
+    :return: the final populations and the logbooks of all the islands.
+    """
+    if topology not in ('ring', 'full'):
+        raise ValueError('topology should be either ring or full, got ', topology)
+
+    numOfIslands = len(populations)
+    if seed is None:
+        seed = random.randrange(2 ** 32 - numOfIslands)
+
+    context = evaluation.getContext()
+    inboxes = [context.Queue() for _ in range(numOfIslands)]
+    results = context.Queue()
+
+    processes = []
+    for index, population in enumerate(populations):
+        if topology == 'ring':
+            neighbours = [(index + 1) % numOfIslands] if numOfIslands > 1 else []
+        else:
+            neighbours = [i for i in range(numOfIslands) if i != index]
+        outboxes = [inboxes[i] for i in neighbours]
+        numOfSources = len(neighbours)
+
+        process = context.Process(target=_runIsland,
+                                  args=(index, population, toolbox, cxpb, mutpb, ngen, stats,
+                                        copy.deepcopy(halloffame), verbose, seed + index, migrationInterval,
+                                        migrants, inboxes[index], outboxes, numOfSources, results))
+        process.start()
+        processes.append(process)
+
+    # collect the results before joining, so that no process is blocked on a full queue
+    populations = [None] * numOfIslands
+    logbooks = [None] * numOfIslands
+    try:
+        for _ in range(numOfIslands):
+            index, result = results.get()
+            if isinstance(result, BaseException):
+                # the neighbours of a failed island would wait for its migrants forever
+                raise result
+            population, items, logbook = result
+            populations[index] = population
+            logbooks[index] = logbook
+            halloffame.update(items)
+    except BaseException:
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for process in processes:
+            process.join()
+
+    return populations, logbooks
+
+
+def _runIsland(index, population, toolbox, cxpb, mutpb, ngen, stats, halloffame, verbose, seed,
+               migrationInterval, migrants, inbox, outboxes, numOfSources, results):
+    """
+    Evolves a single island in epochs of migrationInterval generations, exchanging migrants between epochs.
+    The island sends its index and either its final population, hall of fame items and logbook, or the exception
+    that stopped it, to the results queue.
+    """
+    try:
+        result = _evolveIsland(index, population, toolbox, cxpb, mutpb, ngen, stats, halloffame, verbose, seed,
+                               migrationInterval, migrants, inbox, outboxes, numOfSources)
+    except Exception as error:
+        try:
+            pickle.dumps(error)
+            result = error
+        except Exception:
+            # an exception the queue cannot send would leave the parent waiting for this island forever
+            result = RuntimeError('island failed ', index, traceback.format_exc())
+    results.put((index, result))
+
+
+def _evolveIsland(index, population, toolbox, cxpb, mutpb, ngen, stats, halloffame, verbose, seed,
+                  migrationInterval, migrants, inbox, outboxes, numOfSources):
+    random.seed(seed)
+    np.random.seed(seed)
+
+    logbook = None
+    gen = 0
+    while gen < ngen:
+        epoch = min(migrationInterval, ngen - gen)
+        if logbook is None:
+            population, logbook = elitism.eaSimpleWithElitism(population, toolbox, cxpb, mutpb, epoch, stats,
+                                                              halloffame, verbose=False)
+        else:
+            # continue the generations of the island, so that its logbook and statistics sampling run across epochs
+            population, logbook = elitism._evolve(population, toolbox, cxpb, mutpb, gen + 1, gen + epoch, stats,
+                                                  halloffame, len(halloffame.items), logbook, verbose=False,
+                                                  stream=None, cache=None, terminators=None, checkpoint=None,
+                                                  evaluations=0, start=time.perf_counter(), improveBest=None)
+        gen += epoch
+
+        if verbose:
+            for line in logbook.stream.splitlines():
+                print(f'[island {index}] {line}')
+
+        if gen < ngen and numOfSources:
+            emigrants = [toolbox.clone(ind) for ind in halloffame.items[:migrants]]
+            for outbox in outboxes:
+                outbox.put(emigrants)
+
+            # the immigrants replace the worst individuals of the island
+            immigrants = [ind for _ in range(numOfSources) for ind in inbox.get()]
+            worst = sorted(range(len(population)), key=lambda i: population[i].fitness)[:len(immigrants)]
+            for i, immigrant in zip(worst, immigrants):
+                population[i] = immigrant
+            halloffame.update(immigrants)
+
+    return population, halloffame.items, logbook
+
@@ -0,0 +1,243 @@
+import random
+
+import numpy as np
+
+from elitism import sortByFitness
+
+
+def selTournament(wvalues, k: int, rng, tournsize: int):
+    """
+    Batched tournament selection: runs k tournaments at once, each between tournsize randomly chosen rows.
+    :param wvalues: a 2-D array of weighted fitness values, one row per individual.
+    :param k: the number of rows to select.
+    :param rng: a NumPy random Generator.
+    :param tournsize: the number of rows participating in each tournament.
+    :return: an array with the indices of the selected rows.
+    """
+    # rank every row once so that each tournament is a simple argmin over ranks
+    ranks = np.empty(len(wvalues), dtype=np.intp)
+    ranks[sortByFitness(wvalues)] = np.arange(len(wvalues))
+
+    aspirants = rng.integers(0, len(wvalues), size=(k, tournsize))
+    winners = np.argmin(ranks[aspirants], axis=1)
+    return aspirants[np.arange(k), winners]
+
+
+def cxTwoPoint(rows1, rows2, rng):
+    """
+    Batched two-point crossover: the genes between two random cut points are exchanged between each pair of rows.
+    :param rows1: a 2-D array with the first parent of each pair.
+    :param rows2: a 2-D array with the second parent of each pair.
+    :param rng: a NumPy random Generator.
+    :return: the two arrays of children.
+    """
+    size = rows1.shape[1]
+    cxpoint1 = rng.integers(1, size, size=(len(rows1), 1))
+    cxpoint2 = rng.integers(1, size - 1, size=(len(rows1), 1))
+    cxpoint2 = np.where(cxpoint2 >= cxpoint1, cxpoint2 + 1, cxpoint2)
+    cxpoint1, cxpoint2 = np.minimum(cxpoint1, cxpoint2), np.maximum(cxpoint1, cxpoint2)
+
+    columns = np.arange(size)
+    swap = (columns >= cxpoint1) & (columns < cxpoint2)
+    return np.where(swap, rows2, rows1), np.where(swap, rows1, rows2)
+
+
+def mutFlipBit(rows, rng, indpb: float):
+    """
+    Batched bit-flip mutation for rows of 0/1 values.
+    :param rows: a 2-D array with one genome per row.
+    :param rng: a NumPy random Generator.
+    :param indpb: the independent probability of each gene to be flipped.
+    :return: the mutated rows.
+    """
+    flip = rng.random(rows.shape) < indpb
+    return np.where(flip, 1 - rows, rows)
+
+
+def mutUniformInt(rows, rng, low: int, up: int, indpb: float):
+    """
+    Batched uniform integer mutation: each gene is replaced by a random integer in [low, up] with probability indpb.
+    :param rows: a 2-D array with one genome per row.
+    :param rng: a NumPy random Generator.
+    :param low: the lowest value allowed.
+    :param up: the highest value allowed.
+    :param indpb: the independent probability of each gene to be replaced.
+    :return: the mutated rows.
+    """
+    replace = rng.random(rows.shape) < indpb
+    return np.where(replace, rng.integers(low, up + 1, size=rows.shape), rows)
+
+
+def mutGaussian(rows, rng, mu: float, sigma: float, indpb: float):
+    """
+    Batched gaussian mutation for real-valued rows.
+    :param rows: a 2-D array with one genome per row.
+    :param rng: a NumPy random Generator.
+    :param mu: the mean of the gaussian noise.
+    :param sigma: the standard deviation of the gaussian noise.
+    :param indpb: the independent probability of each gene to be mutated.
+    :return: the mutated rows.
+    """
+    mutate = rng.random(rows.shape) < indpb
+    return np.where(mutate, rows + rng.normal(mu, sigma, size=rows.shape), rows)
+
+
+def _getCutPoints(rows, rng):
+    """
+    :return: two column arrays with the first and the last position of a random segment in each row.
+    """
+    points = np.sort(rng.integers(0, rows.shape[1], size=(len(rows), 2)), axis=1)
+    return points[:, :1], points[:, 1:]
+
+
+def cxOrdered(rows1, rows2, rng):
+    """
+    Batched ordered crossover (OX) for rows holding permutations: each child keeps a random segment of one parent in
+    place, and gets the missing values in the order they appear in the other parent, starting after the segment.
+    :param rows1: a 2-D array with the first parent of each pair.
+    :param rows2: a 2-D array with the second parent of each pair.
+    :param rng: a NumPy random Generator.
+    :return: the two arrays of children.
+    """
+    start, end = _getCutPoints(rows1, rng)
+    return _fillOrdered(rows1, rows2, start, end), _fillOrdered(rows2, rows1, start, end)
+
+
+def _fillOrdered(keep, fill, start, end):
+    """
+    :return: the rows of keep with the genes outside the segments [start, end] replaced by the other genes of fill,
+    in the order they appear in fill starting after the segment.
+    """
+    count, size = keep.shape
+    rowIndices = np.arange(count)[:, np.newaxis]
+    columns = np.arange(size)
+
+    # mark the values of the kept segment of every row
+    inSegment = np.zeros(keep.shape, dtype=bool)
+    inSegment[rowIndices, keep] = (columns >= start) & (columns <= end)
+
+    # walk both the positions and the values of fill from the end of the segment, wrapping around
+    positions = (end + 1 + columns) % size
+    values = np.take_along_axis(fill, positions, axis=1)
+    missing = ~np.take_along_axis(inSegment, values, axis=1)
+    values = np.take_along_axis(values, np.argsort(~missing, axis=1, kind='stable'), axis=1)
+
+    children = keep.copy()
+    filled = columns < size - (end - start + 1)
+    children[np.broadcast_to(rowIndices, keep.shape)[filled], positions[filled]] = values[filled]
+    return children
+
+
+def cxPartialyMatched(rows1, rows2, rng):
+    """
+    Batched partially matched crossover (PMX) for rows holding permutations: each child gets a random segment of one
+    parent and the other genes of the other parent, where the values of the segment are mapped back until they no
+    longer conflict with it.
+    :param rows1: a 2-D array with the first parent of each pair.
+    :param rows2: a 2-D array with the second parent of each pair.
+    :param rng: a NumPy random Generator.
+    :return: the two arrays of children.
+    """
+    start, end = _getCutPoints(rows1, rng)
+    return _matchPartially(rows1, rows2, start, end), _matchPartially(rows2, rows1, start, end)
+
+
+def _matchPartially(segmentRows, otherRows, start, end):
+    """
+    :return: the rows of otherRows with the segments [start, end] of segmentRows, see cxPartialyMatched().
+    """
+    count, size = segmentRows.shape
+    rowIndices = np.arange(count)[:, np.newaxis]
+    columns = np.arange(size)
+    segment = (columns >= start) & (columns <= end)
+
+    # each value of the segment maps to the value at the same position in the other parent
+    mapping = np.broadcast_to(columns, segmentRows.shape).copy()
+    mapping[rowIndices, segmentRows] = np.where(segment, otherRows, segmentRows)
+    inSegment = np.zeros(segmentRows.shape, dtype=bool)
+    inSegment[rowIndices, segmentRows] = segment
+
+    children = np.where(segment, segmentRows, otherRows)
+
+    # follow the mapping chains of the conflicting genes only, until each one leaves the segment values
+    rows, positions = np.nonzero(~segment & np.take_along_axis(inSegment, children, axis=1))
+    values = children[rows, positions]
+    while len(rows):
+        values = mapping[rows, values]
+        done = ~inSegment[rows, values]
+        children[rows[done], positions[done]] = values[done]
+        rows, positions, values = rows[~done], positions[~done], values[~done]
+    return children
+
+
+def mutInversion(rows, rng):
+    """
+    Batched inversion mutation for rows holding permutations: a random segment of each row is reversed.
+    :param rows: a 2-D array with one genome per row.
+    :param rng: a NumPy random Generator.
+    :return: the mutated rows.
+    """
+    start, end = _getCutPoints(rows, rng)
+    columns = np.arange(rows.shape[1])
+    sources = np.where((columns >= start) & (columns <= end), start + end - columns, columns)
+    return np.take_along_axis(rows, sources, axis=1)
+
+
+def mutScramble(rows, rng):
+    """
+    Batched scramble mutation for rows holding permutations: the values of a random segment of each row are shuffled.
+    :param rows: a 2-D array with one genome per row.
+    :param rng: a NumPy random Generator.
+    :return: the mutated rows.
+    """
+    start, end = _getCutPoints(rows, rng)
+    columns = np.arange(rows.shape[1])
+
+    # the genes outside the segment sort at their own position, those inside at random places within the segment
+    keys = np.where((columns >= start) & (columns <= end), start + rng.random(rows.shape) * (end - start + 1), columns)
+    return np.take_along_axis(rows, np.argsort(keys, axis=1), axis=1)
+
+
+def mutSwap(rows, rng, indpb: float):
+    """
+    Batched counterpart of DEAP mutShuffleIndexes(): each gene is swapped with a random other gene of its row with
+    probability indpb. The swaps of a row are applied in order, as many rows at once as possible.
+    :param rows: a 2-D array with one genome per row.
+    :param rng: a NumPy random Generator.
+    :param indpb: the independent probability of each gene to be swapped.
+    :return: the mutated rows.
+    """
+    count, size = rows.shape
+    selectedRows, positions = np.nonzero(rng.random(rows.shape) < indpb)
+    others = rng.integers(0, size - 1, size=len(positions))
+    others += others >= positions
+
+    # the k-th swap of every row is applied in round k
+    rounds = np.arange(len(selectedRows)) - np.searchsorted(selectedRows, selectedRows)
+    rows = rows.copy()
+    for k in range(rounds.max() + 1 if len(rounds) else 0):
+        current = rounds == k
+        i, j, r = positions[current], others[current], selectedRows[current]
+        rows[r, i], rows[r, j] = rows[r, j], rows[r, i]
+    return rows
+
+
+def mutShuffleIndexesWithPositions(individual, indpb: float):
+    """
+    Same as DEAP mutShuffleIndexes(), consuming the random generator in the same order, but returns the positions it
+    swapped instead of the individual, for the mutatePositions operator of eaSimpleWithElitism(), so that
+    toolbox.evaluateDelta is given the changed positions without comparing the whole genomes.
+    :param individual: the individual to mutate in place.
+    :param indpb: the independent probability of each gene to be swapped.
+    :return: the list of the positions that were swapped.
+    """
+    size = len(individual)
+    positions = []
+    for i in range(size):
+        if random.random() < indpb:
+            other = random.randint(0, size - 2)
+            if other >= i:
+                other += 1
+            individual[i], individual[other] = individual[other], individual[i]
+            positions += (i, other)
+    return positions
@@ -1,6 +1,4 @@
 import numpy as np
-import matplotlib.pyplot as plt
-import matplotlib as mpl
 
 
 class NQueensProblem:
@@ -23,18 +21,37 @@ class NQueensProblem:
         """
         self.__checkPositionsLength(positions)
 
+        # count the queens on each of the 2N-1 diagonals and anti-diagonals, where each queen is in violation with
+        # all the queens already found on its two diagonals
+        mainDiagonals = [0] * (2 * self.numOfQueens - 1)
+        antiDiagonals = [0] * (2 * self.numOfQueens - 1)
         violations = 0
-        for i in range(len(positions)):
-            for j in range(i + 1, len(positions)):
-                column1 = i
-                row1 = positions[i]
+        for column, row in enumerate(positions):
+            mainDiagonal, antiDiagonal = column - row + self.numOfQueens - 1, column + row
+            violations += mainDiagonals[mainDiagonal] + antiDiagonals[antiDiagonal]
+            mainDiagonals[mainDiagonal] += 1
+            antiDiagonals[antiDiagonal] += 1
+        return violations
 
-                column2 = j
-                row2 = positions[j]
+    def getViolationsCounts(self, population):
+        """
+        Batched counterpart of getViolationsCount(), counting the queens on the diagonals of all the solutions with
+        two bincount calls.
+        :param population: a 2-D integer array, or a list of solutions, one solution per row.
+        :return: an array with the number of violations of each solution.
+        """
+        population = np.asarray(population, dtype=np.intp)
+        count, size = population.shape
+        if size != self.numOfQueens:
+            raise ValueError('size of positions list should be equal to ', self.numOfQueens)
 
-                # queens are in a diagonal if the vertical and horizontal distances are equal
-                if abs(column1 - column2) == abs(row1 - row2):
-                    violations += 1
+        # the diagonals of each solution get their own range of 2N-1 counters
+        columns = np.arange(size)
+        offsets = np.arange(count)[:, np.newaxis] * (2 * size - 1)
+        violations = np.zeros(count, dtype=np.int64)
+        for diagonals in (columns - population + size - 1, columns + population):
+            queens = np.bincount((diagonals + offsets).ravel(), minlength=count * (2 * size - 1))
+            violations += (queens * (queens - 1) // 2).reshape(count, -1).sum(axis=1)
         return violations
 
     def plotBoard(self, positions):
@@ -42,6 +59,9 @@ class NQueensProblem:
         Plots the positions of the queens on the board according to the given solution.
         :param positions: a list of indices corresponding to the positions of the queens in each row.
         """
+        import matplotlib.pyplot as plt
+        import matplotlib as mpl
+
         self.__checkPositionsLength(positions)
 
         fix, ax = plt.subplots()
@@ -0,0 +1,26 @@
+import unittest
+import numpy as np
+from queens import NQueensProblem
+
+
+class QueensTestSuite(unittest.TestCase):
+    def getPairViolations(self, positions):
+        return sum(1 for i in range(len(positions)) for j in range(i + 1, len(positions))
+                   if j - i == abs(positions[i] - positions[j]))
+
+    def test_violations(self):
+        nQueens = NQueensProblem(8)
+        self.assertEqual(3, nQueens.getViolationsCount([1, 2, 7, 5, 0, 3, 4, 6]))
+        self.assertEqual(0, nQueens.getViolationsCount([0, 4, 7, 5, 2, 6, 1, 3]))
+        self.assertEqual(28, nQueens.getViolationsCount(list(range(8))))
+        with self.assertRaises(ValueError):
+            nQueens.getViolationsCount([0, 1])
+
+    def test_batch_violations(self):
+        rng = np.random.default_rng(42)
+        nQueens = NQueensProblem(30)
+        population = np.array([rng.permutation(30) for _ in range(50)] + [rng.integers(0, 30, size=30)])
+
+        expected = [self.getPairViolations(positions.tolist()) for positions in population]
+        self.assertEqual(expected, [nQueens.getViolationsCount(positions) for positions in population])
+        self.assertEqual(expected, nQueens.getViolationsCounts(population).tolist())
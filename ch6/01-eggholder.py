@@ -2,12 +2,10 @@ from deap import base
 from deap import creator
 from deap import tools
 
+import os
 import random
 import numpy as np
 
-import matplotlib.pyplot as plt
-import seaborn as sns
-
 import elitism
 
 # problem constants
@@ -23,6 +21,9 @@ HALL_OF_FAME_SIZE = 30
 # crowding factor for crossover and mutation
 CROWDING_FACTOR = 20.0
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # set the random seed
 RANDOM_SEED = 42
 random.seed(RANDOM_SEED)
@@ -69,6 +70,28 @@ toolbox.register('mutate', tools.mutPolynomialBounded, low=BOUND_LOW, up=BOUND_H
                  indpb=1.0 / DIMENSIONS)
 
 
+def plotResults(logbook):
+    """
+    Plots the statistics.
+    The plotting libraries are imported here, so that headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # extract statistics:
+    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
+
+    # plot statistics:
+    sns.set_style("whitegrid")
+    plt.plot(minFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Min / Average Fitness')
+    plt.title('Min and Average fitness over Generations')
+
+    plt.show()
+
+
 # Genetic Algorithm Flow
 def main():
     # create initial population
@@ -91,18 +114,8 @@ def main():
     print("-- Best Individual = ", best)
     print("-- Best Fitness = ", best.fitness.values[0])
 
-    # extract statistics:
-    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
-
-    # plot statistics:
-    sns.set_style("whitegrid")
-    plt.plot(minFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Min / Average Fitness')
-    plt.title('Min and Average fitness over Generations')
-
-    plt.show()
+    if not HEADLESS:
+        plotResults(logbook)
 
 
 if __name__ == "__main__":
@@ -2,10 +2,9 @@ from deap import base
 from deap import creator
 from deap import tools
 
+import os
 import random
 import numpy as np
-import matplotlib.pyplot as plt
-import seaborn as sns
 
 import elitism
 
@@ -21,6 +20,9 @@ MAX_GENERATIONS = 300
 HALL_OF_FAME_SIZE = 30
 CROWDING_FACTOR = 20.0
 
+# skip the plots, e.g. for batch jobs on servers without a display
+HEADLESS = bool(os.environ.get('HEADLESS'))
+
 # set the random seed
 RANDOM_SEED = 17
 random.seed(RANDOM_SEED)
@@ -66,6 +68,35 @@ toolbox.register('mutate', tools.mutPolynomialBounded, low=BOUND_LOW, up=BOUND_H
                  indpb=1.0 / DIMENSIONS)
 
 
+def plotResults(population, logbook):
+    """
+    Plots the solution locations and the statistics.
+    The plotting libraries are imported here, so that headless runs and worker processes never load them.
+    """
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    # plot solution locations on x-y plane:
+    plt.figure(1)
+    globalMinima = [[3.0, 2.0], [-2.805118, 3.131312], [-3.779310, -3.283186], [3.584458, -1.848126]]
+    plt.scatter(*zip(*globalMinima), marker='X', color='red', zorder=1)
+    plt.scatter(*zip(*population), marker='.', color='blue', zorder=0)
+
+    # extract statistics:
+    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
+
+    # plot statistics:
+    plt.figure(2)
+    sns.set_style("whitegrid")
+    plt.plot(minFitnessValues, color='red')
+    plt.plot(meanFitnessValues, color='green')
+    plt.xlabel('Generation')
+    plt.ylabel('Min / Average Fitness')
+    plt.title('Min and Average fitness over Generations')
+
+    plt.show()
+
+
 # Genetic Algorithm flow:
 def main():
     # create initial population (generation 0):
@@ -92,25 +123,8 @@ def main():
     for i in range(HALL_OF_FAME_SIZE):
         print(i, ": ", hof.items[i].fitness.values[0], " -> ", hof.items[i])
 
-    # plot solution locations on x-y plane:
-    plt.figure(1)
-    globalMinima = [[3.0, 2.0], [-2.805118, 3.131312], [-3.779310, -3.283186], [3.584458, -1.848126]]
-    plt.scatter(*zip(*globalMinima), marker='X', color='red', zorder=1)
-    plt.scatter(*zip(*population), marker='.', color='blue', zorder=0)
-
-    # extract statistics:
-    minFitnessValues, meanFitnessValues = logbook.select("min", "avg")
-
-    # plot statistics:
-    plt.figure(2)
-    sns.set_style("whitegrid")
-    plt.plot(minFitnessValues, color='red')
-    plt.plot(meanFitnessValues, color='green')
-    plt.xlabel('Generation')
-    plt.ylabel('Min / Average Fitness')
-    plt.title('Min and Average fitness over Generations')
-
-    plt.show()
+    if not HEADLESS:
+        plotResults(population, logbook)
 
 
 if __name__ == "__main__":
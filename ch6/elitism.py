@@ -1,21 +1,55 @@
+import os
+import pickle
+import random
+import time
+
+import numpy as np
 from deap import tools
 from deap import algorithms
 
+import evaluation
+
+# number of consecutive incremental evaluations after which an offspring is evaluated from scratch, which bounds the
+# rounding errors accumulated by evaluateDelta
+MAX_DELTA_DEPTH = 10
+
+
 def eaSimpleWithElitism(population, toolbox, cxpb, mutpb, ngen, stats=None,
-             halloffame=None, verbose=__debug__):
+             halloffame=None, verbose=__debug__, cache=None, terminators=None, checkpoint=None,
+             stream=None, improveBest=None):
     """This algorithm is similar to DEAP eaSimple() algorithm, with the modification that
     halloffame is used to implement an elitism mechanism. The individuals contained in the
     halloffame are directly injected into the next generation and are not subject to the
     genetic operators of selection, crossover and mutation.
+    When the toolbox provides an evaluateBatch(individuals) operator, it evaluates all the individuals of a
+    generation in a single call and returns their fitness values, instead of toolbox.evaluate being
+    mapped over them one by one.
+    When a cache is given (see evaluation.FitnessCache), genomes that were already evaluated
+    take their fitness from the cache, and the cache hits and misses are added to the logbook.
+    When the toolbox provides an evaluateDelta(parent, child, parentFitness, positions) operator,
+    the offspring produced by mutation alone are evaluated incrementally from their parent,
+    given the positions where the child differs from it. These positions are found by comparing
+    the genomes, or are the ones returned by toolbox.mutatePositions(individual) when the toolbox
+    provides this variant of toolbox.mutate (e.g. operators.mutShuffleIndexesWithPositions).
+    An offspring is evaluated from scratch after MAX_DELTA_DEPTH incremental evaluations in a row.
+    When the toolbox provides an improve(individual) operator, e.g. a local search like
+    localsearch.improveTour, it is applied to the evaluated offspring of every generation, or only
+    to the improveBest best of them, and returns the improved individual with its updated fitness.
+    It goes through toolbox.map like the evaluations, so it also runs on the worker processes.
+    The run stops before ngen generations as soon as one of the given terminators (e.g. TargetFitness,
+    Stagnation, MaxEvaluations, Deadline) is met; the best individuals found so far are in halloffame.
+    When a Checkpoint is given, the state of the run is saved periodically, and the run can be
+    continued later with resumeWithElitism().
+    When verbose, the logbook lines go to the given stream (e.g. reporting.LogbookWriter) instead of stdout.
     """
+    start = time.perf_counter()
     logbook = tools.Logbook()
-    logbook.header = ['gen', 'nevals'] + (stats.fields if stats else [])
+    logbook.header = ['gen', 'nevals'] + (['hits', 'misses'] if cache is not None else []) + \
+                     (stats.fields if stats else [])
 
     # Evaluate the individuals with an invalid fitness
     invalid_ind = [ind for ind in population if not ind.fitness.valid]
-    fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
-    for ind, fit in zip(invalid_ind, fitnesses):
-        ind.fitness.values = fit
+    counters = _evaluate(invalid_ind, toolbox, cache)
 
     if halloffame is None:
         raise ValueError("halloffame parameter must not be empty!")
@@ -23,25 +57,64 @@ def eaSimpleWithElitism(population, toolbox, cxpb, mutpb, ngen, stats=None,
     halloffame.update(population)
     hof_size = len(halloffame.items) if halloffame.items else 0
 
-    record = stats.compile(population) if stats else {}
-    logbook.record(gen=0, nevals=len(invalid_ind), **record)
-    if verbose:
-        print(logbook.stream)
+    record = _compile(stats, population, 0)
+    logbook.record(gen=0, **counters, **record)
+    _report(logbook, verbose, stream)
 
-    # Begin the generational process
-    for gen in range(1, ngen + 1):
+    evaluations = counters['nevals']
+    if _isTerminated(terminators, 0, evaluations, time.perf_counter() - start, halloffame):
+        return population, logbook
+
+    return _evolve(population, toolbox, cxpb, mutpb, 1, ngen, stats, halloffame, hof_size, logbook, verbose,
+                   stream, cache, terminators, checkpoint, evaluations, start, improveBest)
+
+
+def resumeWithElitism(path, toolbox, cxpb, mutpb, ngen, stats=None, verbose=__debug__, checkpoint=None,
+                      stream=None, improveBest=None):
+    """Continues a run of eaSimpleWithElitism() from the state saved by a Checkpoint, up to generation ngen.
+    The random generators, the fitness cache and the terminators are restored as saved, so the
+    continued run is identical to an uninterrupted one. When a Checkpoint with a config is given,
+    the saved state must have been written with the same config.
+    :return: the final population, the logbook of the whole run and the hall of fame.
+    """
+    state = Checkpoint.load(path, checkpoint.config if checkpoint is not None else None)
+    random.setstate(state['randomState'])
+    np.random.set_state(state['numpyState'])
+
+    population, halloffame = state['population'], state['halloffame']
+    start = time.perf_counter() - state['elapsed']
+    population, logbook = _evolve(population, toolbox, cxpb, mutpb, state['gen'] + 1, ngen, stats, halloffame,
+                                  state['hofSize'], state['logbook'], verbose, stream, state['cache'],
+                                  state['terminators'], checkpoint, state['evaluations'], start, improveBest)
+    return population, logbook, halloffame
+
+
+def _evolve(population, toolbox, cxpb, mutpb, firstGen, ngen, stats, halloffame, hof_size, logbook, verbose,
+            stream, cache, terminators, checkpoint, evaluations, start, improveBest):
+    """
+    The generational process of eaSimpleWithElitism(), from generation firstGen to ngen.
+    """
+    for gen in range(firstGen, ngen + 1):
 
         # Select the next generation individuals
         offspring = toolbox.select(population, len(population) - hof_size)
 
-        # Vary the pool of individuals
-        offspring = algorithms.varAnd(offspring, toolbox, cxpb, mutpb)
+        # Vary the pool of individuals, evaluating the mutated-only offspring from their parents when possible
+        if hasattr(toolbox, 'evaluateDelta'):
+            offspring, parents, positions = _varAndWithParents(offspring, toolbox, cxpb, mutpb)
+            ndeltas = _evaluateDelta(offspring, parents, positions, toolbox)
+        else:
+            offspring = algorithms.varAnd(offspring, toolbox, cxpb, mutpb)
+            ndeltas = 0
 
         # Evaluate the individuals with an invalid fitness
         invalid_ind = [ind for ind in offspring if not ind.fitness.valid]
-        fitnesses = toolbox.map(toolbox.evaluate, invalid_ind)
-        for ind, fit in zip(invalid_ind, fitnesses):
-            ind.fitness.values = fit
+        counters = _evaluate(invalid_ind, toolbox, cache)
+        counters['nevals'] += ndeltas
+
+        # Improve the offspring, e.g. with a local search
+        if hasattr(toolbox, 'improve'):
+            _improve(offspring, toolbox, improveBest)
 
         # add the best back to population:
         offspring.extend(halloffame.items)
@@ -53,9 +126,416 @@ def eaSimpleWithElitism(population, toolbox, cxpb, mutpb, ngen, stats=None,
         population[:] = offspring
 
         # Append the current generation statistics to the logbook
-        record = stats.compile(population) if stats else {}
-        logbook.record(gen=gen, nevals=len(invalid_ind), **record)
-        if verbose:
+        record = _compile(stats, population, gen)
+        logbook.record(gen=gen, **counters, **record)
+        _report(logbook, verbose, stream)
+
+        evaluations += counters['nevals']
+        elapsed = time.perf_counter() - start
+        if _isTerminated(terminators, gen, evaluations, elapsed, halloffame):
+            break
+
+        if checkpoint is not None and checkpoint.isDue(gen):
+            checkpoint.save(population=population, halloffame=halloffame, hofSize=hof_size, logbook=logbook,
+                            gen=gen, evaluations=evaluations, elapsed=elapsed, cache=cache, terminators=terminators)
+
+    return population, logbook
+
+
+def _report(logbook, verbose, stream):
+    """
+    Outputs the last logbook lines to the stream, or to stdout when no stream is given.
+    """
+    if verbose:
+        if stream is not None:
+            stream.write(logbook.stream)
+        else:
             print(logbook.stream)
 
+
+def _compile(stats, population, gen):
+    """
+    :return: the statistics record of the given generation, which is empty when there are no statistics or when the
+    generation is skipped by their sampling interval (see reporting.FitnessStatistics).
+    """
+    if not stats or gen % getattr(stats, 'interval', 1):
+        return {}
+    return stats.compile(population)
+
+
+def _evaluate(individuals, toolbox, cache):
+    """
+    Evaluates the given individuals, through the fitness cache when one is given.
+    :return: the logbook counters of the evaluation.
+    """
+    if cache is None:
+        fitnesses = evaluation.getFitnesses(individuals, toolbox)
+        for ind, fit in zip(individuals, fitnesses):
+            ind.fitness.values = fit
+        return {'nevals': len(individuals)}
+
+    hits, misses = cache.evaluate(individuals, toolbox)
+    return {'nevals': misses, 'hits': hits, 'misses': misses}
+
+
+def _improve(offspring, toolbox, improveBest):
+    """
+    Replaces the offspring, or only the improveBest best of them, with their versions improved by toolbox.improve.
+    """
+    indices = range(len(offspring))
+    if improveBest is not None:
+        indices = sorted(indices, key=lambda i: offspring[i].fitness, reverse=True)[:improveBest]
+
+    improved = toolbox.map(toolbox.improve, [offspring[i] for i in indices])
+    for i, individual in zip(indices, improved):
+        offspring[i] = individual
+
+
+def _varAndWithParents(population, toolbox, cxpb, mutpb):
+    """
+    Same as DEAP varAnd(), consuming the random generator in the same order, but also keeps track of the parent of
+    every offspring that was produced by mutation alone, and of the positions it changed when the toolbox provides
+    mutatePositions.
+    :return: the offspring, a matching list with the parent of each mutated-only offspring (None for the others),
+    and a matching list with the positions changed by each mutation (None when they are not known).
+    """
+    offspring = [toolbox.clone(ind) for ind in population]
+    parents = list(population)
+    positions = [None] * len(offspring)
+    mutatePositions = getattr(toolbox, 'mutatePositions', None)
+
+    for i in range(1, len(offspring), 2):
+        if random.random() < cxpb:
+            offspring[i - 1], offspring[i] = toolbox.mate(offspring[i - 1], offspring[i])
+            del offspring[i - 1].fitness.values, offspring[i].fitness.values
+            parents[i - 1] = parents[i] = None
+
+    for i in range(len(offspring)):
+        if random.random() < mutpb:
+            if mutatePositions is not None:
+                positions[i] = mutatePositions(offspring[i])
+            else:
+                offspring[i], = toolbox.mutate(offspring[i])
+            del offspring[i].fitness.values
+        else:
+            parents[i] = None
+
+    return offspring, parents, positions
+
+
+def _evaluateDelta(offspring, parents, positions, toolbox):
+    """
+    Evaluates the mutated-only offspring incrementally with toolbox.evaluateDelta, and counts on each offspring the
+    incremental evaluations its fitness went through since the last evaluation from scratch. The offspring that reach
+    MAX_DELTA_DEPTH are left invalid, to be evaluated from scratch with the others.
+    :return: the number of incremental evaluations.
+    """
+    evaluations = 0
+    for child, parent, changed in zip(offspring, parents, positions):
+        if parent is None:
+            if not child.fitness.valid:
+                child.deltaDepth = 0
+            continue
+
+        if changed is None:
+            changed = np.flatnonzero(np.asarray(child) != np.asarray(parent))
+        if not len(changed):
+            child.fitness.values = parent.fitness.values
+            continue
+
+        depth = getattr(parent, 'deltaDepth', 0) + 1
+        if depth > MAX_DELTA_DEPTH:
+            child.deltaDepth = 0
+        else:
+            child.fitness.values = toolbox.evaluateDelta(parent, child, parent.fitness.values, changed)
+            child.deltaDepth = depth
+            evaluations += 1
+
+    return evaluations
+
+
+class Checkpoint:
+    """
+    Saves the state of an eaSimpleWithElitism() run every given number of generations and/or seconds: the population
+    with its fitness values, the hall of fame, the logbook and the states of the random and NumPy random generators.
+    """
+
+    def __init__(self, path: str, frequency: int = None, interval: float = None, config: dict = None):
+        """
+        :param path: the checkpoint file, which is replaced on every save.
+        :param frequency: save every this number of generations.
+        :param interval: save when at least this number of seconds elapsed since the previous save.
+        :param config: an optional description of the run, e.g. the problem and the algorithm parameters, saved with
+        the state and checked by load(), so that a run is never resumed from the checkpoint of a different one.
+        """
+        self.path = path
+        self.frequency = frequency
+        self.interval = interval
+        self.config = config
+        self.lastSave = time.perf_counter()
+
+    def isDue(self, gen: int) -> bool:
+        """
+        :param gen: the generation just completed.
+        :return: True if the state should be saved now.
+        """
+        if self.frequency and gen % self.frequency == 0:
+            return True
+        return bool(self.interval) and time.perf_counter() - self.lastSave >= self.interval
+
+    def save(self, **state):
+        """
+        Saves the given state together with the random generators states. The file is written aside and then renamed,
+        so an interrupted save never corrupts the previous checkpoint.
+        """
+        state['randomState'] = random.getstate()
+        state['numpyState'] = np.random.get_state()
+        state['config'] = self.config
+
+        temporaryPath = self.path + '.tmp'
+        with open(temporaryPath, 'wb') as f:
+            pickle.dump(state, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(temporaryPath, self.path)
+
+        self.lastSave = time.perf_counter()
+
+    @staticmethod
+    def load(path: str, config: dict = None) -> dict:
+        """
+        :param path: a checkpoint file.
+        :param config: the expected description of the run, or None to accept any checkpoint.
+        :return: the saved state.
+        """
+        with open(path, 'rb') as f:
+            state = pickle.load(f)
+        if config is not None and state.get('config') != config:
+            raise ValueError('the checkpoint was saved by a run with a different configuration: ', state.get('config'))
+        return state
+
+
+class MatrixHallOfFame:
+    """
+    Hall of fame used by eaMatrixWithElitism(). It keeps the best distinct rows ever seen, sorted from best to worst,
+    together with their fitness values.
+    """
+
+    def __init__(self, maxsize: int, weights: tuple):
+        """
+        :param maxsize: the maximum number of rows to keep.
+        :param weights: the fitness weights, as given to creator.create(), used to rank the rows.
+        """
+        self.maxsize = maxsize
+        self.weights = np.asarray(weights, dtype=float)
+        self.items = None
+        self.fitness = None
+
+    def __len__(self):
+        return 0 if self.items is None else len(self.items)
+
+    def __getitem__(self, i):
+        return self.items[i]
+
+    def update(self, population, fitness):
+        """
+        Merges the given rows into the hall of fame.
+        :param population: a 2-D array with one genome per row.
+        :param fitness: a 2-D array with the fitness values of each row.
+        """
+        if self.items is not None:
+            population = np.concatenate((self.items, population))
+            fitness = np.concatenate((self.fitness, fitness))
+
+        # drop duplicated genomes, keeping the first occurrence
+        _, unique = np.unique(population, axis=0, return_index=True)
+        unique.sort()
+
+        best = unique[sortByFitness(fitness[unique] * self.weights)[:self.maxsize]]
+        self.items = population[best]
+        self.fitness = fitness[best]
+
+
+def sortByFitness(wvalues):
+    """
+    Sorts weighted fitness values from best to worst, comparing objectives lexicographically like DEAP does.
+    :param wvalues: a 2-D array of weighted fitness values, one row per individual.
+    :return: the row indices ordered from best to worst.
+    """
+    return np.lexsort(-wvalues[:, ::-1].T)
+
+
+def evaluateRows(rows, evaluate):
+    """
+    Adapts a per-individual fitness function to the batched evaluate() expected by eaMatrixWithElitism().
+    :param rows: a 2-D array with one genome per row.
+    :param evaluate: a function returning the fitness tuple of a single genome.
+    :return: a 2-D array with the fitness values of each row.
+    """
+    return np.array([evaluate(row) for row in rows], dtype=float).reshape(len(rows), -1)
+
+
+def eaMatrixWithElitism(population, toolbox, cxpb, mutpb, ngen, stats=None,
+                        halloffame=None, verbose=__debug__, rng=None, terminators=None, stream=None):
+    """This algorithm is a vectorized counterpart of eaSimpleWithElitism(). The population is a single 2-D NumPy array
+    with one genome per row and the fitness values are kept in a matching 2-D array, so selection, crossover, mutation
+    and elitism are applied to whole blocks of rows at once. The toolbox operators must be batched accordingly:
+    evaluate(rows) returns the fitness array of the given rows, select(wvalues, k, rng) returns the indices of the k
+    selected rows, mate(rows1, rows2, rng) returns the two arrays of children and mutate(rows, rng) returns the mutated
+    rows (see the operators module). The halloffame must be a MatrixHallOfFame, and stats is compiled over the fitness
+    array (see reporting.FitnessStatistics). The terminators and stream are the same as for eaSimpleWithElitism().
+    """
+    start = time.perf_counter()
+    logbook = tools.Logbook()
+    logbook.header = ['gen', 'nevals'] + (stats.fields if stats else [])
+
+    if rng is None:
+        rng = np.random.default_rng()
+
+    # Evaluate the whole initial population
+    population = np.asarray(population)
+    fitness = np.asarray(toolbox.evaluate(population), dtype=float).reshape(len(population), -1)
+
+    if halloffame is None:
+        raise ValueError("halloffame parameter must not be empty!")
+
+    halloffame.update(population, fitness)
+    hof_size = len(halloffame)
+
+    record = _compile(stats, fitness, 0)
+    logbook.record(gen=0, nevals=len(population), **record)
+    _report(logbook, verbose, stream)
+
+    evaluations = len(population)
+    if _isTerminated(terminators, 0, evaluations, time.perf_counter() - start, halloffame):
+        return population, logbook
+
+    # Begin the generational process
+    for gen in range(1, ngen + 1):
+
+        # Select the next generation rows
+        selected = toolbox.select(fitness * halloffame.weights, len(population) - hof_size, rng)
+        offspring = population[selected]
+        offspringFitness = fitness[selected]
+        invalid = np.zeros(len(offspring), dtype=bool)
+
+        # Mate consecutive pairs of rows
+        mated = np.flatnonzero(rng.random(len(offspring) // 2) < cxpb) * 2
+        if len(mated):
+            offspring[mated], offspring[mated + 1] = toolbox.mate(offspring[mated], offspring[mated + 1], rng)
+            invalid[mated] = invalid[mated + 1] = True
+
+        # Mutate single rows
+        mutated = rng.random(len(offspring)) < mutpb
+        if mutated.any():
+            offspring[mutated] = toolbox.mutate(offspring[mutated], rng)
+            invalid |= mutated
+
+        # Evaluate the rows with an invalid fitness
+        if invalid.any():
+            offspringFitness[invalid] = np.asarray(toolbox.evaluate(offspring[invalid]),
+                                                   dtype=float).reshape(-1, fitness.shape[1])
+
+        # add the best back to population and replace the current population by the offspring
+        population = np.concatenate((offspring, halloffame.items))
+        fitness = np.concatenate((offspringFitness, halloffame.fitness))
+
+        # Update the hall of fame with the generated rows
+        halloffame.update(population, fitness)
+
+        # Append the current generation statistics to the logbook
+        record = _compile(stats, fitness, gen)
+        logbook.record(gen=gen, nevals=int(invalid.sum()), **record)
+        _report(logbook, verbose, stream)
+
+        evaluations += int(invalid.sum())
+        if _isTerminated(terminators, gen, evaluations, time.perf_counter() - start, halloffame):
+            break
+
     return population, logbook
+
+
+def _getBestFitness(halloffame) -> tuple:
+    """
+    :return: the fitness values and weights of the best individual of a HallOfFame or a MatrixHallOfFame.
+    """
+    if isinstance(halloffame, MatrixHallOfFame):
+        return tuple(halloffame.fitness[0]), tuple(halloffame.weights)
+    return halloffame[0].fitness.values, halloffame[0].fitness.weights
+
+
+def _isTerminated(terminators, gen, evaluations, elapsed, halloffame) -> bool:
+    """
+    Checks every terminator, so that stateful ones see each generation.
+    """
+    terminated = False
+    for terminator in terminators or ():
+        terminated |= terminator(gen, evaluations, elapsed, halloffame)
+    return terminated
+
+
+class TargetFitness:
+    """
+    Stops the run once the best fitness reaches the given target value (the first objective is compared, according
+    to its weight).
+    """
+
+    def __init__(self, target: float):
+        """
+        :param target: the fitness value to reach, e.g. 0 violations.
+        """
+        self.target = target
+
+    def __call__(self, gen, evaluations, elapsed, halloffame) -> bool:
+        values, weights = _getBestFitness(halloffame)
+        return values[0] * weights[0] >= self.target * weights[0]
+
+
+class Stagnation:
+    """
+    Stops the run when the best fitness did not improve during the given number of generations.
+    """
+
+    def __init__(self, generations: int):
+        """
+        :param generations: the number of generations without improvement after which the run stops.
+        """
+        self.generations = generations
+        self.best = None
+        self.bestGen = 0
+
+    def __call__(self, gen, evaluations, elapsed, halloffame) -> bool:
+        values, weights = _getBestFitness(halloffame)
+        wvalues = tuple(v * w for v, w in zip(values, weights))
+        if self.best is None or wvalues > self.best:
+            self.best = wvalues
+            self.bestGen = gen
+        return gen - self.bestGen >= self.generations
+
+
+class MaxEvaluations:
+    """
+    Stops the run once the given number of fitness evaluations has been spent.
+    """
+
+    def __init__(self, evaluations: int):
+        """
+        :param evaluations: the maximum number of fitness evaluations.
+        """
+        self.evaluations = evaluations
+
+    def __call__(self, gen, evaluations, elapsed, halloffame) -> bool:
+        return evaluations >= self.evaluations
+
+
+class Deadline:
+    """
+    Stops the run once the given wall-clock time has elapsed.
+    """
+
+    def __init__(self, seconds: float):
+        """
+        :param seconds: the maximum duration of the run, in seconds.
+        """
+        self.seconds = seconds
+
+    def __call__(self, gen, evaluations, elapsed, halloffame) -> bool:
+        return elapsed >= self.seconds
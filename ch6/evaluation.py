@@ -0,0 +1,145 @@
+import collections
+import math
+import multiprocessing
+import os
+
+
+def getContext():
+    """
+    :return: the multiprocessing context used for the worker processes, preferring 'fork' so that the workers inherit
+    the problem data of the parent process instead of receiving a pickled copy.
+    """
+    startMethod = 'fork' if 'fork' in multiprocessing.get_all_start_methods() else None
+    return multiprocessing.get_context(startMethod)
+
+
+def getFitnesses(individuals, toolbox):
+    """
+    Evaluates the given individuals with toolbox.evaluateBatch when the toolbox provides it, in a single call for all
+    of them, or else with toolbox.evaluate through toolbox.map.
+    :param individuals: the individuals to evaluate.
+    :param toolbox: the toolbox providing the evaluation operators.
+    :return: the fitness values of the individuals.
+    """
+    if not individuals:
+        return []
+    if hasattr(toolbox, 'evaluateBatch'):
+        return toolbox.evaluateBatch(individuals)
+    return toolbox.map(toolbox.evaluate, individuals)
+
+
+class ParallelMap:
+    """
+    A drop-in replacement for toolbox.map that evaluates the individuals on a pool of worker processes.
+
+    Where the 'fork' start method is available, the workers inherit the problem instances (distance matrices,
+    adjacency matrices, schedule tables...) already built by the parent process, so only the individuals and the
+    resulting fitness values travel between the processes. Elsewhere, the problem data should be built once per worker
+    by the initializer instead of being pickled with every task.
+    """
+
+    def __init__(self, workers: int = None, chunksize: int = None, initializer=None, initargs: tuple = ()):
+        """
+        :param workers: number of worker processes, defaults to the number of CPUs.
+        :param chunksize: number of individuals sent to a worker at once, defaults to an even split of each batch.
+        :param initializer: optional function called once by each worker when it starts, to build the problem data.
+        It is not called under 'fork', where the workers inherit the problem data of the parent process.
+        :param initargs: arguments passed to the initializer.
+        """
+        self.workers = workers or os.cpu_count()
+        self.chunksize = chunksize
+
+        context = getContext()
+        if context.get_start_method() == 'fork':
+            initializer, initargs = None, ()
+        self.pool = context.Pool(self.workers, initializer, initargs)
+
+    def __call__(self, function, iterable):
+        items = list(iterable)
+        if not items:
+            return []
+
+        # split the batch into a few chunks per worker, so that the workers stay balanced without paying
+        # the inter-process overhead for every single individual
+        chunksize = self.chunksize or math.ceil(len(items) / (self.workers * 4))
+        return self.pool.map(function, items, chunksize)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def close(self):
+        """
+        Stops the worker processes.
+        """
+        self.pool.close()
+        self.pool.join()
+
+
+class FitnessCache:
+    """
+    A bounded memoization layer for the fitness function, keyed on the genome bytes.
+    Offspring identical to a parent, or to any genome evaluated recently, get their fitness from the cache instead of
+    being evaluated again. When the cache is full, the least recently used genomes are evicted first.
+    """
+
+    def __init__(self, maxsize: int = 100000):
+        """
+        :param maxsize: maximum number of genomes kept in the cache.
+        """
+        self.maxsize = maxsize
+        self.entries = collections.OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    @staticmethod
+    def getKey(individual):
+        """
+        :param individual: an array-based or list-based individual.
+        :return: a hashable key that identifies the genome of the individual.
+        """
+        try:
+            # array.array and NumPy individuals expose their raw bytes cheaply
+            return individual.tobytes()
+        except AttributeError:
+            return tuple(individual)
+
+    def evaluate(self, individuals, toolbox) -> tuple:
+        """
+        Sets the fitness of the given individuals, evaluating only the genomes that are not found in the cache, see
+        getFitnesses(). Identical genomes within the given individuals are evaluated once.
+        :param individuals: the individuals to evaluate.
+        :param toolbox: the toolbox providing the map and evaluate operators.
+        :return: the number of cache hits and misses.
+        """
+        hits = 0
+        pending = {}
+        for individual in individuals:
+            key = self.getKey(individual)
+            if key in self.entries:
+                self.entries.move_to_end(key)
+                individual.fitness.values = self.entries[key]
+                hits += 1
+            elif key in pending:
+                pending[key].append(individual)
+                hits += 1
+            else:
+                pending[key] = [individual]
+
+        fitnesses = getFitnesses([group[0] for group in pending.values()], toolbox)
+        for (key, group), fitness in zip(pending.items(), fitnesses):
+            for individual in group:
+                individual.fitness.values = fitness
+            self.entries[key] = fitness
+
+        while len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+
+        self.hits += hits
+        self.misses += len(pending)
+        return hits, len(pending)
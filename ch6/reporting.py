@@ -0,0 +1,100 @@
+import itertools
+import queue
+import threading
+
+import numpy as np
+
+
+class FitnessStatistics:
+    """
+    A vectorized replacement for tools.Statistics(lambda ind: ind.fitness.values).
+    The fitness values of the whole population are gathered once into a contiguous array, and every field is computed
+    per objective with a single NumPy reduction, instead of being recomputed from a fresh list of tuples.
+    """
+
+    FUNCTIONS = {
+        'min': np.min,
+        'max': np.max,
+        'avg': np.mean,
+        'std': np.std,
+    }
+
+    def __init__(self, fields=('min', 'max', 'avg', 'std'), interval: int = 1):
+        """
+        :param fields: the statistics to compute, among 'min', 'max', 'avg' and 'std'.
+        :param interval: compute the statistics only every this number of generations; the engines skip compile()
+        for the other generations, so the sampling follows the generation number, also in resumed runs.
+        """
+        for field in fields:
+            if field not in self.FUNCTIONS:
+                raise ValueError('unknown statistics field ', field)
+
+        self.fields = list(fields)
+        self.interval = interval
+
+    def compile(self, population) -> dict:
+        """
+        :param population: a list of individuals, or the 2-D fitness array used by eaMatrixWithElitism().
+        :return: a dictionary of the statistics; single-objective values are plain numbers, multi-objective values
+        hold one number per objective.
+        """
+        fitness = population if isinstance(population, np.ndarray) else self.getFitnessArray(population)
+        record = {}
+        for field in self.fields:
+            values = self.FUNCTIONS[field](fitness, axis=0)
+            record[field] = values[0] if len(values) == 1 else values
+        return record
+
+    @staticmethod
+    def getFitnessArray(population):
+        """
+        :param population: a list of individuals with valid fitness values.
+        :return: a 2-D array with the fitness values of each individual.
+        """
+        numOfObjectives = len(population[0].fitness.values)
+        values = itertools.chain.from_iterable(ind.fitness.values for ind in population)
+        return np.fromiter(values, dtype=float, count=len(population) * numOfObjectives).reshape(-1, numOfObjectives)
+
+
+class LogbookWriter:
+    """
+    Writes the logbook lines to a file from a background thread, through a large write buffer, so the generational
+    loop never waits on the output. Can be given to the engines as their stream.
+    """
+
+    def __init__(self, path: str, bufferSize: int = 1 << 16):
+        """
+        :param path: the output file.
+        :param bufferSize: the size of the file write buffer, in bytes.
+        """
+        self.file = open(path, 'w', buffering=bufferSize)
+        self.lines = queue.SimpleQueue()
+        self.thread = threading.Thread(target=self.__writeLines, daemon=True)
+        self.thread.start()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, text: str):
+        """
+        Queues the given text, followed by a new line, and returns immediately.
+        """
+        self.lines.put(text)
+
+    def close(self):
+        """
+        Writes the pending lines and closes the file.
+        """
+        self.lines.put(None)
+        self.thread.join()
+        self.file.close()
+
+    def __writeLines(self):
+        while True:
+            text = self.lines.get()
+            if text is None:
+                break
+            self.file.write(text + '\n')